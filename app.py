@@ -9,16 +9,30 @@ Run:
     streamlit run app.py
 """
 
+import importlib
+
 import streamlit as st
 
+from src.resources import enforce_session_budget
 from src.state import init_session_state
 from src.sidebar import render_sidebar
-from src.tabs.basic_info import render_basic_info_tab
-from src.tabs.energy_rates import render_energy_rates_tab
-from src.tabs.tou_demand import render_tou_demand_tab
-from src.tabs.flat_demand import render_flat_demand_tab
-from src.tabs.fixed_charges import render_fixed_charges_tab
-from src.tabs.review_export import render_export_tab
+
+# (tab title, module, render function) — tab modules are imported on first
+# render so heavy subsystems only load when a tab that needs them is shown
+TABS = [
+    ("Basic Info", "src.tabs.basic_info", "render_basic_info_tab"),
+    ("Energy Rates", "src.tabs.energy_rates", "render_energy_rates_tab"),
+    ("TOU Demand", "src.tabs.tou_demand", "render_tou_demand_tab"),
+    ("Flat Demand", "src.tabs.flat_demand", "render_flat_demand_tab"),
+    ("Coincident Demand", "src.tabs.coincident_demand", "render_coincident_demand_tab"),
+    ("Fixed Charges", "src.tabs.fixed_charges", "render_fixed_charges_tab"),
+    ("Review & Export", "src.tabs.review_export", "render_export_tab"),
+]
+
+
+def render_tab(module: str, func: str) -> None:
+    """Import a tab module on first use and call its render function."""
+    getattr(importlib.import_module(module), func)()
 
 
 def main():
@@ -37,27 +51,12 @@ def main():
         "or import an existing tariff to edit."
     )
 
-    tabs = st.tabs([
-        "Basic Info",
-        "Energy Rates",
-        "TOU Demand",
-        "Flat Demand",
-        "Fixed Charges",
-        "Review & Export",
-    ])
-
-    with tabs[0]:
-        render_basic_info_tab()
-    with tabs[1]:
-        render_energy_rates_tab()
-    with tabs[2]:
-        render_tou_demand_tab()
-    with tabs[3]:
-        render_flat_demand_tab()
-    with tabs[4]:
-        render_fixed_charges_tab()
-    with tabs[5]:
-        render_export_tab()
+    tabs = st.tabs([title for title, _, _ in TABS])
+    for tab, (_, module, func) in zip(tabs, TABS):
+        with tab:
+            render_tab(module, func)
+
+    enforce_session_budget()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,105 @@
+"""
+Cold-start benchmark: time to import the app and to finish its first render.
+
+Every sample runs in a fresh interpreter, so module caches start empty the way
+they do in a newly scaled-up container.  The first render is driven headlessly
+with ``streamlit.testing.v1.AppTest``.
+
+Usage:
+    python benchmarks/cold_start.py [--runs 5] [--budget-ms 1500] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ("numpy", "pandas", "pyarrow", "src.billing.bills", "src.bill_preview")
+
+IMPORT_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import streamlit
+t1 = time.perf_counter()
+import app
+t2 = time.perf_counter()
+print(json.dumps({
+    "streamlit_import_ms": (t1 - t0) * 1e3,
+    "app_import_ms": (t2 - t1) * 1e3,
+    "heavy_after_import": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+RENDER_PROBE = """
+import json, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("app.py", default_timeout=120)
+t0 = time.perf_counter()
+at.run()
+t1 = time.perf_counter()
+at.run()
+t2 = time.perf_counter()
+assert not at.exception, at.exception
+print(json.dumps({
+    "first_render_ms": (t1 - t0) * 1e3,
+    "warm_rerun_ms": (t2 - t1) * 1e3,
+}))
+"""
+
+
+def _probe(code: str) -> Dict:
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run(runs: int) -> Dict:
+    """Collect ``runs`` samples of each probe and return medians."""
+    samples: List[Dict] = []
+    for _ in range(runs):
+        sample = _probe(IMPORT_PROBE)
+        sample.update(_probe(RENDER_PROBE))
+        samples.append(sample)
+
+    result = {
+        key: statistics.median(s[key] for s in samples)
+        for key in ("streamlit_import_ms", "app_import_ms", "first_render_ms", "warm_rerun_ms")
+    }
+    result["heavy_after_import"] = samples[-1]["heavy_after_import"]
+    result["runs"] = runs
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Exit non-zero if the median first render exceeds this")
+    parser.add_argument("--json", help="Also write results to this file")
+    args = parser.parse_args()
+
+    result = run(args.runs)
+    print(f"Cold start (median of {result['runs']} fresh interpreters)")
+    print(f"  streamlit import   {result['streamlit_import_ms']:8.1f} ms")
+    print(f"  app import         {result['app_import_ms']:8.1f} ms")
+    print(f"  first render       {result['first_render_ms']:8.1f} ms")
+    print(f"  warm rerun         {result['warm_rerun_ms']:8.1f} ms")
+    heavy = ", ".join(result["heavy_after_import"]) or "none"
+    print(f"  heavy modules loaded by `import app`: {heavy}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(result, fh, indent=2)
+    if args.budget_ms is not None and result["first_render_ms"] > args.budget_ms:
+        sys.exit(f"First render {result['first_render_ms']:.0f} ms exceeds budget {args.budget_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Synthetic and real-shaped tariff fixtures for the benchmarks.
+"""
+
+import copy
+import random
+from typing import Dict, List
+
+import numpy as np
+
+from src.billing.profiles import archetype_profile
+
+BENCH_YEAR = 2023
+
+
+def _schedule(n_periods: int, rng: random.Random) -> List[List[int]]:
+    """12x24 schedule with contiguous seasonal TOU blocks over ``n_periods``."""
+    rows = []
+    for month in range(12):
+        base = 0 if month < 5 or month > 8 else n_periods // 2
+        row = []
+        for hour in range(24):
+            band = 0 if hour < 8 else (2 if 16 <= hour < 21 else 1)
+            row.append(min(base + band + rng.randrange(2), n_periods - 1))
+        rows.append(row)
+    return rows
+
+
+def synthetic_tariff(
+    n_periods: int = 12, n_tiers: int = 3, seed: int = 0, local_db: bool = False
+) -> Dict:
+    """Worst-case editor input: 12 TOU periods, multi-tier energy and demand.
+
+    ``local_db`` emits the local-DB field names (``energyRateStrux`` etc.) so
+    ``normalize_tariff`` has real work to do.
+    """
+    rng = random.Random(seed)
+
+    def tiers(base: float, unit: str) -> List[Dict]:
+        out = []
+        for ti in range(n_tiers):
+            tier = {"rate": round(base * (1 + 0.1 * ti), 5), "adj": round(rng.uniform(-.01, .01), 5)}
+            if unit:
+                tier["unit"] = unit
+            if ti < n_tiers - 1:
+                tier["max"] = 500.0 * (ti + 1)
+            out.append(tier)
+        return out
+
+    energy = [tiers(0.06 + 0.02 * p, "kWh") for p in range(n_periods)]
+    demand = [tiers(2.0 + 1.5 * p, "") for p in range(n_periods)]
+    tariff = {
+        "label": f"synthetic-{seed}",
+        "utility": f"Synthetic Utility {seed % 17}",
+        "name": f"TOU-{seed}",
+        "sector": ["Commercial", "Residential", "Industrial"][seed % 3],
+        "eiaid": 10000 + seed % 50,
+        "startdate": 1672531200 + 86400 * (seed % 365),
+        "energyratestructure": energy,
+        "energytoulabels": [f"Period {p}" for p in range(n_periods)],
+        "energyweekdayschedule": _schedule(n_periods, rng),
+        "energyweekendschedule": _schedule(n_periods, rng),
+        "demandratestructure": demand,
+        "demandtoulabels": [f"Demand {p}" for p in range(n_periods)],
+        "demandweekdayschedule": _schedule(n_periods, rng),
+        "demandweekendschedule": _schedule(n_periods, rng),
+        "demandrateunit": "kW",
+        "flatdemandstructure": [[{"rate": 8.5}], [{"rate": 12.25}]],
+        "flatdemandmonths": [0] * 5 + [1] * 4 + [0] * 3,
+        "fixedchargefirstmeter": 250.0,
+        "fixedchargeunits": "$/month",
+        "minmonthlycharge": 300.0,
+    }
+    if local_db:
+        tariff = {
+            "utilityName": tariff.pop("utility"),
+            "rateName": tariff.pop("name"),
+            "energyRateStrux": [{"energyRateTiers": t} for t in tariff.pop("energyratestructure")],
+            "demandRateStrux": [{"demandRateTiers": t} for t in tariff.pop("demandratestructure")],
+            "flatDemandStrux": [{"flatDemandTiers": t} for t in tariff.pop("flatdemandstructure")],
+            **tariff,
+        }
+    return tariff
+
+
+def real_shaped_tariff() -> Dict:
+    """A large-commercial TOU tariff shaped like URDB's common B-19/TOU-8 style rates."""
+    summer_wd = [0] * 8 + [1] * 4 + [2] * 6 + [1] * 5 + [0]
+    winter_wd = [3] * 8 + [4] * 8 + [5] * 5 + [4] * 2 + [3]
+    return {
+        "label": "real-shaped",
+        "utility": "Pacific Gas & Electric Co",
+        "name": "B-19 Secondary",
+        "sector": "Commercial",
+        "eiaid": 14328,
+        "startdate": 1677657600,
+        "energyratestructure": [
+            [{"rate": 0.1158, "adj": 0.0123, "unit": "kWh"}],
+            [{"rate": 0.1432, "adj": 0.0123, "unit": "kWh"}],
+            [{"rate": 0.1919, "adj": 0.0123, "unit": "kWh"}],
+            [{"rate": 0.1041, "adj": 0.0123, "unit": "kWh"}],
+            [{"rate": 0.1209, "adj": 0.0123, "unit": "kWh"}],
+            [{"rate": 0.1602, "adj": 0.0123, "unit": "kWh"}],
+        ],
+        "energytoulabels": ["Summer Off-Peak", "Summer Part-Peak", "Summer Peak",
+                            "Winter Off-Peak", "Winter Part-Peak", "Winter Peak"],
+        "energyweekdayschedule": [winter_wd] * 5 + [summer_wd] * 4 + [winter_wd] * 3,
+        "energyweekendschedule": [[3] * 24] * 5 + [[0] * 24] * 4 + [[3] * 24] * 3,
+        "demandratestructure": [[{"rate": 0.0}], [{"rate": 5.22}], [{"rate": 21.33}]],
+        "demandtoulabels": ["Off-Peak", "Part-Peak", "Peak"],
+        "demandweekdayschedule": [[0] * 12 + [1] * 4 + [2] * 5 + [0] * 3] * 12,
+        "demandweekendschedule": [[0] * 24] * 12,
+        "demandrateunit": "kW",
+        "flatdemandstructure": [[{"rate": 19.41}], [{"rate": 20.12}]],
+        "flatdemandmonths": [0] * 5 + [1] * 4 + [0] * 3,
+        "fixedchargefirstmeter": 120.5,
+        "fixedchargeunits": "$/month",
+    }
+
+
+def tariff_library(n: int) -> List[Dict]:
+    """``n`` distinct tariffs mixing synthetic and real-shaped entries."""
+    real = real_shaped_tariff()
+    library = []
+    for i in range(n):
+        if i % 4 == 0:
+            t = copy.deepcopy(real)
+            t["label"] = f"real-shaped-{i}"
+            t["energyratestructure"][2][0]["rate"] += i * 1e-4
+        else:
+            t = synthetic_tariff(n_periods=2 + i % 11, n_tiers=1 + i % 3, seed=i)
+        library.append(t)
+    return library
+
+
+def load_matrix(n_customers: int, year: int = BENCH_YEAR) -> np.ndarray:
+    """(customers, hours) kWh matrix built from scaled archetype profiles."""
+    names = ["Residential", "Small Commercial", "Large Commercial", "Industrial"]
+    rows = [
+        archetype_profile(names[i % len(names)], year, seed=i) * (0.5 + (i % 7) / 7)
+        for i in range(n_customers)
+    ]
+    return np.vstack(rows)
@@ -0,0 +1,249 @@
+"""
+Headless multi-session load test.
+
+Drives ``--sessions`` simulated users through a realistic editing flow with
+``streamlit.testing.v1.AppTest``: open the app, import a tariff, edit energy
+periods, enable TOU demand and edit its periods, then export. Sessions are
+kept alive and stepped round-robin, so peak RSS reflects N concurrent
+sessions sharing one server process.
+
+Reports p50/p95 rerun latency per flow step and per tab (time spent inside
+each tab's render function), plus peak RSS. Runs fully offline.
+
+Usage:
+    python benchmarks/load_test.py [--sessions 20] [--tariff path.json] [--json out.json]
+"""
+
+import argparse
+import copy
+import importlib
+import json
+import logging
+import os
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# tab title -> seconds spent in its render function, one entry per rerun
+TAB_TIMES: Dict[str, List[float]] = defaultdict(list)
+
+
+def instrument_tabs() -> None:
+    """Wrap each tab's render function with a timer.
+
+    ``app.render_tab`` looks the function up on the cached module at call
+    time, so patching the module attribute is enough.
+    """
+    import app
+
+    for title, module, func in app.TABS:
+        mod = importlib.import_module(module)
+        original = getattr(mod, func)
+
+        def timed(*args, _fn=original, _title=title, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return _fn(*args, **kwargs)
+            finally:
+                TAB_TIMES[_title].append(time.perf_counter() - t0)
+
+        setattr(mod, func, timed)
+
+
+def imported_state(tariff: Dict) -> Dict:
+    """Session-state entries written by ``import_tariff_data`` for ``tariff``.
+
+    AppTest cannot drive ``st.file_uploader``, so the import step applies
+    the same state the sidebar's Load Tariff button would.
+    """
+    import streamlit as st
+    from src.state import init_session_state
+    from src.tariff_io import import_tariff_data
+
+    for key in list(st.session_state.keys()):
+        del st.session_state[key]
+    init_session_state()
+    import_tariff_data(tariff)
+    state = {key: st.session_state[key] for key in st.session_state.keys()}
+    for key in list(st.session_state.keys()):
+        del st.session_state[key]
+    return state
+
+
+def _text_input(at, prefix: str):
+    """The text input whose versioned key starts with ``prefix``."""
+    for widget in at.text_input:
+        if widget.key and widget.key.startswith(prefix):
+            return widget
+    raise LookupError(f"no text input with key prefix {prefix!r}")
+
+
+def _number_input(at, prefix: str):
+    for widget in at.number_input:
+        if widget.key and widget.key.startswith(prefix):
+            return widget
+    raise LookupError(f"no number input with key prefix {prefix!r}")
+
+
+def _toggle(at, label: str):
+    for widget in at.toggle:
+        if widget.label == label:
+            return widget
+    raise LookupError(f"no toggle labelled {label!r}")
+
+
+def flow(state: Dict, session: int) -> List[tuple]:
+    """(step name, action) pairs for one simulated user."""
+
+    def do_import(at):
+        for key, value in copy.deepcopy(state).items():
+            at.session_state[key] = value
+        at.run()
+
+    def edit_energy(at):
+        _text_input(at, "energy_rate_0_").input(f"{0.1 + session * 1e-4:.4f}").run()
+        _text_input(at, "energy_adj_1_").input("0.0125").run()
+
+    def add_energy_period(at):
+        widget = _number_input(at, "energy_num_periods_")
+        widget.set_value(widget.value + 1).run()
+
+    def enable_demand(at):
+        toggle = _toggle(at, "Enable TOU Demand Charges")
+        if not toggle.value:
+            toggle.set_value(True).run()
+        else:
+            at.run()
+
+    def edit_demand(at):
+        _text_input(at, "demand_rate_0_").input("12.5000").run()
+
+    def export(at):
+        at.run()
+        item = json.loads(at.json[-1].value)["items"][0]
+        # the edits made earlier in the flow must survive to the export
+        assert item["energyratestructure"][0][0]["rate"] == round(0.1 + session * 1e-4, 4)
+        assert item["demandratestructure"][0][0]["rate"] == 12.5
+
+    return [
+        ("open", lambda at: at.run()),
+        ("import", do_import),
+        ("edit_energy", edit_energy),
+        ("add_period", add_energy_period),
+        ("enable_demand", enable_demand),
+        ("edit_demand", edit_demand),
+        ("export", export),
+    ]
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of ``values`` (0 < q <= 100)."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def _summary(samples: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    return {
+        name: {
+            "n": len(vals),
+            "p50_ms": percentile(vals, 50) * 1e3,
+            "p95_ms": percentile(vals, 95) * 1e3,
+        }
+        for name, vals in samples.items() if vals
+    }
+
+
+def run(sessions: int, tariff: Dict, timeout: float = 120) -> Dict:
+    from streamlit.testing.v1 import AppTest
+
+    instrument_tabs()
+    state = imported_state(tariff)
+    apps = [AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=timeout)
+            for _ in range(sessions)]
+    flows = [flow(state, i) for i in range(sessions)]
+    rss_start = peak_rss_mb()
+
+    step_times: Dict[str, List[float]] = defaultdict(list)
+    TAB_TIMES.clear()
+    t_start = time.perf_counter()
+    for step in range(len(flows[0])):
+        for at, steps in zip(apps, flows):
+            name, action = steps[step]
+            t0 = time.perf_counter()
+            action(at)
+            step_times[name].append(time.perf_counter() - t0)
+            if at.exception:
+                raise RuntimeError(f"{name}: {at.exception[0].message}")
+
+    return {
+        "sessions": sessions,
+        "wall_s": time.perf_counter() - t_start,
+        "steps": _summary(step_times),
+        "tabs": _summary(TAB_TIMES),
+        "rss_before_mb": rss_start,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _print_table(title: str, rows: Dict[str, Dict[str, float]]) -> None:
+    print(f"\n  {title:<24} {'n':>5} {'p50 ms':>9} {'p95 ms':>9}")
+    for name, r in rows.items():
+        print(f"  {name:<24} {r['n']:>5} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--tariff", help="URDB JSON to import (default: real-shaped fixture)")
+    parser.add_argument("--json", help="Also write results to this file")
+    args = parser.parse_args(argv)
+
+    # Silence bare-mode and deprecation warnings emitted on every rerun;
+    # AppTest re-applies Streamlit's configured log level, so filter globally
+    logging.disable(logging.WARNING)
+
+    if args.tariff:
+        from src.serialization import loads
+        from src.utils import normalize_tariff
+
+        with open(args.tariff, "rb") as fh:
+            raw = loads(fh.read())
+        tariff = normalize_tariff(raw["items"][0] if "items" in raw else raw)
+    else:
+        from benchmarks.fixtures import real_shaped_tariff
+        tariff = real_shaped_tariff()
+
+    result = run(args.sessions, tariff)
+    print(f"Load test: {result['sessions']} sessions in {result['wall_s']:.1f} s")
+    _print_table("flow step", result["steps"])
+    _print_table("tab render", result["tabs"])
+    if result["peak_rss_mb"] is not None:
+        print(f"\n  RSS before sessions {result['rss_before_mb']:8.1f} MB")
+        print(f"  peak RSS            {result['peak_rss_mb']:8.1f} MB")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(result, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
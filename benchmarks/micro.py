@@ -0,0 +1,327 @@
+"""
+Micro-benchmarks for the core tariff paths.
+
+Each benchmark times one hot function on worst-case-but-realistic input
+(12 TOU periods, multi-tier structures, large libraries and customer
+batches) and reports the best per-call time over several repeats, which is
+the least noisy statistic on a shared machine.
+
+Baselines are plain JSON so they can be committed or kept per machine:
+
+    python benchmarks/micro.py                      # run and print
+    python benchmarks/micro.py --save               # write the baseline
+    python benchmarks/micro.py --compare            # fail on >20% regressions
+    python benchmarks/micro.py --compare --threshold 0.1 --filter bill
+"""
+
+import argparse
+import copy
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+DEFAULT_BASELINE = os.path.join(ROOT, ".benchmarks", "baseline.json")
+
+
+class Benchmark(NamedTuple):
+    name: str
+    setup: Callable[[], Callable[[], object]]
+
+
+BENCHMARKS: List[Benchmark] = []
+
+
+def benchmark(name: str):
+    """Register ``setup``; it builds fixtures and returns the callable to time."""
+    def wrap(setup):
+        BENCHMARKS.append(Benchmark(name, setup))
+        return setup
+    return wrap
+
+
+def _session(tariff: Dict) -> None:
+    """Load ``tariff`` into a bare-mode session state."""
+    import streamlit as st
+    from src.state import init_session_state
+    from src.tariff_io import import_tariff_data
+
+    for key in list(st.session_state.keys()):
+        del st.session_state[key]
+    init_session_state()
+    import_tariff_data(tariff)
+
+
+# ── Editor paths ─────────────────────────────────────────────────────────
+
+@benchmark("normalize_tariff.local_db")
+def _normalize():
+    from benchmarks.fixtures import synthetic_tariff
+    from src.utils import normalize_tariff
+
+    raw = synthetic_tariff(local_db=True)
+    return lambda: normalize_tariff(raw)
+
+
+@benchmark("extract_periods.12x3")
+def _extract():
+    from benchmarks.fixtures import synthetic_tariff
+    from src.utils import extract_periods_from_structure
+
+    t = synthetic_tariff()
+    return lambda: extract_periods_from_structure(t["energyratestructure"], t["energytoulabels"])
+
+
+@benchmark("assign_heatmap_colors.12")
+def _colors():
+    from src.utils import assign_heatmap_colors
+
+    periods = [{"label": f"P{i}", "rate": 0.05 + 0.013 * i, "adj": 0.0} for i in range(12)]
+    return lambda: assign_heatmap_colors(copy.copy(periods))
+
+
+@benchmark("import_tariff_data.12x3")
+def _import():
+    from benchmarks.fixtures import synthetic_tariff
+    from src.tariff_io import import_tariff_data
+
+    import streamlit as st
+
+    # Percent-form ratchets (80 = 80%) are stored as fractions, as ratchet_settings reads them
+    _session(dict(synthetic_tariff(), demandratchetpercentage=[80] * 12))
+    assert st.session_state.demand_ratchet == [0.8] * 12
+
+    t = synthetic_tariff()
+    _session(t)
+    return lambda: import_tariff_data(t)
+
+
+@benchmark("build_tariff_json.12x3")
+def _build():
+    from benchmarks.fixtures import synthetic_tariff
+    from src.tariff_io import build_tariff_json
+
+    _session(synthetic_tariff())
+    return build_tariff_json
+
+
+@benchmark("validate_tariff.12x3")
+def _validate():
+    from benchmarks.fixtures import synthetic_tariff
+    from src.validation import validate_tariff
+
+    _session(synthetic_tariff())
+    return validate_tariff
+
+
+@benchmark("create_grid_html.12")
+def _grid():
+    from benchmarks.fixtures import synthetic_tariff
+    from src.components import create_grid_html
+    from src.utils import extract_periods_from_structure
+
+    t = synthetic_tariff()
+    periods = extract_periods_from_structure(t["energyratestructure"], t["energytoulabels"])
+    sched = t["energyweekdayschedule"]
+    return lambda: create_grid_html("bench", sched, periods, "Weekday", show_rates=True)
+
+
+# ── Serialization ────────────────────────────────────────────────────────
+
+@benchmark("tariff_hash.12x3")
+def _hash():
+    from benchmarks.fixtures import synthetic_tariff
+    from src.serialization import tariff_hash
+
+    t = synthetic_tariff()
+    return lambda: tariff_hash(t)
+
+
+@benchmark("dumps.library500")
+def _dumps():
+    from benchmarks.fixtures import tariff_library
+    from src.serialization import dumps
+
+    lib = tariff_library(500)
+    return lambda: dumps(lib)
+
+
+# ── Bill engine ──────────────────────────────────────────────────────────
+
+@benchmark("compute_determinants.12x3.c100")
+def _determinants():
+    from benchmarks.fixtures import BENCH_YEAR, load_matrix, synthetic_tariff
+    from src.billing.determinants import compute_determinants
+
+    t, loads = synthetic_tariff(), load_matrix(100)
+    return lambda: compute_determinants(t, loads, BENCH_YEAR)
+
+
+@benchmark("compute_bill.cached.12x3.c100")
+def _bill():
+    import numpy as np
+
+    from benchmarks.fixtures import BENCH_YEAR, load_matrix, synthetic_tariff
+    from src.billing.bills import compute_bill
+    from src.billing.determinants import DeterminantCache, profile_key
+
+    t, loads = synthetic_tariff(), load_matrix(100)
+    cache, key = DeterminantCache(), profile_key(loads)
+    # Unsigned loads carry no export lattice; the cached path must match the uncached one
+    cached = compute_bill(t, loads, BENCH_YEAR, cache=cache, load_key=key)
+    assert np.allclose(cached["total"], compute_bill(t, loads, BENCH_YEAR)["total"])
+    assert cache.nbytes > 0
+    return lambda: compute_bill(t, loads, BENCH_YEAR, cache=cache, load_key=key)
+
+
+@benchmark("untiered_energy_costs.t500.c100")
+def _untiered():
+    from benchmarks.fixtures import BENCH_YEAR, load_matrix, tariff_library
+    from src.billing.price_vectors import PriceVectorCache, untiered_energy_costs
+
+    lib, loads = tariff_library(500), load_matrix(100)
+    cache = PriceVectorCache(maxsize=1024)
+    untiered_energy_costs(lib, loads, BENCH_YEAR, cache)
+    return lambda: untiered_energy_costs(lib, loads, BENCH_YEAR, cache)
+
+
+@benchmark("sweep_scenarios.s1000.c20")
+def _sweep():
+    from benchmarks.fixtures import BENCH_YEAR, load_matrix, synthetic_tariff
+    from src.billing.determinants import DeterminantCache, profile_key
+    from src.billing.scenarios import scenario_grid, sweep_scenarios
+
+    t, loads = synthetic_tariff(), load_matrix(20)
+    grid = scenario_grid(
+        energy_rate_multiplier=[0.9 + 0.01 * i for i in range(20)],
+        demand_rate_multiplier=[0.8, 0.9, 1.0, 1.1, 1.2],
+        fixed_charge_delta=[-10.0, 0.0, 5.0, 10.0, 20.0, 40.0, 80.0, 100.0, 120.0, 150.0],
+    )
+    cache, key = DeterminantCache(), profile_key(loads)
+    _check_signed_sweep()
+    return lambda: sweep_scenarios(t, loads, BENCH_YEAR, grid, cache=cache, load_key=key)
+
+
+def _check_signed_sweep() -> None:
+    """An identity scenario on signed load must reproduce ``compute_bill``."""
+    import numpy as np
+
+    from benchmarks.fixtures import BENCH_YEAR, load_matrix, synthetic_tariff
+    from src.billing.bills import compute_bill
+    from src.billing.calendar import hourly_calendar
+    from src.billing.scenarios import scenario_grid, sweep_scenarios
+
+    # Exports all summer, imports all winter: credits hit the $0 monthly cap
+    month = hourly_calendar(BENCH_YEAR).month
+    loads = load_matrix(5) * np.where((month >= 4) & (month <= 8), -3.0, 1.0)
+    for net_metering in (True, False):
+        t = dict(synthetic_tariff(), usenetmetering=net_metering, minmonthlycharge=0)
+        for tiers in t["energyratestructure"]:
+            tiers[0]["sell"] = 0.05
+        bill = compute_bill(t, loads, BENCH_YEAR)["total"].sum(axis=1)
+        swept = sweep_scenarios(t, loads, BENCH_YEAR, scenario_grid(energy_rate_multiplier=[1.0]))
+        assert np.allclose(swept[0], bill), (net_metering, swept[0], bill)
+
+
+# ── Runner ───────────────────────────────────────────────────────────────
+
+def time_call(fn: Callable[[], object], repeat: int, min_time: float) -> float:
+    """Best seconds per call across ``repeat`` autoranged samples."""
+    timer = timeit.Timer(fn)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run(pattern: Optional[str], repeat: int, min_time: float) -> Dict[str, float]:
+    results: Dict[str, float] = {}
+    for bench in BENCHMARKS:
+        if pattern and pattern not in bench.name:
+            continue
+        results[bench.name] = time_call(bench.setup(), repeat, min_time)
+        print(f"  {bench.name:<36} {_fmt(results[bench.name]):>10}")
+    return results
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> List[str]:
+    """Names whose time grew by more than ``threshold`` relative to the baseline."""
+    regressions = []
+    print(f"\n  {'benchmark':<36} {'baseline':>10} {'now':>10} {'change':>8}")
+    for name, now in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"  {name:<36} {'—':>10} {_fmt(now):>10} {'new':>8}")
+            continue
+        change = now / base - 1
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"  {name:<36} {_fmt(base):>10} {_fmt(now):>10} {change:>+8.1%}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def _fmt(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per sample")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="compare against the baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown before failing (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    # Bare-mode Streamlit warns on every session-state access.
+    from streamlit.logger import set_log_level
+    set_log_level("error")
+
+    results = run(args.filter, args.repeat, args.min_time)
+    status = 0
+
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline}; run with --save first.")
+            return 2
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}.")
+            status = 1
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        saved = {}
+        if args.filter and os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                saved = json.load(f)["results"]
+        saved.update(results)
+        meta = {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        with open(args.baseline, "w") as f:
+            json.dump({"meta": meta, "results": saved}, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
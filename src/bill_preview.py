@@ -0,0 +1,285 @@
+"""
+Live monthly bill preview for the Energy Rates and TOU Demand tabs.
+
+The sample load profile is reduced once to month x daytype x hour kWh sums and
+kW maxima, held in the process-wide cache so sessions share them.  The preview
+component re-bills from those 576 cells in the browser, reading painted
+schedules from the same localStorage keys as the grids, so both rate edits (a
+Streamlit rerun) and repaints (a storage event) update the table in well under
+a millisecond of compute.
+"""
+
+import json
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import streamlit as st
+
+from src.billing.bills import rate_tables
+from src.billing.determinants import (
+    daily_demand_units,
+    flat_month_map,
+    needs_daily,
+    tier_arrays,
+    uses_net_metering,
+)
+from src.billing.calendar import interval_minutes
+from src.billing.ratchets import ratchet_settings
+from src.constants import MONTH_NAMES, PREVIEW_NONE, PREVIEW_UPLOAD
+from src.resources import profile_aggregates
+from src.tariff_io import build_tariff_json
+
+
+def preview_aggregates(
+    year: int, daily: bool = False
+) -> Optional[Tuple[List, List, Optional[Dict], Optional[List]]]:
+    """Aggregates for the selected sample profile, or None if unavailable.
+
+    With ``daily`` the third item holds per-day hourly peaks for daily demand
+    units; otherwise it is None.  The fourth is the exported kWh lattice of a
+    signed (net-load) upload, else None.
+    """
+    ss = st.session_state
+    profile = ss.preview_profile
+    if profile == PREVIEW_NONE:
+        return None
+    if profile == PREVIEW_UPLOAD:
+        upload = ss.preview_upload
+        if upload is None:
+            st.caption("Upload an interval kWh CSV in the sidebar to preview bills.")
+            return None
+        try:
+            interval_minutes(len(upload), year)
+        except ValueError as e:
+            st.warning(f"{e} (The preview uses the effective-date year.)")
+            return None
+        agg = profile_aggregates(
+            profile, year, upload, ss.preview_upload_key, ss.demand_window, daily
+        )
+    else:
+        agg = profile_aggregates(profile, year, daily=daily)
+    days = None
+    if daily:
+        days = {
+            "pk": np.round(agg.daily.peak[0], 3).tolist(),
+            "m": agg.daily.month.tolist(),
+            "we": agg.daily.weekend.astype(int).tolist(),
+        }
+    export = None
+    if agg.export_kwh is not None:
+        export = np.round(agg.export_kwh[0], 4).tolist()
+    return np.round(agg.kwh[0], 4).tolist(), np.round(agg.peak[0], 4).tolist(), days, export
+
+
+def _bounds_json(bounds: np.ndarray) -> List:
+    return [[None if np.isinf(b) else float(b) for b in row] for row in bounds]
+
+
+def create_bill_preview_html(
+    kwh: List,
+    peak: List,
+    tariff: Dict,
+    year: int,
+    sched_version: int,
+    demand_enabled: bool,
+    daily: Optional[Dict] = None,
+    export: Optional[List] = None,
+) -> str:
+    """Build the self-updating monthly bill table.
+
+    Args:
+        kwh, peak:      12x2x24 net kWh sums / kW maxima (weekday=0, weekend=1).
+        daily:          Per-day hourly peaks ({pk, m, we}) when the tariff uses
+                        daily demand units.
+        export:         12x2x24 exported kWh for a signed load profile; the
+                        Energy column is then net of export credits.
+        tariff:         Tariff item as produced by ``build_tariff_json``.
+        year:           Calendar year the fixed-charge units are resolved for.
+        sched_version:  Current schedule version; stale localStorage is ignored.
+        demand_enabled: Whether TOU demand charges apply.
+    """
+    rates = rate_tables(tariff, year)
+    ratchet = ratchet_settings(tariff)
+    tou_daily, flat_daily = daily_demand_units(tariff) if daily else (False, False)
+    _, d_bounds = tier_arrays(tariff.get("demandratestructure") or [])
+    f_struct = tariff.get("flatdemandstructure") or []
+    f_bounds = np.full((12, 1), np.inf)
+    if f_struct:
+        _, f_bounds = tier_arrays(f_struct)
+        f_bounds = f_bounds[np.clip(flat_month_map(tariff), 0, len(f_struct) - 1)]
+    payload = {
+        "kwh": kwh,
+        "pk": peak,
+        "eR": rates.energy[:, 0].tolist(),
+        "ex": export,
+        "sell": rates.sell.tolist(),
+        "nem": uses_net_metering(tariff),
+        # Demand blocks: per-tier rates and cumulative upper bounds (null = unbounded)
+        "dR": rates.demand.tolist() if demand_enabled else [],
+        "dB": _bounds_json(d_bounds) if demand_enabled else [],
+        "fR": rates.flat.tolist(),
+        "fB": _bounds_json(f_bounds),
+        "daily": daily,
+        "dDaily": tou_daily,
+        "fDaily": flat_daily,
+        # Demand ratchet: [12 monthly fractions, look-back months], floored
+        # against this year's peaks only
+        "rat": [ratchet[0].tolist(), ratchet[1]] if ratchet else None,
+        "fOn": bool(f_struct),
+        "fx": rates.fixed.tolist(),
+        "minM": rates.min_monthly,
+        "annMin": rates.annual_min,
+        "ewd": tariff.get("energyweekdayschedule"),
+        "ewe": tariff.get("energyweekendschedule"),
+        "dwd": tariff.get("demandweekdayschedule") or [[0] * 24 for _ in range(12)],
+        "dwe": tariff.get("demandweekendschedule") or [[0] * 24 for _ in range(12)],
+    }
+    return f"""
+<style>
+.bp-c{{font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto,sans-serif;padding:16px;
+  background:linear-gradient(135deg,#1a1a2e,#16213e);border-radius:16px;
+  box-shadow:0 20px 40px -12px rgba(0,0,0,.5);color:#e2e8f0}}
+.bp-c table{{width:100%;border-collapse:collapse;font-size:.8em}}
+.bp-c th{{text-align:right;padding:5px 8px;color:rgba(255,255,255,.75);font-weight:600;
+  border-bottom:1px solid rgba(255,255,255,.2)}}
+.bp-c td{{text-align:right;padding:4px 8px;border-bottom:1px solid rgba(255,255,255,.06)}}
+.bp-c th:first-child,.bp-c td:first-child{{text-align:left}}
+.bp-c tr.tot td{{font-weight:700;border-top:1px solid rgba(255,255,255,.3)}}
+.bp-i{{color:rgba(255,255,255,.55);font-size:.72em;margin-top:8px;text-align:center}}
+</style>
+<div class="bp-c">
+  <table>
+    <thead><tr><th>Month</th><th>kWh</th><th>Energy</th><th>TOU Demand</th>
+      <th>Flat Demand</th><th>Fixed</th><th>Min. True-up</th><th>Total</th></tr></thead>
+    <tbody id="bp-body"></tbody>
+  </table>
+  <div class="bp-i" id="bp-info"></div>
+</div>
+<script>
+(function(){{
+  const P={json.dumps(payload)},
+    months={json.dumps(MONTH_NAMES)},
+    ver='{sched_version}',
+    demandOn={'true' if demand_enabled else 'false'},
+    keys=['tou_sched_energy_weekday','tou_sched_energy_weekend',
+          'tou_sched_demand_weekday','tou_sched_demand_weekend'];
+  let lastRaw='';
+  function readLS(key,fallback){{
+    try{{
+      const d=JSON.parse(localStorage.getItem(key)||'null');
+      if(d&&d.v===ver&&d.s)return d.s;
+    }}catch(e){{}}
+    return fallback;
+  }}
+  function clamp(p,n){{return Math.max(0,Math.min(p|0,n-1));}}
+  function tiered(q,R,B){{
+    let c=0,lo=0;
+    for(let i=0;i<R.length;i++){{
+      const hi=B[i]===null?Infinity:B[i];
+      c+=Math.max(Math.min(q,hi)-Math.min(q,lo),0)*R[i];lo=hi;
+    }}
+    return c;
+  }}
+  function money(x){{return '$'+x.toLocaleString(undefined,{{minimumFractionDigits:2,maximumFractionDigits:2}});}}
+  function compute(){{
+    const t0=performance.now(),
+      ew=[readLS(keys[0],P.ewd),readLS(keys[1],P.ewe)],
+      dw=[readLS(keys[2],P.dwd),readLS(keys[3],P.dwe)],
+      nE=P.eR.length,nD=demandOn?P.dR.length:0,rows=[],
+      dDay=new Array(12).fill(0),fDay=new Array(12).fill(0),floor=new Array(12).fill(0);
+    if(P.rat){{
+      const mp=P.pk.map(M=>Math.max(...M[0],...M[1]));
+      for(let m=0;m<12;m++)floor[m]=P.rat[0][m]*Math.max(0,...mp.slice(Math.max(0,m-P.rat[1]),m));
+    }}
+    if(P.daily){{
+      const D=P.daily;
+      for(let i=0;i<D.m.length;i++){{
+        const m=D.m[i],dt=D.we[i],row=D.pk[i],mx=new Array(nD).fill(0);let pk=0;
+        for(let h=0;h<24;h++){{
+          const v=row[h];if(v>pk)pk=v;
+          if(nD){{const q=clamp(dw[dt][m][h],nD);if(v>mx[q])mx[q]=v;}}
+        }}
+        if(P.dDaily)for(let q=0;q<nD;q++)dDay[m]+=tiered(mx[q],P.dR[q],P.dB[q]);
+        if(P.fDaily)fDay[m]+=tiered(pk,P.fR[m],P.fB[m]);
+      }}
+    }}
+    for(let m=0;m<12;m++){{
+      let kwhM=0,e=0,cr=0,fpk=0;const dmax=new Array(nD).fill(0),net=new Array(nE).fill(0);
+      for(let d=0;d<2;d++)for(let h=0;h<24;h++){{
+        const k=P.kwh[m][d][h],v=P.pk[m][d][h];
+        kwhM+=k;
+        if(nE){{
+          const q=clamp(ew[d][m][h],nE),x=P.ex?P.ex[m][d][h]:0;
+          if(P.ex&&P.nem)net[q]+=k;
+          else{{e+=(k+x)*P.eR[q];cr+=x*P.sell[q];}}
+        }}
+        if(v>fpk)fpk=v;
+        if(nD){{const q=clamp(dw[d][m][h],nD);if(v>dmax[q])dmax[q]=v;}}
+      }}
+      if(P.ex&&P.nem)for(let q=0;q<nE;q++){{e+=Math.max(net[q],0)*P.eR[q];cr+=Math.max(-net[q],0)*P.sell[q];}}
+      let dem=dDay[m];
+      if(!P.dDaily){{
+        if(floor[m]&&nD&&!P.fOn)for(let d=0;d<2;d++)for(let h=0;h<24;h++){{
+          const q=clamp(dw[d][m][h],nD);if(floor[m]>dmax[q])dmax[q]=floor[m];
+        }}
+        for(let q=0;q<nD;q++)dem+=tiered(dmax[q],P.dR[q],P.dB[q]);
+      }}
+      const flat=P.fDaily?fDay[m]:tiered(Math.max(fpk,floor[m]),P.fR[m],P.fB[m]);
+      e-=Math.min(cr,Math.max(e+dem+flat+P.fx[m],0));  // credits offset at most the month's charges
+      const sub=e+dem+flat+P.fx[m];
+      rows.push([kwhM,e,dem,flat,P.fx[m],Math.max(P.minM-sub,0)]);
+    }}
+    const annual=rows.reduce((s,r)=>s+r[1]+r[2]+r[3]+r[4]+r[5],0);
+    if(P.annMin>annual)rows[11][5]+=P.annMin-annual;
+    const tot=[0,0,0,0,0,0,0];let html='';
+    rows.forEach((r,m)=>{{
+      const total=r[1]+r[2]+r[3]+r[4]+r[5];
+      r.forEach((x,i)=>tot[i]+=x);tot[6]+=total;
+      html+='<tr><td>'+months[m]+'</td><td>'+Math.round(r[0]).toLocaleString()+'</td>'
+        +r.slice(1).map(x=>'<td>'+money(x)+'</td>').join('')+'<td>'+money(total)+'</td></tr>';
+    }});
+    html+='<tr class="tot"><td>Annual</td><td>'+Math.round(tot[0]).toLocaleString()+'</td>'
+      +tot.slice(1).map(x=>'<td>'+money(x)+'</td>').join('')+'</tr>';
+    document.getElementById('bp-body').innerHTML=html;
+    document.getElementById('bp-info').textContent=
+      'Recalculated in '+(performance.now()-t0).toFixed(2)+' ms from painted schedules. '
+      +'Uses base + adjustment rates (first energy tier; all demand blocks).';
+  }}
+  function poll(){{
+    const raw=keys.map(k=>localStorage.getItem(k)||'').join('|');
+    if(raw!==lastRaw){{lastRaw=raw;compute();}}
+  }}
+  window.addEventListener('storage',e=>{{if(!e.key||e.key.startsWith('tou_sched_'))poll();}});
+  setInterval(poll,750);
+  poll();
+}})();
+</script>"""
+
+
+def render_bill_preview() -> None:
+    """Render the live monthly bill preview for the selected sample profile."""
+    ss = st.session_state
+    st.markdown("### Bill Preview")
+
+    year = ss.basic_startdate.year
+    tariff = build_tariff_json()["items"][0]
+    aggs = preview_aggregates(year, daily=needs_daily(tariff))
+    if aggs is None:
+        return
+    kwh, peak, daily, export = aggs
+
+    st.caption(
+        f"Sample profile: **{ss.preview_profile}** ({year}). "
+        "Updates live as schedules are painted."
+    )
+    html = create_bill_preview_html(
+        kwh,
+        peak,
+        tariff,
+        year,
+        ss.sched_version,
+        ss.demand_enabled,
+        daily,
+        export,
+    )
+    st.components.v1.html(html, height=520, scrolling=False)
@@ -0,0 +1,195 @@
+"""
+Monthly bill calculation from cached determinants and rate tables.
+"""
+
+import calendar as _calendar
+from typing import Dict, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from src.billing.coincident import coincident_charges, has_coincident
+from src.billing.determinants import (
+    BillDeterminants,
+    DeterminantCache,
+    demand_window,
+    determinants_from_aggregates,
+    flat_month_map,
+    needs_daily,
+    tier_arrays,
+    tier_field,
+)
+from src.billing.ratchets import ratchet_floor, ratchet_settings
+from src.utils import normalize_tariff
+
+BILL_COMPONENTS = ["energy", "export", "demand", "flat", "coincident", "fixed", "minimum"]
+
+
+class RateTables(NamedTuple):
+    """The linear (rate + adj) side of a bill, aligned with ``BillDeterminants``."""
+
+    energy: np.ndarray  # (energy periods, energy tiers)
+    demand: np.ndarray  # (demand periods, demand tiers)
+    flat: np.ndarray    # (12, flat tiers) — already mapped through flatdemandmonths
+    fixed: np.ndarray   # (12,) fixed charge per month
+    min_monthly: float
+    annual_min: float
+    sell: np.ndarray    # (energy periods,) first-tier export credit rate
+
+
+def _monthly_fixed(t: Dict, year: int) -> np.ndarray:
+    """Fixed charge per month, honouring $/day and $/year units."""
+    charge = float(t.get("fixedchargefirstmeter") or 0)
+    units = (t.get("fixedchargeunits") or "$/month").lower()
+    if units == "$/day":
+        days = [_calendar.monthrange(year, m + 1)[1] for m in range(12)]
+        return charge * np.asarray(days, dtype=float)
+    if units == "$/year":
+        return np.full(12, charge / 12)
+    return np.full(12, charge)
+
+
+def rate_tables(tariff: Dict, year: int) -> RateTables:
+    """Extract rate + adj tables from a tariff for use with its determinants."""
+    t = normalize_tariff(tariff)
+    e_struct = t.get("energyratestructure") or []
+    e_rates, _ = tier_arrays(e_struct)
+    d_rates, _ = tier_arrays(t.get("demandratestructure") or [])
+    f_struct = t.get("flatdemandstructure") or []
+    if f_struct:
+        f_rates, _ = tier_arrays(f_struct)
+        f_rates = f_rates[np.clip(flat_month_map(t), 0, len(f_struct) - 1)]
+    else:
+        f_rates = np.zeros((12, 1))
+    return RateTables(
+        energy=e_rates,
+        demand=d_rates,
+        flat=f_rates,
+        fixed=_monthly_fixed(t, year),
+        min_monthly=float(t.get("minmonthlycharge") or 0),
+        annual_min=float(t.get("annualmincharge") or 0),
+        sell=tier_field(e_struct, "sell")[:, 0],
+    )
+
+
+def export_credit(det: BillDeterminants, rates: RateTables) -> np.ndarray:
+    """Credit for exported kWh as negative (customers, 12) amounts."""
+    if det.export_kwh is None:
+        return np.zeros(det.peak_kw.shape)
+    return -np.einsum("cmp,p->cm", det.export_kwh, rates.sell)
+
+
+def bill_from_determinants(
+    det: BillDeterminants, rates: RateTables, coincident: Optional[np.ndarray] = None
+) -> Dict[str, np.ndarray]:
+    """Price determinants with rate tables.
+
+    Returns a dict of (customers, 12) arrays keyed by ``BILL_COMPONENTS`` plus
+    ``"total"``.  ``"export"`` is the (negative) credit for exported kWh at
+    each energy period's ``sell`` rate, capped at the month's other charges:
+    credits never take a month below $0 and any excess is forfeited, not
+    carried forward.  ``coincident`` holds priced coincident demand charges
+    (see ``src.billing.coincident``), zero when omitted.  ``"minimum"`` is
+    the true-up needed to reach ``minmonthlycharge`` each month; any
+    shortfall against ``annualmincharge`` is added to December.
+    """
+    energy = np.einsum("cmpt,pt->cm", det.energy_kwh, rates.energy)
+    demand = np.einsum("cmpt,pt->cm", det.demand_kw, rates.demand)
+    flat = np.einsum("cmt,mt->cm", det.flat_kw, rates.flat)
+    fixed = np.broadcast_to(rates.fixed, energy.shape)
+    coincident = np.zeros_like(energy) if coincident is None else coincident
+    charges = energy + demand + flat + coincident + fixed
+    # Export credits offset at most the month's charges; an excess is forfeited
+    export = np.maximum(export_credit(det, rates), -np.maximum(charges, 0.0))
+
+    subtotal = charges + export
+    minimum = np.maximum(rates.min_monthly - subtotal, 0.0)
+    if rates.annual_min:
+        annual = (subtotal + minimum).sum(axis=1)
+        minimum[:, 11] += np.maximum(rates.annual_min - annual, 0.0)
+
+    return {
+        "energy": energy,
+        "export": export,
+        "demand": demand,
+        "flat": flat,
+        "coincident": coincident,
+        "fixed": np.array(fixed),
+        "minimum": minimum,
+        "total": subtotal + minimum,
+    }
+
+
+_default_cache = DeterminantCache()
+
+
+def compute_bill(
+    tariff: Dict,
+    loads: np.ndarray,
+    year: int,
+    cache: Optional[DeterminantCache] = None,
+    load_key: Optional[str] = None,
+    coincident_peaks: Optional[np.ndarray] = None,
+) -> Dict[str, np.ndarray]:
+    """Monthly bill breakdown for one or many hourly or sub-hourly load profiles.
+
+    Determinants come from ``cache`` (the module cache by default), so calling
+    this again after a rate-only edit skips the pass over the time series.
+    ``coincident_peaks`` (system-peak interval indices or a boolean mask)
+    bills the tariff's coincident demand charges; without it they are zero.
+    """
+    if cache is None:
+        cache = _default_cache
+    det = cache.get(tariff, loads, year, load_key=load_key)
+    coincident = None
+    if coincident_peaks is not None and has_coincident(tariff):
+        coincident = coincident_charges(tariff, loads, year, coincident_peaks)
+    return bill_from_determinants(det, rate_tables(tariff, year), coincident)
+
+
+def compute_bills_multi_year(
+    tariff: Dict,
+    profiles: Sequence[np.ndarray],
+    years: Sequence[int],
+    cache: Optional[DeterminantCache] = None,
+    coincident_peaks: Optional[Sequence[np.ndarray]] = None,
+) -> Dict[str, np.ndarray]:
+    """Monthly bills for consecutive years of load profiles.
+
+    Demand ratchets look back across year boundaries: every year's monthly
+    peaks are stacked into one (customers, 12 * years) array and floored in
+    a single trailing-maximum call.  ``coincident_peaks`` gives each year's
+    system-peak intervals, as for ``compute_bill``; without it coincident
+    charges are zero.  Returns (customers, 12 * years) arrays keyed like
+    ``bill_from_determinants``; annual minimums apply per year.
+    """
+    if cache is None:
+        cache = _default_cache
+    if len(profiles) != len(years):
+        raise ValueError(f"{len(profiles)} profiles for {len(years)} years.")
+    if coincident_peaks is not None and len(coincident_peaks) != len(years):
+        raise ValueError(f"{len(coincident_peaks)} coincident peak sets for {len(years)} years.")
+    window, daily = demand_window(tariff), needs_daily(tariff)
+    aggs = [
+        cache.aggregates(loads, year, demand_window=window, daily=daily)
+        for loads, year in zip(profiles, years)
+    ]
+    floors = [None] * len(aggs)
+    ratchet = ratchet_settings(tariff)
+    if ratchet is not None:
+        peaks = np.concatenate([agg.peak.max(axis=(2, 3)) for agg in aggs], axis=1)
+        floors = np.split(ratchet_floor(peaks, *ratchet), len(aggs), axis=1)
+
+    coincident = [None] * len(aggs)
+    if coincident_peaks is not None and has_coincident(tariff):
+        coincident = [
+            coincident_charges(tariff, loads, year, peaks)
+            for loads, year, peaks in zip(profiles, years, coincident_peaks)
+        ]
+
+    bills = [
+        bill_from_determinants(
+            determinants_from_aggregates(tariff, agg, floor), rate_tables(tariff, year), charges
+        )
+        for agg, floor, year, charges in zip(aggs, floors, years, coincident)
+    ]
+    return {key: np.concatenate([b[key] for b in bills], axis=1) for key in bills[0]}
@@ -0,0 +1,108 @@
+"""
+Hour-of-year calendar arrays used to expand 12x24 schedules onto a load profile.
+
+Sub-hourly (30- and 15-minute) interval data uses the same arrays repeated per
+interval; ``interval_calendar`` caches them per (year, resolution).
+"""
+
+import calendar as _calendar
+from functools import lru_cache
+from typing import List, NamedTuple
+
+import numpy as np
+
+# Supported load-profile resolutions, in minutes per interval
+INTERVAL_MINUTES = (60, 30, 15)
+
+
+class HourlyCalendar(NamedTuple):
+    """Per-hour index arrays for one calendar year (all read-only)."""
+
+    month: np.ndarray    # 0-11
+    hour: np.ndarray     # 0-23
+    weekend: np.ndarray  # True on Saturday / Sunday
+    day: np.ndarray      # 0-based day of year
+
+
+def hours_in_year(year: int) -> int:
+    """Number of hours in a calendar year (8760, or 8784 in leap years)."""
+    return 8784 if _calendar.isleap(year) else 8760
+
+
+def intervals_in_year(year: int, minutes: int = 60) -> int:
+    """Number of ``minutes``-long intervals in a calendar year (35,040 at 15 min)."""
+    return hours_in_year(year) * (60 // minutes)
+
+
+def interval_minutes(n_points: int, year: int) -> int:
+    """Resolution of a profile with ``n_points`` values covering ``year``."""
+    for minutes in INTERVAL_MINUTES:
+        if n_points == intervals_in_year(year, minutes):
+            return minutes
+    expected = ", ".join(
+        f"{intervals_in_year(year, m):,} ({m}-min)" for m in INTERVAL_MINUTES
+    )
+    raise ValueError(f"Load profile has {n_points:,} intervals; {year} has {expected}.")
+
+
+@lru_cache(maxsize=16)
+def hourly_calendar(year: int) -> HourlyCalendar:
+    """Build (and cache) the hour-of-year calendar for ``year``."""
+    n_days = hours_in_year(year) // 24
+    days = np.arange(n_days)
+    first = np.datetime64(f"{year}-01-01")
+    dates = first + days.astype("timedelta64[D]")
+
+    months = dates.astype("datetime64[M]").astype(int) % 12
+    # 1970-01-01 was a Thursday: (days_since_epoch + 3) % 7 gives Mon=0..Sun=6
+    weekday = (dates.astype(int) + 3) % 7
+
+    cal = HourlyCalendar(
+        month=np.repeat(months, 24).astype(np.int8),
+        hour=np.tile(np.arange(24, dtype=np.int8), n_days),
+        weekend=np.repeat(weekday >= 5, 24),
+        day=np.repeat(days, 24).astype(np.int16),
+    )
+    for arr in cal:
+        arr.flags.writeable = False
+    return cal
+
+
+@lru_cache(maxsize=16)
+def interval_calendar(year: int, minutes: int = 60) -> HourlyCalendar:
+    """Build (and cache) the calendar at ``minutes`` resolution; ``hour`` is the clock hour."""
+    if minutes not in INTERVAL_MINUTES:
+        raise ValueError(f"Unsupported interval of {minutes} min; use one of {INTERVAL_MINUTES}.")
+    cal = hourly_calendar(year)
+    if minutes == 60:
+        return cal
+    cal = HourlyCalendar(*(np.repeat(arr, 60 // minutes) for arr in cal))
+    for arr in cal:
+        arr.flags.writeable = False
+    return cal
+
+
+def schedule_index(
+    weekday_sched: List[List[int]],
+    weekend_sched: List[List[int]],
+    year: int,
+    n_periods: int = 0,
+    minutes: int = 60,
+) -> np.ndarray:
+    """Expand weekday/weekend 12x24 schedules to a per-interval period index.
+
+    Args:
+        weekday_sched: 12x24 period indices for Monday–Friday.
+        weekend_sched: 12x24 period indices for Saturday–Sunday.
+        year:          Calendar year that fixes which days are weekends.
+        n_periods:     If > 0, indices are clamped to ``n_periods - 1`` (the
+                       same rule the schedule grid uses for stale indices).
+        minutes:       Interval length; 60 gives one entry per hour.
+    """
+    cal = interval_calendar(year, minutes)
+    wd = np.asarray(weekday_sched, dtype=np.int16).reshape(12, 24)
+    we = np.asarray(weekend_sched, dtype=np.int16).reshape(12, 24)
+    idx = np.where(cal.weekend, we[cal.month, cal.hour], wd[cal.month, cal.hour])
+    if n_periods > 0:
+        np.clip(idx, 0, n_periods - 1, out=idx)
+    return idx
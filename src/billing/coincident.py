@@ -0,0 +1,98 @@
+"""
+Coincident demand: customer demand measured at system-peak intervals.
+
+``coincidentratestructure`` prices kW by period and ``coincidentrateschedule``
+(12x24, no weekend split) maps the month and clock hour of each system-peak
+interval to a period.  The system peak is not part of the tariff, so callers
+pass it either as interval indices into the load profile or as a boolean
+mask over its intervals, shared by every customer.
+
+All customers are priced in one pass: the peak intervals are gathered from
+the (customers, intervals) load matrix once, and one grouped maximum gives
+each customer's demand per month (or per day, for daily units) and period.
+
+    peaks = np.argsort(system_load)[-12:]        # or system_load >= threshold
+    charges = coincident_charges(tariff, loads, 2024, peaks)   # (customers, 12)
+"""
+
+from typing import Dict
+
+import numpy as np
+
+from src.billing.calendar import hourly_calendar, interval_calendar
+from src.billing.determinants import (
+    allocate_tiers,
+    as_interval_matrix,
+    group_reduce,
+    is_daily_unit,
+    tier_arrays,
+)
+from src.utils import normalize_tariff
+
+
+def peak_intervals(peaks: np.ndarray, n_intervals: int) -> np.ndarray:
+    """Sorted, unique interval indices from an index array or a boolean mask."""
+    peaks = np.asarray(peaks)
+    if peaks.dtype == bool:
+        if peaks.shape != (n_intervals,):
+            raise ValueError(
+                f"Peak mask has {peaks.size:,} entries; the profile has {n_intervals:,} intervals."
+            )
+        return np.flatnonzero(peaks)
+    idx = np.unique(peaks.astype(np.int64).ravel())
+    if len(idx) and (idx[0] < 0 or idx[-1] >= n_intervals):
+        raise ValueError(f"Peak interval indices must lie in [0, {n_intervals:,}).")
+    return idx
+
+
+def has_coincident(tariff: Dict) -> bool:
+    """True when a tariff carries coincident demand charges."""
+    return bool(normalize_tariff(tariff).get("coincidentratestructure"))
+
+
+def coincident_determinants(
+    tariff: Dict, loads: np.ndarray, year: int, peaks: np.ndarray
+) -> np.ndarray:
+    """Tiered coincident kW, (customers, 12, periods, tiers).
+
+    Demand at a peak interval is the customer's average kW over it; a period
+    with several peak intervals in a month bills the largest.  With a daily
+    unit each day's demand is tiered separately and summed by month
+    (kW-days).  Months or periods without a peak interval bill zero.
+    """
+    t = normalize_tariff(tariff)
+    structure = t.get("coincidentratestructure") or []
+    _, bounds = tier_arrays(structure)
+    loads, minutes = as_interval_matrix(loads, year)
+    n_cust, n_periods = loads.shape[0], len(structure)
+    idx = peak_intervals(peaks, loads.shape[1])
+    if not n_periods or not len(idx):
+        return np.zeros((n_cust, 12) + bounds.shape)
+
+    cal = interval_calendar(year, minutes)
+    month = cal.month[idx].astype(np.int64)
+    sched = np.asarray(t.get("coincidentrateschedule") or [[0] * 24] * 12, dtype=np.int64)
+    period = np.clip(sched[month, cal.hour[idx]], 0, n_periods - 1)
+    kw = loads[:, idx] * (60.0 / minutes)
+
+    if not is_daily_unit(t.get("coincidentrateunit")):
+        peak = group_reduce(kw, month * n_periods + period, 12 * n_periods, np.maximum)
+        return allocate_tiers(peak.reshape(n_cust, 12, n_periods), bounds)
+
+    day_month = hourly_calendar(year).month[::24]
+    n_days = len(day_month)
+    day = cal.day[idx].astype(np.int64)
+    peak = group_reduce(kw, day * n_periods + period, n_days * n_periods, np.maximum)
+    tiered = allocate_tiers(peak.reshape(n_cust, n_days, n_periods), bounds)
+    starts = np.searchsorted(day_month, np.arange(12))
+    return np.add.reduceat(tiered, starts, axis=1)
+
+
+def coincident_charges(
+    tariff: Dict, loads: np.ndarray, year: int, peaks: np.ndarray
+) -> np.ndarray:
+    """Coincident demand charge per customer and month, (customers, 12)."""
+    t = normalize_tariff(tariff)
+    rates, _ = tier_arrays(t.get("coincidentratestructure") or [])
+    det = coincident_determinants(t, loads, year, peaks)
+    return np.einsum("cmpt,pt->cm", det, rates)
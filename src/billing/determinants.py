@@ -0,0 +1,585 @@
+"""
+Billing determinants: kWh and peak kW aggregated by month x period x tier.
+
+Profiles may be hourly or 30/15-minute interval kWh.  Sub-hourly energy is
+summed to hours with a reshape (a view plus one reduction; nothing is
+upsampled), and demand is the average kW over ``demandwindow`` blocks before
+the hourly maxima are taken, so interval peaks survive aggregation.
+
+Daily demand units ("kW daily", "kVA daily", ...) bill each day's peak rather
+than the month's: the hourly demand series is reshaped to (days, 24) and
+per-day maxima per period come from one grouped reduction, then the tiered
+daily quantities are summed by month.
+
+Loads may be signed net load (negative = exported, e.g. behind-the-meter
+solar).  Exports are split off per interval with ``np.clip``; with
+``usenetmetering`` imports and exports are netted within each month-period
+bucket and only the net import is tiered, otherwise every imported kWh is
+billed and exports are credited separately at the energy periods' ``sell``
+rates.
+
+A bill is linear in each tier's ``rate``/``adj`` once the schedules and tier
+thresholds are fixed, so determinants are cached per (tariff shape, load
+profile).  Editing rates only changes the rate tables in ``src.billing.bills``;
+re-billing is then a small dot product against the cached determinants.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from src.billing.calendar import hours_in_year, hourly_calendar, interval_minutes
+from src.billing.ratchets import ratchet_floor as _ratchet_floor
+from src.billing.ratchets import ratchet_settings
+from src.serialization import content_hash
+from src.utils import normalize_tariff
+
+# Tier fields that change the bill linearly; everything else shapes determinants
+RATE_FIELDS = ("rate", "adj", "sell")
+
+
+class BillDeterminants(NamedTuple):
+    """Aggregated billing quantities for one tariff shape and a set of profiles.
+
+    All arrays carry a leading customer axis.
+    """
+
+    energy_kwh: np.ndarray  # (customers, 12, energy periods, energy tiers)
+    demand_kw: np.ndarray   # (customers, 12, demand periods, demand tiers)
+    flat_kw: np.ndarray     # (customers, 12, flat tiers)
+    peak_kw: np.ndarray     # (customers, 12) monthly peak, untiered
+    export_kwh: Optional[np.ndarray] = None  # (customers, 12, energy periods) credited kWh
+
+    def arrays(self) -> List[np.ndarray]:
+        """Every array held, for memory accounting and freezing."""
+        out = [self.energy_kwh, self.demand_kw, self.flat_kw, self.peak_kw]
+        if self.export_kwh is not None:
+            out.append(self.export_kwh)
+        return out
+
+
+def tier_arrays(structure: List) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (rates, upper bounds) arrays of shape (periods, tiers).
+
+    Rates are ``rate + adj``.  A tier without ``max`` — and the last tier of
+    every period — is unbounded.  Periods with fewer tiers are padded with
+    zero-width, zero-rate tiers so they never receive any quantity.
+    """
+    n_periods = len(structure)
+    n_tiers = max(
+        [len(p) for p in structure if isinstance(p, list) and p] or [1]
+    )
+    rates = np.zeros((n_periods, n_tiers))
+    bounds = np.full((n_periods, n_tiers), np.inf)
+    for pi, tiers in enumerate(structure):
+        if not isinstance(tiers, list):
+            continue
+        for ti, tier in enumerate(tiers):
+            if not isinstance(tier, dict):
+                continue
+            rates[pi, ti] = float(tier.get("rate", 0) or 0) + float(tier.get("adj", 0) or 0)
+            mx = tier.get("max")
+            if mx is not None and ti < len(tiers) - 1:
+                bounds[pi, ti] = float(mx)
+    return rates, bounds
+
+
+def tier_field(structure: List, field: str) -> np.ndarray:
+    """One numeric tier field (e.g. ``"rate"`` or ``"adj"``) as a (periods, tiers) array."""
+    n_tiers = max(
+        [len(p) for p in structure if isinstance(p, list) and p] or [1]
+    )
+    out = np.zeros((len(structure), n_tiers))
+    for pi, tiers in enumerate(structure):
+        if not isinstance(tiers, list):
+            continue
+        for ti, tier in enumerate(tiers):
+            if isinstance(tier, dict):
+                out[pi, ti] = float(tier.get(field, 0) or 0)
+    return out
+
+
+def allocate_tiers(quantity: np.ndarray, bounds: np.ndarray) -> np.ndarray:
+    """Split ``quantity[..., periods]`` into tier blocks ``[..., periods, tiers]``."""
+    upper = bounds
+    lower = np.concatenate([np.zeros_like(bounds[:, :1]), bounds[:, :-1]], axis=1)
+    q = quantity[..., None]
+    return np.maximum(np.minimum(q, upper) - np.minimum(q, lower), 0.0)
+
+
+def group_reduce(
+    values: np.ndarray, groups: np.ndarray, n_groups: int, ufunc=np.add
+) -> np.ndarray:
+    """Reduce ``values[customers, hours]`` over hour groups with ``ufunc``.
+
+    Empty groups are returned as zero.
+    """
+    order = np.argsort(groups, kind="stable")
+    sorted_groups = groups[order]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    out = np.zeros((values.shape[0], n_groups))
+    out[:, sorted_groups[starts]] = ufunc.reduceat(values[:, order], starts, axis=1)
+    return out
+
+
+def _shape_payload(t: Dict) -> Dict:
+    """Tariff fields that determine determinants, with rate fields stripped."""
+    payload = {}
+    for key in ("energyratestructure", "demandratestructure", "flatdemandstructure"):
+        payload[key] = [
+            [{k: v for k, v in tier.items() if k not in RATE_FIELDS}
+             if isinstance(tier, dict) else tier for tier in tiers]
+            if isinstance(tiers, list) else tiers
+            for tiers in (t.get(key) or [])
+        ]
+    for key in (
+        "energyweekdayschedule", "energyweekendschedule",
+        "demandweekdayschedule", "demandweekendschedule", "flatdemandmonths",
+        "demandrateunit", "demandunits", "flatdemandunit",
+        "demandratchetpercentage", "peakkwcapacityhistory", "usenetmetering",
+    ):
+        payload[key] = t.get(key)
+    return payload
+
+
+def determinant_key(tariff: Dict, year: int) -> str:
+    """Hash of everything except rates that affects a tariff's determinants."""
+    payload = _shape_payload(normalize_tariff(tariff))
+    payload["year"] = year
+    return content_hash(payload)
+
+
+def profile_key(loads: np.ndarray) -> str:
+    """Content hash of a load profile (or load matrix)."""
+    arr = np.ascontiguousarray(loads, dtype=float)
+    h = hashlib.blake2b(arr.tobytes(), digest_size=16)
+    h.update(str(arr.shape).encode("ascii"))
+    return h.hexdigest()
+
+
+def as_load_matrix(loads: np.ndarray, year: int) -> np.ndarray:
+    """Promote hourly kWh to a (customers, hours) float matrix and check length."""
+    arr = np.atleast_2d(np.asarray(loads, dtype=float))
+    expected = hours_in_year(year)
+    if arr.shape[-1] != expected:
+        raise ValueError(
+            f"Load profile has {arr.shape[-1]} hours; {year} has {expected}."
+        )
+    return arr
+
+
+def as_interval_matrix(loads: np.ndarray, year: int) -> Tuple[np.ndarray, int]:
+    """Promote interval kWh to a (customers, intervals) matrix; returns it and its minutes."""
+    arr = np.atleast_2d(np.asarray(loads, dtype=float))
+    return arr, interval_minutes(arr.shape[-1], year)
+
+
+def demand_window(tariff: Dict) -> Optional[float]:
+    """The tariff's ``demandwindow`` in minutes, or None when unset."""
+    try:
+        window = float(normalize_tariff(tariff).get("demandwindow") or 0)
+    except (TypeError, ValueError):
+        return None
+    return window if window > 0 else None
+
+
+def effective_window(minutes: int, window: Optional[float]) -> int:
+    """Demand window (minutes) that ``minutes``-resolution data can measure.
+
+    The window is rounded to whole intervals, then down to a length that
+    either divides an hour or is a whole number of hours tiling a day, so
+    every demand block lies within one hour or spans whole clock hours
+    (45 min on 15-minute data becomes 30, 90 becomes 60).  An unset window,
+    or one shorter than the data resolution (15 min on hourly data), falls
+    back to the interval length.
+    """
+    if not window or window <= minutes:
+        return minutes
+    k = max(1, int(round(window / minutes)))
+    while not _tiles_hours(k * minutes):
+        k -= 1
+    return k * minutes
+
+
+def _tiles_hours(window: int) -> bool:
+    """True for windows that divide an hour or are whole hours dividing a day."""
+    if window <= 60:
+        return 60 % window == 0
+    return window % 60 == 0 and 1440 % window == 0
+
+
+def hourly_energy(loads: np.ndarray, minutes: int) -> np.ndarray:
+    """Sum (customers, intervals) kWh to (customers, hours)."""
+    if minutes == 60:
+        return loads
+    return loads.reshape(loads.shape[0], -1, 60 // minutes).sum(axis=2)
+
+
+def hourly_demand(loads: np.ndarray, minutes: int, window: int) -> np.ndarray:
+    """Maximum ``window``-minute average kW within each hour, (customers, hours).
+
+    Windows longer than an hour are assigned to every hour they cover.
+    """
+    n_cust = loads.shape[0]
+    k = window // minutes
+    kw = loads if k == 1 else loads.reshape(n_cust, -1, k).sum(axis=2)
+    kw = kw * (60.0 / window)
+    if window <= 60:
+        per_hour = 60 // window
+        return kw if per_hour == 1 else kw.reshape(n_cust, -1, per_hour).max(axis=2)
+    return np.repeat(kw, window // 60, axis=1)
+
+
+def is_daily_unit(unit) -> bool:
+    """True for daily demand units such as ``"kW daily"``."""
+    return str(unit or "").strip().lower().endswith("daily")
+
+
+def daily_demand_units(tariff: Dict) -> Tuple[bool, bool]:
+    """Whether (TOU demand, flat demand) are charged per day rather than per month."""
+    t = normalize_tariff(tariff)
+    return (
+        is_daily_unit(t.get("demandrateunit") or t.get("demandunits")),
+        is_daily_unit(t.get("flatdemandunit")),
+    )
+
+
+def uses_net_metering(tariff: Dict) -> bool:
+    """True when ``usenetmetering`` is set (booleans or "true"/"1" strings)."""
+    value = normalize_tariff(tariff).get("usenetmetering")
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "1", "yes")
+    return bool(value)
+
+
+def needs_daily(tariff: Dict) -> bool:
+    """True when a tariff's determinants require ``DailyPeaks``."""
+    t = normalize_tariff(tariff)
+    tou, flat = daily_demand_units(t)
+    return (tou and bool(t.get("demandratestructure"))) or (
+        flat and bool(t.get("flatdemandstructure"))
+    )
+
+
+class DailyPeaks(NamedTuple):
+    """Maximum kW per day and clock hour, for daily demand units."""
+
+    peak: np.ndarray     # (customers, days, 24)
+    month: np.ndarray    # (days,) 0-11
+    weekend: np.ndarray  # (days,) bool
+
+
+class ScheduleAggregates(NamedTuple):
+    """Load aggregated on the 12x24 weekday/weekend schedule lattice.
+
+    Any pair of 12x24 schedules maps these 576 cells onto periods, so
+    re-aggregating after a repaint never touches the hourly series.
+    ``daily`` is only built when asked for (daily demand units).
+    """
+
+    kwh: np.ndarray   # (customers, 12, 2, 24) summed net kWh, daytype 0=weekday 1=weekend
+    peak: np.ndarray  # (customers, 12, 2, 24) maximum kW
+    daily: Optional[DailyPeaks] = None
+    export_kwh: Optional[np.ndarray] = None  # (customers, 12, 2, 24), only for signed loads
+
+    def arrays(self) -> List[np.ndarray]:
+        """Every array held, for memory accounting and freezing."""
+        out = [self.kwh, self.peak]
+        if self.daily is not None:
+            out.append(self.daily.peak)
+        if self.export_kwh is not None:
+            out.append(self.export_kwh)
+        return out
+
+
+def schedule_aggregates(
+    loads: np.ndarray,
+    year: int,
+    demand_window: Optional[float] = None,
+    daily: bool = False,
+) -> ScheduleAggregates:
+    """Reduce interval kWh to month x daytype x hour sums and maximum kW.
+
+    ``demand_window`` (minutes) sets the averaging period for peak kW on
+    sub-hourly data; see ``effective_window``.  ``daily`` also keeps the
+    per-day hourly peaks that daily demand units are billed from.  Signed
+    loads also get ``export_kwh``, the exported (negative) kWh per cell.
+    """
+    loads, minutes = as_interval_matrix(loads, year)
+    window = effective_window(minutes, demand_window)
+    cal = hourly_calendar(year)
+    groups = (cal.month.astype(np.int32) * 2 + cal.weekend) * 24 + cal.hour
+    shape = (loads.shape[0], 12, 2, 24)
+    demand = hourly_demand(loads, minutes, window)
+    daily_peaks = None
+    if daily:
+        daily_peaks = DailyPeaks(
+            peak=demand.reshape(loads.shape[0], -1, 24),
+            month=cal.month[::24],
+            weekend=cal.weekend[::24],
+        )
+    export_kwh = None
+    if (loads < 0).any():
+        exported = hourly_energy(np.clip(-loads, 0.0, None), minutes)
+        export_kwh = group_reduce(exported, groups, 576, np.add).reshape(shape)
+    return ScheduleAggregates(
+        kwh=group_reduce(hourly_energy(loads, minutes), groups, 576, np.add).reshape(shape),
+        peak=group_reduce(demand, groups, 576, np.maximum).reshape(shape),
+        daily=daily_peaks,
+        export_kwh=export_kwh,
+    )
+
+
+def _lattice_periods(t: Dict, prefix: str, n_periods: int) -> np.ndarray:
+    """Stack weekday/weekend schedules into a clamped (12, 2, 24) period index."""
+    wd = t.get(f"{prefix}weekdayschedule") or [[0] * 24 for _ in range(12)]
+    we = t.get(f"{prefix}weekendschedule") or [[0] * 24 for _ in range(12)]
+    idx = np.stack(
+        [np.asarray(wd, dtype=np.int64).reshape(12, 24),
+         np.asarray(we, dtype=np.int64).reshape(12, 24)],
+        axis=1,
+    )
+    return np.clip(idx, 0, max(n_periods - 1, 0))
+
+
+def _tou_quantities(
+    values: np.ndarray, t: Dict, prefix: str, n_periods: int, ufunc
+) -> np.ndarray:
+    """Reduce (C, 12, 2, 24) lattice values by month x period; (C, 12, P)."""
+    n_cust = values.shape[0]
+    if n_periods == 0:
+        return np.zeros((n_cust, 12, 0))
+    idx = _lattice_periods(t, prefix, n_periods)
+    groups = (np.arange(12)[:, None, None] * n_periods + idx).ravel()
+    red = group_reduce(values.reshape(n_cust, 576), groups, 12 * n_periods, ufunc)
+    return red.reshape(n_cust, 12, n_periods)
+
+
+def _daily_tou_peaks(daily: DailyPeaks, t: Dict, n_periods: int) -> np.ndarray:
+    """Per-day peak kW in each demand period, (C, days, P), in one grouped max."""
+    n_cust, n_days, _ = daily.peak.shape
+    idx = _lattice_periods(t, "demand", n_periods)             # (12, 2, 24)
+    period = idx[daily.month, daily.weekend.astype(np.int64)]  # (days, 24)
+    groups = (np.arange(n_days)[:, None] * n_periods + period).ravel()
+    red = group_reduce(
+        daily.peak.reshape(n_cust, n_days * 24), groups, n_days * n_periods, np.maximum
+    )
+    return red.reshape(n_cust, n_days, n_periods)
+
+
+def _floor_periods(
+    d_kw: np.ndarray, floor: np.ndarray, t: Dict, n_periods: int
+) -> np.ndarray:
+    """Raise (C, 12, P) period peaks to a (C, 12) floor where the period occurs that month."""
+    idx = _lattice_periods(t, "demand", n_periods).reshape(12, -1)
+    present = (idx[:, :, None] == np.arange(n_periods)).any(axis=1)  # (12, P)
+    return np.where(present, np.maximum(d_kw, floor[:, :, None]), d_kw)
+
+
+def _sum_days_by_month(values: np.ndarray, month: np.ndarray) -> np.ndarray:
+    """Sum a (C, days, ...) array over the days of each month; (C, 12, ...)."""
+    starts = np.flatnonzero(np.r_[True, month[1:] != month[:-1]])
+    return np.add.reduceat(values, starts, axis=1)
+
+
+def determinants_from_aggregates(
+    tariff: Dict, agg: ScheduleAggregates, ratchet_floor: Optional[np.ndarray] = None
+) -> BillDeterminants:
+    """Build determinants from schedule-lattice aggregates.
+
+    Energy tier thresholds apply to each period's monthly kWh; demand tier
+    thresholds apply to each period's monthly peak kW.  With daily demand
+    units they apply to each day's peak instead, and ``demand_kw`` /
+    ``flat_kw`` hold the month's sum of tiered daily peaks (kW-days).
+    Exports from signed loads land in ``export_kwh`` (see the module
+    docstring).
+
+    A demand ratchet floors monthly billing demand: the flat demand peak,
+    or each TOU period's peak when the tariff has no flat demand.
+    ``ratchet_floor`` (customers, 12) overrides the floor computed from
+    this profile alone, e.g. with history from earlier years.
+    """
+    t = normalize_tariff(tariff)
+    tou_daily, flat_daily = daily_demand_units(t)
+    if needs_daily(t) and agg.daily is None:
+        raise ValueError("Daily demand units need schedule_aggregates(..., daily=True).")
+    peak = agg.peak.max(axis=(2, 3))
+    if ratchet_floor is None:
+        ratchet = ratchet_settings(t)
+        if ratchet is not None:
+            ratchet_floor = _ratchet_floor(peak, *ratchet)
+
+    e_struct = t.get("energyratestructure") or []
+    _, e_bounds = tier_arrays(e_struct)
+    e_kwh = _tou_quantities(agg.kwh, t, "energy", len(e_struct), np.add)
+    export = None
+    if agg.export_kwh is not None:
+        if uses_net_metering(t):
+            # Net within each month-period bucket; a net surplus is credited
+            export = np.clip(-e_kwh, 0.0, None)
+            e_kwh = np.clip(e_kwh, 0.0, None)
+        else:
+            export = _tou_quantities(agg.export_kwh, t, "energy", len(e_struct), np.add)
+            e_kwh = e_kwh + export  # gross imports
+    energy = allocate_tiers(e_kwh, e_bounds)
+
+    d_struct = t.get("demandratestructure") or []
+    _, d_bounds = tier_arrays(d_struct)
+    if tou_daily and d_struct:
+        day_kw = _daily_tou_peaks(agg.daily, t, len(d_struct))
+        demand = _sum_days_by_month(allocate_tiers(day_kw, d_bounds), agg.daily.month)
+    else:
+        d_kw = _tou_quantities(agg.peak, t, "demand", len(d_struct), np.maximum)
+        if ratchet_floor is not None and d_struct and not t.get("flatdemandstructure"):
+            d_kw = _floor_periods(d_kw, ratchet_floor, t, len(d_struct))
+        demand = allocate_tiers(d_kw, d_bounds)
+
+    f_struct = t.get("flatdemandstructure") or []
+    if f_struct:
+        _, f_bounds = tier_arrays(f_struct)
+        f_months = np.clip(flat_month_map(t), 0, len(f_struct) - 1)
+        if flat_daily:
+            # Each day is tiered with the bounds of its month's flat period
+            day_peak = agg.daily.peak.max(axis=2)
+            flat = _sum_days_by_month(
+                allocate_tiers(day_peak, f_bounds[f_months[agg.daily.month]]),
+                agg.daily.month,
+            )
+        else:
+            # Each month is tiered with the bounds of its own flat period
+            billed = peak if ratchet_floor is None else np.maximum(peak, ratchet_floor)
+            flat = allocate_tiers(billed, f_bounds[f_months])
+    else:
+        flat = np.zeros((peak.shape[0], 12, 1))
+
+    return BillDeterminants(energy, demand, flat, peak, export)
+
+
+def compute_determinants(tariff: Dict, loads: np.ndarray, year: int) -> BillDeterminants:
+    """Aggregate interval kWh into month x period x tier determinants.
+
+    Args:
+        tariff: Tariff dict (API or local DB format).
+        loads:  Hourly, 30- or 15-minute kWh, shape (intervals,) or
+                (customers, intervals).
+        year:   Calendar year of the profile.
+    """
+    return determinants_from_aggregates(
+        tariff, schedule_aggregates(loads, year, demand_window(tariff), needs_daily(tariff))
+    )
+
+
+def flat_month_map(t: Dict) -> np.ndarray:
+    """Month -> flat demand period index (defaults to period 0 for all months)."""
+    months = t.get("flatdemandmonths") or []
+    if len(months) != 12:
+        months = [0] * 12
+    return np.asarray(months, dtype=np.int64)
+
+
+class DeterminantCache:
+    """LRU cache of ``BillDeterminants`` keyed by (tariff shape, load profile).
+
+    Rate-only edits keep the same ``determinant_key`` and therefore hit.
+    Schedule edits miss, but are rebuilt from the profile's cached
+    ``ScheduleAggregates`` without another pass over the hourly series.
+    Safe to share between sessions/threads (see ``src.resources``).
+    """
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self._mem: "OrderedDict[Tuple[str, str, int], BillDeterminants]" = OrderedDict()
+        self._aggs: "OrderedDict[Tuple[str, int, int, bool], ScheduleAggregates]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._mem)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            self._aggs.clear()
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by cached determinants and aggregates."""
+        arrays = [arr for det in list(self._mem.values()) for arr in det.arrays()]
+        arrays += [arr for agg in list(self._aggs.values()) for arr in agg.arrays()]
+        return sum(arr.nbytes for arr in arrays)
+
+    def aggregates(
+        self,
+        loads: np.ndarray,
+        year: int,
+        load_key: Optional[str] = None,
+        demand_window: Optional[float] = None,
+        daily: bool = False,
+    ) -> ScheduleAggregates:
+        """Return (cached) schedule-lattice aggregates for a load profile.
+
+        Entries are keyed by the effective demand window, so hourly profiles
+        share one entry whatever window a tariff names.  An entry holding
+        daily peaks also serves requests that do not need them.
+        """
+        window = effective_window(interval_minutes(loads.shape[-1], year), demand_window)
+        load_key = load_key or profile_key(loads)
+        keys = [(load_key, year, window, True)]
+        if not daily:
+            keys.append((load_key, year, window, False))
+        with self._lock:
+            for key in keys:
+                agg = self._aggs.get(key)
+                if agg is not None:
+                    self._aggs.move_to_end(key)
+                    return agg
+        key = keys[-1]
+        agg = schedule_aggregates(loads, year, window, daily)
+        for arr in agg.arrays():
+            arr.flags.writeable = False
+        with self._lock:
+            self._aggs[key] = agg
+            if len(self._aggs) > self.maxsize:
+                self._aggs.popitem(last=False)
+        return agg
+
+    def get(
+        self,
+        tariff: Dict,
+        loads: np.ndarray,
+        year: int,
+        load_key: Optional[str] = None,
+    ) -> BillDeterminants:
+        """Return determinants, computing them on a miss.
+
+        ``load_key`` may be passed to skip hashing a profile whose identity
+        the caller already knows.
+        """
+        load_key = load_key or profile_key(loads)
+        window = demand_window(tariff)
+        key = (
+            determinant_key(tariff, year), load_key,
+            effective_window(interval_minutes(loads.shape[-1], year), window),
+        )
+        with self._lock:
+            det = self._mem.get(key)
+            if det is not None:
+                self._mem.move_to_end(key)
+                self.hits += 1
+                return det
+            self.misses += 1
+
+        det = determinants_from_aggregates(
+            tariff, self.aggregates(loads, year, load_key, window, needs_daily(tariff))
+        )
+        for arr in det.arrays():
+            arr.flags.writeable = False
+        with self._lock:
+            self._mem[key] = det
+            if len(self._mem) > self.maxsize:
+                self._mem.popitem(last=False)
+        return det
@@ -0,0 +1,375 @@
+"""
+Stream per-customer, per-month bill line items to partitioned Parquet.
+
+Large batch studies cannot hold every result in memory.  ``write_line_items``
+walks the load matrix in customer chunks (a ``np.memmap`` works), prices each
+chunk against every tariff, and hands Arrow record batches to
+``pyarrow.dataset.write_dataset``, which flushes bounded row groups per
+``tariff=<label>`` partition.  Peak memory is one chunk of results, not the
+whole study.
+
+Line items per customer and month:
+
+* ``energy`` — kWh by period and tier
+* ``export`` — exported kWh by period, credited at the period's ``sell`` rate;
+  when credits exceed the month's charges, one more ``export`` row (period
+  -1) gives back the excess, since credits never take a bill below $0
+* ``demand`` — TOU peak kW by period and tier
+* ``flat``   — monthly peak kW by tier (period = flat demand season)
+* ``coincident`` — kW at the system peak by period and tier, only when
+  ``coincident_peaks`` is given
+* ``fixed``  — the fixed charge
+* ``minimum`` — true-up to ``minmonthlycharge``; any ``annualmincharge``
+  shortfall lands in December, as in ``bill_from_determinants``
+
+With daily demand units the demand quantities are the month's summed daily
+peaks, in kW-days.
+
+Amounts for a customer-month sum to that month's bill total.  Coincident
+demand charges need the system peak, which is not part of the tariff;
+without ``coincident_peaks`` they are left out of both the line items and
+the total, as in ``compute_bill``.  With ``hourly=True`` an ``hourly/``
+dataset also gets per-hour energy cost: each hour's kWh times its
+month-period average rate, which sums exactly to the energy and export line
+items.
+
+Requires the optional ``pyarrow`` package (``pip install pyarrow``).
+
+Usage:
+    python -m src.billing.line_items library.json loads.npy --year 2023 \\
+        --out study_results [--hourly] [--chunk 1024] [--coincident-peaks peaks.npy]
+"""
+
+import argparse
+import os
+import shutil
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from src.billing.bills import bill_from_determinants, export_credit, rate_tables
+from src.billing.calendar import hourly_calendar, schedule_index
+from src.billing.coincident import coincident_determinants, has_coincident
+from src.billing.determinants import (
+    BillDeterminants,
+    as_interval_matrix,
+    daily_demand_units,
+    demand_window,
+    determinants_from_aggregates,
+    effective_window,
+    flat_month_map,
+    hourly_energy,
+    is_daily_unit,
+    needs_daily,
+    schedule_aggregates,
+    tier_arrays,
+)
+from src.utils import normalize_tariff
+
+PARTITION_FIELD = "tariff"
+DEFAULT_CHUNK = 1024
+MAX_ROWS_PER_GROUP = 128 * 1024
+MAX_ROWS_PER_FILE = 4 * 1024 * 1024
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset  # noqa: F401
+    except ImportError as e:
+        raise ImportError("Line-item output requires pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def line_item_schema(customer_type):
+    pa = _pyarrow()
+    return pa.schema([
+        ("customer_id", customer_type),
+        ("month", pa.uint8()),        # 1-12
+        ("component", pa.string()),
+        ("period", pa.int16()),       # -1 where not applicable
+        ("tier", pa.int16()),
+        ("quantity", pa.float64()),
+        ("unit", pa.string()),
+        ("rate", pa.float64()),
+        ("amount", pa.float64()),
+        (PARTITION_FIELD, pa.string()),
+    ])
+
+
+def hourly_schema(customer_type):
+    pa = _pyarrow()
+    return pa.schema([
+        ("customer_id", customer_type),
+        ("hour", pa.int32()),         # hour of year, 0-based
+        ("kwh", pa.float64()),
+        ("energy_cost", pa.float64()),
+        (PARTITION_FIELD, pa.string()),
+    ])
+
+
+# ── Line items as flat column arrays ─────────────────────────────────────
+
+def _columns(component, unit, cust, month, period, tier, qty, rate) -> Dict[str, np.ndarray]:
+    n = len(cust)
+    return {
+        "customer_id": cust,
+        "month": (np.asarray(month) + 1).astype(np.uint8),
+        "component": np.full(n, component, dtype=object),
+        "period": np.broadcast_to(np.asarray(period, dtype=np.int16), (n,)),
+        "tier": np.broadcast_to(np.asarray(tier, dtype=np.int16), (n,)),
+        "quantity": np.asarray(qty, dtype=float),
+        "unit": np.full(n, unit, dtype=object),
+        "rate": np.broadcast_to(np.asarray(rate, dtype=float), (n,)),
+        "amount": np.asarray(qty, dtype=float) * rate,
+    }
+
+
+def _coincident_rates(tariff: Dict) -> np.ndarray:
+    return tier_arrays(normalize_tariff(tariff).get("coincidentratestructure") or [])[0]
+
+
+def _coincident_charges(tariff: Dict, coincident_kw: Optional[np.ndarray]) -> Optional[np.ndarray]:
+    """(customers, 12) coincident charges from tiered kW, or None."""
+    if coincident_kw is None:
+        return None
+    return np.einsum("cmpt,pt->cm", coincident_kw, _coincident_rates(tariff))
+
+
+def line_item_columns(
+    det: BillDeterminants, rates, tariff: Dict, customer_ids: np.ndarray,
+    coincident_kw: Optional[np.ndarray] = None,
+) -> Dict[str, np.ndarray]:
+    """All line items for one tariff and a chunk of customers, zero rows dropped.
+
+    ``coincident_kw`` is tiered coincident demand from ``coincident_determinants``.
+    """
+    parts: List[Dict[str, np.ndarray]] = []
+    tou_daily, flat_daily = daily_demand_units(tariff)
+
+    for component, qty, table, unit in (
+        ("energy", det.energy_kwh, rates.energy, "kWh"),
+        ("demand", det.demand_kw, rates.demand, "kW-day" if tou_daily else "kW"),
+    ):
+        c, m, p, t = np.nonzero(qty)
+        parts.append(_columns(component, unit, customer_ids[c], m, p, t,
+                              qty[c, m, p, t], table[p, t]))
+
+    c, m, t = np.nonzero(det.flat_kw)
+    season = flat_month_map(normalize_tariff(tariff))
+    parts.append(_columns("flat", "kW-day" if flat_daily else "kW", customer_ids[c], m,
+                          season[m], t, det.flat_kw[c, m, t], rates.flat[m, t]))
+
+    if coincident_kw is not None:
+        norm = normalize_tariff(tariff)
+        c_rates = _coincident_rates(norm)
+        c_unit = "kW-day" if is_daily_unit(norm.get("coincidentrateunit")) else "kW"
+        c, m, p, t = np.nonzero(coincident_kw)
+        parts.append(_columns("coincident", c_unit, customer_ids[c], m, p, t,
+                              coincident_kw[c, m, p, t], c_rates[p, t]))
+
+    n_cust = len(customer_ids)
+    bill = bill_from_determinants(det, rates, _coincident_charges(tariff, coincident_kw))
+    if det.export_kwh is not None:
+        c, m, p = np.nonzero(det.export_kwh)
+        parts.append(_columns("export", "kWh", customer_ids[c], m, p, 0,
+                              det.export_kwh[c, m, p], -rates.sell[p]))
+        forfeit = bill["export"] - export_credit(det, rates)
+        c, m = np.nonzero(forfeit > 1e-12)
+        parts.append(_columns("export", "month", customer_ids[c], m, -1, -1,
+                              np.ones(len(c)), forfeit[c, m]))
+    if rates.fixed.any():
+        c, m = np.divmod(np.arange(n_cust * 12), 12)
+        parts.append(_columns("fixed", "month", customer_ids[c], m, -1, -1,
+                              np.ones(len(c)), rates.fixed[m]))
+    c, m = np.nonzero(bill["minimum"])
+    parts.append(_columns("minimum", "month", customer_ids[c], m, -1, -1,
+                          np.ones(len(c)), bill["minimum"][c, m]))
+
+    return {key: np.concatenate([p[key] for p in parts]) for key in parts[0]}
+
+
+def hourly_cost_columns(
+    det: BillDeterminants, rates, tariff: Dict, loads: np.ndarray, year: int,
+    customer_ids: np.ndarray, coincident_kw: Optional[np.ndarray] = None,
+) -> Dict[str, np.ndarray]:
+    """Per-hour energy cost at each month-period's average (tier-blended) rate.
+
+    ``loads`` is hourly kWh; sub-hourly profiles are summed to hours first.
+    For signed loads the average is net of the export credits actually
+    applied (after the $0 monthly cap) per net kWh.
+    """
+    t = normalize_tariff(tariff)
+    n_periods = det.energy_kwh.shape[2]
+    kwh = det.energy_kwh.sum(axis=3)
+    cost = np.einsum("cmpt,pt->cmp", det.energy_kwh, rates.energy)
+    if det.export_kwh is not None:
+        credit = export_credit(det, rates)
+        applied = bill_from_determinants(
+            det, rates, _coincident_charges(tariff, coincident_kw)
+        )["export"]
+        share = np.divide(applied, credit, out=np.zeros_like(credit), where=credit != 0)
+        kwh = kwh - det.export_kwh
+        cost = cost - det.export_kwh * rates.sell * share[:, :, None]
+    avg_rate = np.divide(cost, kwh, out=np.zeros_like(cost), where=kwh != 0)
+
+    cal = hourly_calendar(year)
+    n_cust, n_hours = loads.shape
+    if n_periods:
+        period = schedule_index(
+            t.get("energyweekdayschedule") or [[0] * 24] * 12,
+            t.get("energyweekendschedule") or [[0] * 24] * 12,
+            year, n_periods,
+        )
+        hour_rate = avg_rate[:, cal.month, period]
+    else:
+        hour_rate = np.zeros((n_cust, n_hours))
+    return {
+        "customer_id": np.repeat(customer_ids, n_hours),
+        "hour": np.tile(np.arange(n_hours, dtype=np.int32), n_cust),
+        "kwh": loads.ravel(),
+        "energy_cost": (loads * hour_rate).ravel(),
+    }
+
+
+# ── Streaming writer ─────────────────────────────────────────────────────
+
+def _tariff_names(tariffs: Sequence[Dict]) -> List[str]:
+    return [str(t.get("label") or f"tariff_{i}") for i, t in enumerate(tariffs)]
+
+
+def _batches(
+    tariffs: Sequence[Dict],
+    loads: np.ndarray,
+    year: int,
+    customer_ids: np.ndarray,
+    chunk: int,
+    kind: str,
+    coincident_peaks: Optional[np.ndarray] = None,
+) -> Iterator[Dict[str, np.ndarray]]:
+    """Yield ``kind`` ("items" or "hourly") columns per tariff per customer chunk."""
+    names = _tariff_names(tariffs)
+    tables = [rate_tables(t, year) for t in tariffs]
+    minutes = as_interval_matrix(loads[:1], year)[1]
+    windows = [effective_window(minutes, demand_window(t)) for t in tariffs]
+    daily = {w for w, t in zip(windows, tariffs) if needs_daily(t)}
+    for start in range(0, loads.shape[0], chunk):
+        block = np.asarray(loads[start:start + chunk], dtype=float)
+        ids = customer_ids[start:start + chunk]
+        # One pass over the intervals per chunk and distinct demand window
+        aggs = {w: schedule_aggregates(block, year, w, w in daily) for w in set(windows)}
+        hourly_kwh = hourly_energy(block, minutes) if kind == "hourly" else None
+        for tariff, name, rates, window in zip(tariffs, names, tables, windows):
+            det = determinants_from_aggregates(tariff, aggs[window])
+            coincident_kw = None
+            wants_coincident = kind == "items" or det.export_kwh is not None
+            if wants_coincident and coincident_peaks is not None and has_coincident(tariff):
+                coincident_kw = coincident_determinants(tariff, block, year, coincident_peaks)
+            if kind == "items":
+                cols = line_item_columns(det, rates, tariff, ids, coincident_kw)
+            else:
+                cols = hourly_cost_columns(
+                    det, rates, tariff, hourly_kwh, year, ids, coincident_kw
+                )
+            cols[PARTITION_FIELD] = np.full(len(cols["customer_id"]), name, dtype=object)
+            yield cols
+
+
+def write_line_items(
+    tariffs: Sequence[Dict],
+    loads: np.ndarray,
+    year: int,
+    root: str,
+    customer_ids: Optional[Sequence] = None,
+    chunk: int = DEFAULT_CHUNK,
+    hourly: bool = False,
+    overwrite: bool = False,
+    coincident_peaks: Optional[np.ndarray] = None,
+) -> Dict[str, int]:
+    """Bill every customer against every tariff and stream line items to ``root``.
+
+    Args:
+        tariffs:      Tariff dicts; each becomes a ``tariff=<label>`` partition.
+        loads:        (customers, intervals) hourly, 30- or 15-minute kWh; may
+                      be a read-only ``np.memmap``.
+        year:         Calendar year of the profiles.
+        root:         Output directory; line items go to ``root/line_items``
+                      and hourly costs to ``root/hourly``.
+        customer_ids: One id per row of ``loads`` (default: row number).
+        chunk:        Customers priced per batch — bounds peak memory.
+        hourly:       Also write the per-hour energy cost series.
+        coincident_peaks: System-peak interval indices or boolean mask;
+                      without it coincident demand charges are left out.
+
+    Returns:
+        Rows written per dataset.
+    """
+    pa = _pyarrow()
+    if loads.ndim == 1:
+        loads = loads[None, :]
+    as_interval_matrix(loads[:1], year)  # validate the interval count up front
+    tariffs = [normalize_tariff(t) for t in tariffs]
+    ids = np.arange(loads.shape[0]) if customer_ids is None else np.asarray(customer_ids)
+    if len(ids) != loads.shape[0]:
+        raise ValueError(f"{len(ids)} customer ids for {loads.shape[0]} load profiles.")
+
+    customer_type = pa.array(ids[:1]).type
+    schemas = {"items": line_item_schema(customer_type)}
+    if hourly:
+        schemas["hourly"] = hourly_schema(customer_type)
+    if overwrite and os.path.isdir(root):
+        shutil.rmtree(root)
+
+    # One streaming pass per dataset; the hourly pass re-derives determinants
+    # from the chunk rather than holding them across passes
+    counts = {kind: 0 for kind in schemas}
+    for kind, schema in schemas.items():
+        def record_batches(kind=kind, schema=schema):
+            for cols in _batches(tariffs, loads, year, ids, chunk, kind, coincident_peaks):
+                if len(cols[PARTITION_FIELD]):
+                    counts[kind] += len(cols[PARTITION_FIELD])
+                    yield pa.RecordBatch.from_pydict(cols, schema=schema)
+
+        pa.dataset.write_dataset(
+            pa.dataset.Scanner.from_batches(record_batches(), schema=schema),
+            os.path.join(root, "line_items" if kind == "items" else "hourly"),
+            format="parquet",
+            partitioning=pa.dataset.partitioning(
+                pa.schema([(PARTITION_FIELD, pa.string())]), flavor="hive"
+            ),
+            max_rows_per_group=MAX_ROWS_PER_GROUP,
+            min_rows_per_group=min(MAX_ROWS_PER_GROUP, 16 * 1024),
+            max_rows_per_file=MAX_ROWS_PER_FILE,
+            existing_data_behavior="overwrite_or_ignore",
+        )
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from src.serialization import load_library
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("library", help="Tariff library JSON")
+    parser.add_argument("loads", help="(customers, intervals) kWh matrix as .npy")
+    parser.add_argument("--year", type=int, required=True)
+    parser.add_argument("--out", required=True, help="Output directory")
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK)
+    parser.add_argument("--hourly", action="store_true", help="Also write hourly energy cost")
+    parser.add_argument("--overwrite", action="store_true")
+    parser.add_argument("--coincident-peaks", metavar="PEAKS",
+                        help="System-peak interval indices or boolean mask as .npy")
+    args = parser.parse_args(argv)
+
+    loads = np.load(args.loads, mmap_mode="r")
+    peaks = np.load(args.coincident_peaks) if args.coincident_peaks else None
+    counts = write_line_items(
+        load_library(args.library), loads, args.year, args.out,
+        chunk=args.chunk, hourly=args.hourly, overwrite=args.overwrite,
+        coincident_peaks=peaks,
+    )
+    for kind, n in counts.items():
+        print(f"{kind}: {n:,} rows -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
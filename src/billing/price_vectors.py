@@ -0,0 +1,186 @@
+"""
+Cached hourly $/kWh price vectors for untiered energy billing.
+
+A tariff's ``energyratestructure`` (first-tier rate + adj per period) and its
+weekday/weekend schedules are expanded onto every hour of a year.  Vectors are
+keyed by a content hash of exactly those fields, held in an in-memory LRU and
+optionally persisted as ``.npy`` files so a tariff library only has to be
+expanded once.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.billing.calendar import intervals_in_year, schedule_index
+from src.billing.determinants import as_interval_matrix, hourly_energy
+from src.serialization import content_hash
+from src.utils import normalize_tariff
+
+_ENERGY_FIELDS = ("energyratestructure", "energyweekdayschedule", "energyweekendschedule")
+
+
+def energy_content_hash(tariff: Dict, year: int) -> str:
+    """Content hash of the fields that determine a tariff's price vector."""
+    t = normalize_tariff(tariff)
+    payload = {k: t.get(k) for k in _ENERGY_FIELDS}
+    payload["year"] = year
+    return content_hash(payload)
+
+
+def period_rates(structure: List) -> np.ndarray:
+    """Total first-tier rate (rate + adj) for each period of a rate structure."""
+    rates = np.zeros(len(structure))
+    for idx, period_tiers in enumerate(structure):
+        if isinstance(period_tiers, list) and period_tiers:
+            tier = period_tiers[0]
+            if isinstance(tier, dict):
+                rates[idx] = float(tier.get("rate", 0) or 0) + float(tier.get("adj", 0) or 0)
+    return rates
+
+
+def build_energy_price_vector(tariff: Dict, year: int, minutes: int = 60) -> np.ndarray:
+    """Expand a tariff's energy rates onto every ``minutes`` interval of ``year`` ($/kWh)."""
+    t = normalize_tariff(tariff)
+    rates = period_rates(t.get("energyratestructure") or [])
+    if rates.size == 0:
+        return np.zeros(intervals_in_year(year, minutes))
+    idx = schedule_index(
+        t.get("energyweekdayschedule") or [[0] * 24 for _ in range(12)],
+        t.get("energyweekendschedule") or [[0] * 24 for _ in range(12)],
+        year,
+        n_periods=len(rates),
+        minutes=minutes,
+    )
+    return rates[idx]
+
+
+class PriceVectorCache:
+    """LRU cache of hourly energy price vectors with an optional disk tier.
+
+    Safe to share between sessions/threads (see ``src.resources``).
+
+    Args:
+        maxsize:   Number of vectors kept in memory.
+        cache_dir: If set, vectors are also written to / read from
+                   ``<cache_dir>/<hash>.npy``.
+    """
+
+    def __init__(self, maxsize: int = 256, cache_dir: Optional[str] = None):
+        self.maxsize = maxsize
+        self.cache_dir = cache_dir
+        self._mem: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._mem)
+
+    def clear(self) -> None:
+        """Drop all in-memory entries (the disk tier is left untouched)."""
+        with self._lock:
+            self._mem.clear()
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by cached vectors."""
+        return sum(v.nbytes for v in list(self._mem.values()))
+
+    def get(self, tariff: Dict, year: int) -> np.ndarray:
+        """Return the (read-only) price vector for ``tariff`` in ``year``."""
+        key = energy_content_hash(tariff, year)
+        with self._lock:
+            vec = self._mem.get(key)
+            if vec is not None:
+                self._mem.move_to_end(key)
+                self.hits += 1
+                return vec
+            self.misses += 1
+
+        # Built outside the lock; a concurrent miss on the same key only
+        # duplicates work, never corrupts the cache
+        vec = self._load(key)
+        if vec is None:
+            vec = build_energy_price_vector(tariff, year)
+            self._store(key, vec)
+        vec.flags.writeable = False
+
+        with self._lock:
+            self._mem[key] = vec
+            if len(self._mem) > self.maxsize:
+                self._mem.popitem(last=False)
+        return vec
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def _load(self, key: str) -> Optional[np.ndarray]:
+        if not self.cache_dir:
+            return None
+        try:
+            return np.load(self._path(key))
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, key: str, vec: np.ndarray) -> None:
+        if not self.cache_dir:
+            return
+        tmp = self._path(key) + f".{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as fh:
+                np.save(fh, vec)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+_default_cache = PriceVectorCache()
+
+
+def energy_price_vector(
+    tariff: Dict, year: int, cache: Optional[PriceVectorCache] = None
+) -> np.ndarray:
+    """Cached hourly $/kWh vector for ``tariff`` (uses the module cache by default)."""
+    if cache is None:
+        cache = _default_cache
+    return cache.get(tariff, year)
+
+
+def price_matrix(
+    tariffs: Sequence[Dict], year: int, cache: Optional[PriceVectorCache] = None
+) -> np.ndarray:
+    """Stack price vectors for many tariffs into a (tariffs x hours) matrix."""
+    return np.vstack([energy_price_vector(t, year, cache) for t in tariffs])
+
+
+def untiered_energy_costs(
+    tariffs: Sequence[Dict],
+    loads: np.ndarray,
+    year: int,
+    cache: Optional[PriceVectorCache] = None,
+) -> np.ndarray:
+    """Annual untiered energy cost of every tariff against every load profile.
+
+    Args:
+        tariffs: Tariff dicts (API or local DB format).
+        loads:   Hourly, 30- or 15-minute kWh, shape (intervals,) or
+                 (customers, intervals).  Sub-hourly loads are summed to
+                 hours rather than expanding the price vectors.
+        year:    Calendar year of the load profiles.
+
+    Returns:
+        Array of shape (tariffs,) for a single profile, or
+        (tariffs, customers) for a load matrix — one matrix multiply.
+    """
+    prices = price_matrix(tariffs, year, cache)
+    matrix, minutes = as_interval_matrix(loads, year)
+    hourly = hourly_energy(matrix, minutes)
+    costs = prices @ hourly.T
+    return costs[:, 0] if np.ndim(loads) == 1 else costs
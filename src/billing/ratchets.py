@@ -0,0 +1,83 @@
+"""
+Demand ratchets: billing demand floored at a share of recent monthly peaks.
+
+``demandratchetpercentage`` holds one ratchet percentage per calendar month
+and ``peakkwcapacityhistory`` the number of preceding months the ratchet looks
+back over (``DEFAULT_LOOKBACK`` when unset).  For month m the floor is
+``pct[m] * max(peak[m - lookback : m])``, and billing demand is the larger of
+the month's own peak and that floor.
+
+The trailing maximum is computed by window doubling: O(log lookback)
+``np.maximum`` passes over a (customers, months) array.  A multi-year study
+floors every customer and month in one call instead of walking months in
+Python.
+"""
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from src.utils import normalize_tariff, ratchet_fractions
+
+# Months of history when the tariff gives no ``peakkwcapacityhistory``
+DEFAULT_LOOKBACK = 11
+
+
+def ratchet_settings(tariff: Dict) -> Optional[Tuple[np.ndarray, int]]:
+    """(12 monthly fractions, lookback months), or None if the tariff has no ratchet.
+
+    Percentages are read as fractions (0.8 = 80%); a list with any value
+    above 1.5 is taken to be in percent and scaled down.
+    """
+    t = normalize_tariff(tariff)
+    fractions = ratchet_fractions(t.get("demandratchetpercentage"))
+    if fractions is None or not any(fractions):
+        return None
+    pct = np.asarray(fractions)
+    try:
+        lookback = int(float(t.get("peakkwcapacityhistory") or 0))
+    except (TypeError, ValueError):
+        lookback = 0
+    return pct, lookback if lookback > 0 else DEFAULT_LOOKBACK
+
+
+def trailing_max(peaks: np.ndarray, lookback: int) -> np.ndarray:
+    """Maximum of the ``lookback`` months before each month of (customers, months) peaks.
+
+    Months with no history (the start of the series) see zeros.
+    """
+    peaks = np.atleast_2d(np.asarray(peaks, dtype=float))
+    n_cust, n_months = peaks.shape
+    # padded[:, m : m + lookback] is peaks[:, m - lookback : m]
+    padded = np.concatenate([np.zeros((n_cust, lookback)), peaks], axis=1)
+    run, width = padded, 1  # run[:, i] = max(padded[:, i : i + width])
+    while width * 2 <= lookback:
+        run = np.maximum(run[:, :-width], run[:, width:])
+        width *= 2
+    # Two overlapping windows of ``width`` months cover the ``lookback`` months
+    tail = lookback - width
+    return np.maximum(run[:, :n_months], run[:, tail:tail + n_months])
+
+
+def ratchet_floor(
+    peaks: np.ndarray, percentages: np.ndarray, lookback: int, first_month: int = 0
+) -> np.ndarray:
+    """Ratchet floor for each month of (customers, months) peaks.
+
+    Args:
+        peaks:       Monthly peak kW, consecutive months (any number of years).
+        percentages: 12 ratchet fractions indexed by calendar month.
+        lookback:    Months of history the ratchet considers.
+        first_month: Calendar month (0-11) of ``peaks[:, 0]``.
+    """
+    peaks = np.atleast_2d(np.asarray(peaks, dtype=float))
+    month = (first_month + np.arange(peaks.shape[1])) % 12
+    return np.asarray(percentages)[month] * trailing_max(peaks, lookback)
+
+
+def billing_demand(
+    peaks: np.ndarray, percentages: np.ndarray, lookback: int, first_month: int = 0
+) -> np.ndarray:
+    """Ratcheted billing demand: each month's peak or its ratchet floor, whichever is larger."""
+    peaks = np.atleast_2d(np.asarray(peaks, dtype=float))
+    return np.maximum(peaks, ratchet_floor(peaks, percentages, lookback, first_month))
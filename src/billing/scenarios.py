@@ -0,0 +1,160 @@
+"""
+Batched rate-scenario sweeps.
+
+Every scenario perturbs the base tariff's rate tables only, so determinants
+are computed once and all scenarios are priced against all customers with a
+single broadcast ``einsum`` — no edited tariff dicts are ever built.
+Export credits and coincident demand charges are not perturbed; they are
+priced once and added to every scenario, with credits capped at each month's
+charges as in ``bill_from_determinants``.
+"""
+
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from src.billing.bills import export_credit, rate_tables
+from src.billing.coincident import coincident_charges, has_coincident
+from src.billing.determinants import DeterminantCache, flat_month_map, tier_field
+from src.utils import normalize_tariff
+
+# Perturbation name -> (structure it applies to, identity value)
+PERTURBATIONS = {
+    "energy_rate_multiplier": ("energyratestructure", 1.0),
+    "energy_adj_shift": ("energyratestructure", 0.0),
+    "demand_rate_multiplier": ("demandratestructure", 1.0),
+    "demand_adj_shift": ("demandratestructure", 0.0),
+    "flat_rate_delta": ("flatdemandstructure", 0.0),
+    "fixed_charge_delta": (None, 0.0),
+}
+
+
+def scenario_grid(**axes: Sequence) -> Dict[str, np.ndarray]:
+    """Cartesian product of perturbation settings.
+
+    Each keyword is a name from ``PERTURBATIONS`` mapped to a list of
+    settings; a setting is either a scalar (applied to every period) or a
+    per-period sequence.  Returns arrays with one row per scenario, e.g.::
+
+        scenario_grid(energy_rate_multiplier=[0.95, 1.0, 1.05],
+                      fixed_charge_delta=[0.0, 2.5])   # 6 scenarios
+    """
+    unknown = set(axes) - set(PERTURBATIONS)
+    if unknown:
+        raise ValueError(f"Unknown perturbation(s): {', '.join(sorted(unknown))}")
+    names = list(axes)
+    values = [np.asarray(axes[n], dtype=float) for n in names]
+    index = np.indices([len(v) for v in values]).reshape(len(names), -1)
+    return {n: v[index[i]] for i, (n, v) in enumerate(zip(names, values))}
+
+
+def _per_period(
+    scenarios: Dict[str, np.ndarray], name: str, n_scen: int, n_periods: int
+) -> np.ndarray:
+    """Broadcast one perturbation to (scenarios, periods)."""
+    identity = PERTURBATIONS[name][1]
+    arr = scenarios.get(name)
+    if arr is None:
+        return np.full((n_scen, n_periods), identity)
+    arr = np.asarray(arr, dtype=float)
+    if arr.ndim == 1:
+        arr = arr[:, None]
+    return np.broadcast_to(arr, (n_scen, n_periods))
+
+
+def _scenario_count(scenarios: Dict[str, np.ndarray]) -> int:
+    sizes = {len(np.asarray(v)) for v in scenarios.values()}
+    if len(sizes) != 1:
+        raise ValueError("All perturbation arrays must have one row per scenario.")
+    return sizes.pop()
+
+
+def sweep_scenarios(
+    tariff: Dict,
+    loads: np.ndarray,
+    year: int,
+    scenarios: Dict[str, np.ndarray],
+    cache: Optional[DeterminantCache] = None,
+    load_key: Optional[str] = None,
+    chunk_size: int = 256,
+    coincident_peaks: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Annual bills for every scenario and customer.
+
+    Args:
+        tariff:     Base tariff dict (API or local DB format).
+        loads:      Hourly kWh, shape (hours,) or (customers, hours).
+        year:       Calendar year of the profiles.
+        scenarios:  Perturbation arrays keyed by ``PERTURBATIONS`` names, each
+                    (scenarios,) or (scenarios, periods) — see ``scenario_grid``.
+                    Multipliers scale each tier's ``rate``; shifts and deltas
+                    are added to ``adj`` / the flat rate / the fixed charge.
+        chunk_size: Scenarios priced per batch when a monthly minimum charge
+                    forces month-level evaluation (bounds peak memory).
+        coincident_peaks: System-peak interval indices or boolean mask, as for
+                    ``compute_bill``; without it coincident charges are zero.
+
+    Returns:
+        Array of shape (scenarios, customers).
+    """
+    t = normalize_tariff(tariff)
+    det = (cache if cache is not None else DeterminantCache(maxsize=1)).get(
+        t, loads, year, load_key=load_key
+    )
+    base = rate_tables(t, year)
+    n_scen = _scenario_count(scenarios) if scenarios else 1
+
+    def perturbed(struct_key: str, prefix: str) -> np.ndarray:
+        structure = t.get(struct_key) or []
+        rate = tier_field(structure, "rate")
+        adj = tier_field(structure, "adj")
+        mult = _per_period(scenarios, f"{prefix}_rate_multiplier", n_scen, len(structure))
+        shift = _per_period(scenarios, f"{prefix}_adj_shift", n_scen, len(structure))
+        return rate * mult[..., None] + adj + shift[..., None]  # (S, P, T)
+
+    energy_rates = perturbed("energyratestructure", "energy")
+    demand_rates = perturbed("demandratestructure", "demand")
+
+    f_struct = t.get("flatdemandstructure") or []
+    if f_struct:
+        f_months = np.clip(flat_month_map(t), 0, len(f_struct) - 1)
+        f_delta = _per_period(scenarios, "flat_rate_delta", n_scen, len(f_struct))
+        flat_rates = base.flat + f_delta[:, f_months, None]  # (S, 12, T)
+    else:
+        flat_rates = np.broadcast_to(base.flat, (n_scen,) + base.flat.shape)
+
+    fixed_delta = np.asarray(scenarios.get("fixed_charge_delta", 0.0), dtype=float)
+    fixed = base.fixed + np.broadcast_to(fixed_delta, (n_scen,))[:, None]  # (S, 12)
+    # (C, 12) amounts no perturbation touches: export credits and coincident demand
+    credit = export_credit(det, base)
+    coincident = np.zeros_like(credit)
+    if coincident_peaks is not None and has_coincident(t):
+        coincident = coincident_charges(t, loads, year, coincident_peaks)
+
+    if not base.min_monthly and det.export_kwh is None:
+        # Fully linear: collapse months before pricing.  Export credits are
+        # capped at each month's charges, so signed loads need monthly bills.
+        annual = (
+            np.einsum("cpt,spt->sc", det.energy_kwh.sum(axis=1), energy_rates)
+            + np.einsum("cpt,spt->sc", det.demand_kw.sum(axis=1), demand_rates)
+            + np.einsum("cmt,smt->sc", det.flat_kw, flat_rates)
+            + fixed.sum(axis=1)[:, None]
+            + coincident.sum(axis=1)
+        )
+        return np.maximum(annual, base.annual_min)
+
+    out = np.empty((n_scen, det.peak_kw.shape[0]))
+    for lo in range(0, n_scen, chunk_size):
+        hi = min(lo + chunk_size, n_scen)
+        charges = (
+            np.einsum("cmpt,spt->scm", det.energy_kwh, energy_rates[lo:hi])
+            + np.einsum("cmpt,spt->scm", det.demand_kw, demand_rates[lo:hi])
+            + np.einsum("cmt,smt->scm", det.flat_kw, flat_rates[lo:hi])
+            + fixed[lo:hi, None, :]
+            + coincident
+        )
+        # As in bill_from_determinants: credits offset at most the month's charges
+        monthly = charges + np.maximum(credit, -np.maximum(charges, 0.0))
+        annual = np.maximum(monthly, base.min_monthly).sum(axis=2)
+        out[lo:hi] = np.maximum(annual, base.annual_min)
+    return out
@@ -0,0 +1,150 @@
+"""
+Derive TOU periods and 12x24 schedules from an hourly price or load series.
+
+The hourly series is averaged onto the month x daytype x hour lattice (576
+cells) and the cell means are clustered into K periods, either with an exact
+1-D optimal partition (weighted within-period sum of squares) or with
+vectorized 1-D k-means.  Period 0 is always the cheapest / lightest cluster.
+"""
+
+from typing import List, NamedTuple
+
+import numpy as np
+
+from src.billing.calendar import hourly_calendar
+from src.billing.determinants import as_load_matrix
+
+METHODS = ("optimal", "kmeans")
+
+
+class DerivedTOU(NamedTuple):
+    """Clustered schedule; ``means`` are hour-weighted period averages."""
+
+    weekday: List[List[int]]  # 12x24 period indices
+    weekend: List[List[int]]
+    means: List[float]        # one per period, ascending
+
+
+def lattice_means(series: np.ndarray, year: int):
+    """Mean of ``series`` per (month, daytype, hour) cell and each cell's hour count.
+
+    Returns (means, counts), both shaped (12, 2, 24); daytype 0=weekday 1=weekend.
+    """
+    values = as_load_matrix(series, year)[0]
+    cal = hourly_calendar(year)
+    groups = (cal.month.astype(np.int32) * 2 + cal.weekend) * 24 + cal.hour
+    counts = np.bincount(groups, minlength=576).astype(float)
+    sums = np.bincount(groups, weights=values, minlength=576)
+    means = np.divide(sums, counts, out=np.zeros(576), where=counts > 0)
+    return means.reshape(12, 2, 24), counts.reshape(12, 2, 24)
+
+
+def optimal_partition(values: np.ndarray, weights: np.ndarray, k: int) -> np.ndarray:
+    """Exact K-way split of sorted 1-D data minimizing weighted within-group SSE.
+
+    Fisher's dynamic program over the distinct values; each layer is one
+    broadcast (n+1, n+1) min over prefix-sum segment costs.  Returns a label
+    per input value, 0 for the lowest group.
+    """
+    uniq, inverse = np.unique(values, return_inverse=True)
+    w = np.bincount(inverse, weights=weights)
+    n = len(uniq)
+    k = max(1, min(k, n))
+
+    cw = np.r_[0.0, np.cumsum(w)]
+    cx = np.r_[0.0, np.cumsum(w * uniq)]
+    cxx = np.r_[0.0, np.cumsum(w * uniq * uniq)]
+    # cost[i, j] = weighted SSE of segment uniq[i:j]; inf where j <= i
+    sw = cw[None, :] - cw[:, None]
+    sx = cx[None, :] - cx[:, None]
+    sxx = cxx[None, :] - cxx[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cost = np.where(sw > 0, sxx - sx * sx / sw, np.inf)
+    cost[np.tril_indices(n + 1)] = np.inf
+
+    best = cost[0].copy()  # best[j]: optimal 1-group cost of uniq[:j]
+    splits = np.zeros((k, n + 1), dtype=np.int64)
+    for layer in range(1, k):
+        total = best[:, None] + cost
+        splits[layer] = np.argmin(total, axis=0)
+        best = total[splits[layer], np.arange(n + 1)]
+
+    # Walk the split points back from the full range
+    bounds = [n]
+    for layer in range(k - 1, 0, -1):
+        bounds.append(splits[layer][bounds[-1]])
+    starts = np.array([0] + bounds[::-1][:-1])
+    group_of_uniq = np.searchsorted(starts, np.arange(n), side="right") - 1
+    return group_of_uniq[inverse]
+
+
+def kmeans_1d(
+    values: np.ndarray, weights: np.ndarray, k: int, max_iter: int = 100
+) -> np.ndarray:
+    """Weighted Lloyd's k-means on 1-D data, seeded evenly across the value range.
+
+    Returns a label per value with clusters numbered by ascending centre.
+    """
+    k = max(1, min(k, len(np.unique(values))))
+    lo, hi = float(values.min()), float(values.max())
+    centres = lo + (np.arange(k) + 0.5) / k * (hi - lo)
+
+    labels = np.zeros(len(values), dtype=np.int64)
+    for _ in range(max_iter):
+        labels = np.argmin(np.abs(values[:, None] - centres[None, :]), axis=1)
+        wsum = np.bincount(labels, weights=weights, minlength=k)
+        xsum = np.bincount(labels, weights=weights * values, minlength=k)
+        # Empty clusters keep their previous centre
+        new = np.where(wsum > 0, xsum / np.where(wsum > 0, wsum, 1), centres)
+        if np.allclose(new, centres):
+            break
+        centres = new
+
+    # Renumber by ascending centre, dropping clusters that ended up empty
+    used = np.unique(labels)
+    rank = np.empty(k, dtype=np.int64)
+    rank[used[np.argsort(centres[used])]] = np.arange(len(used))
+    return rank[labels]
+
+
+def derive_tou(series: np.ndarray, year: int, k: int, method: str = "optimal") -> DerivedTOU:
+    """Cluster an hourly series into at most ``k`` TOU periods.
+
+    Args:
+        series: Hourly values for ``year`` (8760, or 8784 in a leap year),
+                e.g. marginal price in $/kWh or system load.
+        year:   Calendar year that fixes which days are weekends.
+        k:      Number of periods; fewer are returned if the series has
+                fewer distinct cell means.
+        method: ``"optimal"`` (exact 1-D partition) or ``"kmeans"``.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method {method!r}; expected one of {METHODS}.")
+    means, counts = lattice_means(series, year)
+    # Round away float noise so cells with the same true mean stay together
+    flat, weights = np.round(means.ravel(), 10), counts.ravel()
+    cluster = optimal_partition if method == "optimal" else kmeans_1d
+    labels = cluster(flat, weights, k)
+
+    n_periods = int(labels.max()) + 1
+    wsum = np.bincount(labels, weights=weights, minlength=n_periods)
+    xsum = np.bincount(labels, weights=weights * flat, minlength=n_periods)
+    grid = labels.reshape(12, 2, 24)
+    return DerivedTOU(
+        weekday=grid[:, 0, :].tolist(),
+        weekend=grid[:, 1, :].tolist(),
+        means=(xsum / np.where(wsum > 0, wsum, 1)).tolist(),
+    )
+
+
+def period_labels(n: int) -> List[str]:
+    """Conventional labels for ``n`` periods ordered from cheapest to dearest."""
+    if n == 1:
+        return ["All Hours"]
+    if n == 2:
+        return ["Off-Peak", "On-Peak"]
+    if n == 3:
+        return ["Off-Peak", "Mid-Peak", "On-Peak"]
+    if n == 4:
+        return ["Super Off-Peak", "Off-Peak", "Mid-Peak", "On-Peak"]
+    return [f"Period {i}" for i in range(n)]
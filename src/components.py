@@ -3,12 +3,13 @@ Shared UI components: interactive schedule grid and rate period editor.
 """
 
 import json
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import streamlit as st
 
-from src.constants import MONTH_NAMES
-from src.utils import assign_heatmap_colors
+from src.constants import MONTH_NAMES, PREVIEW_NONE
+from src.history import EditHistory, resize_delta
+from src.utils import assign_heatmap_colors, period_tiers
 
 
 def create_grid_html(
@@ -142,6 +143,8 @@ def create_grid_html(
     <button class="fbtn" onclick="fc_{grid_id}()">Fill Hour Column</button>
     <button class="fbtn" onclick="ca_{grid_id}()">Clear All</button>
     {copy_btn}
+    <button class="fbtn" onclick="undo_{grid_id}()" title="Undo (Ctrl+Z)">↶ Undo</button>
+    <button class="fbtn" onclick="redo_{grid_id}()" title="Redo (Ctrl+Y)">↷ Redo</button>
   </div>
   <div class="gi-{grid_id}">Click and drag to paint. Select a period above, then paint on the grid. Hours indicate the hour starting at (e.g. 1p = 1:00 PM – 1:59 PM).</div>
 </div>
@@ -155,8 +158,9 @@ def create_grid_html(
     cells=grid.querySelectorAll('.cell'),
     initSched={sched_json},
     pRates={period_totals_json},
-    showRates={'true' if show_rates else 'false'};
-  let sp=0,md=false,lm=0,lh=0;
+    showRates={'true' if show_rates else 'false'},
+    hk='tou_hist_'+gid,HMAX=100;
+  let sp=0,md=false,lm=0,lh=0,stroke=null,hist={{v:ver,u:[],r:[]}};
 
   function setRateText(c){{
     if(!showRates)return;
@@ -180,31 +184,74 @@ def create_grid_html(
     }}
   }}catch(e){{}}
 
+  /* Edit history: each stroke is kept as RLE runs [start,len,old,new] over the
+     288 cells (index = month*24 + hour) — never as a grid snapshot. */
+  try{{
+    const h=JSON.parse(localStorage.getItem(hk)||'null');
+    if(h&&h.v===ver)hist=h;
+  }}catch(e){{}}
+  function saveHist(){{try{{localStorage.setItem(hk,JSON.stringify(hist));}}catch(e){{}}}}
+  function setP(c,p){{
+    const o=+c.dataset.p;if(o===p)return;
+    if(stroke){{
+      const i=(+c.dataset.m)*24+(+c.dataset.h),e=stroke.get(i);
+      if(e)e[1]=p;else stroke.set(i,[o,p]);
+    }}
+    c.dataset.p=p;setRateText(c);
+  }}
+  function commit(){{
+    if(!stroke)return;
+    const runs=[];
+    [...stroke.keys()].sort((a,b)=>a-b).forEach(i=>{{
+      const [o,n]=stroke.get(i);if(o===n)return;
+      const r=runs[runs.length-1];
+      if(r&&r[0]+r[1]===i&&r[2]===o&&r[3]===n)r[1]++;else runs.push([i,1,o,n]);
+    }});
+    stroke=null;
+    if(!runs.length)return;
+    hist.u.push(runs);if(hist.u.length>HMAX)hist.u.shift();
+    hist.r=[];saveHist();
+  }}
+  function begin(){{commit();stroke=new Map();}}
+  function applyRuns(runs,back){{
+    runs.forEach(([s,l,o,n])=>{{
+      for(let i=s;i<s+l;i++){{cells[i].dataset.p=back?o:n;setRateText(cells[i]);}}
+    }});
+    save();saveHist();
+  }}
+  window['undo_'+gid]=()=>{{commit();const r=hist.u.pop();if(r){{hist.r.push(r);applyRuns(r,true);}}}};
+  window['redo_'+gid]=()=>{{commit();const r=hist.r.pop();if(r){{hist.u.push(r);applyRuns(r,false);}}}};
+  document.addEventListener('keydown',e=>{{
+    if(!(e.ctrlKey||e.metaKey))return;
+    const k=e.key.toLowerCase();
+    if(k==='z'&&!e.shiftKey){{e.preventDefault();window['undo_'+gid]();}}
+    else if(k==='y'||(k==='z'&&e.shiftKey)){{e.preventDefault();window['redo_'+gid]();}}
+  }});
+
   pbtns[0]&&pbtns[0].classList.add('sel');
   pbtns.forEach(b=>b.addEventListener('click',function(){{
     pbtns.forEach(x=>x.classList.remove('sel'));
     this.classList.add('sel');sp=+this.dataset.p;
   }}));
 
-  function paint(c){{c.dataset.p=sp;setRateText(c);lm=+c.dataset.m;lh=+c.dataset.h;save();}}
+  function paint(c){{setP(c,sp);lm=+c.dataset.m;lh=+c.dataset.h;save();}}
   cells.forEach(c=>{{
-    c.addEventListener('mousedown',e=>{{e.preventDefault();md=true;paint(c);}});
+    c.addEventListener('mousedown',e=>{{e.preventDefault();md=true;begin();paint(c);}});
     c.addEventListener('mouseenter',()=>{{if(md)paint(c);}});
-    c.addEventListener('touchstart',e=>{{e.preventDefault();paint(c);}});
+    c.addEventListener('touchstart',e=>{{e.preventDefault();begin();paint(c);}});
+    c.addEventListener('touchend',()=>{{commit();}});
     c.addEventListener('touchmove',e=>{{
       e.preventDefault();const t=e.touches[0],
       el=document.elementFromPoint(t.clientX,t.clientY);
       if(el&&el.classList.contains('cell'))paint(el);
     }});
   }});
-  document.addEventListener('mouseup',()=>{{md=false;}});
+  document.addEventListener('mouseup',()=>{{md=false;commit();}});
 
   function getSched(){{
     const s=[];
     for(let m=0;m<12;m++){{const r=[];
-      for(let h=0;h<24;h++){{
-        const c=grid.querySelector(`.cell[data-m="${{m}}"][data-h="${{h}}"]`);
-        r.push(c?+c.dataset.p:0);}}
+      for(let h=0;h<24;h++)r.push(+cells[m*24+h].dataset.p);
       s.push(r);}}
     return s;
   }}
@@ -213,10 +260,11 @@ def create_grid_html(
     try{{localStorage.setItem(sk,JSON.stringify({{v:ver,s:getSched()}}));}}catch(e){{}}
   }}
 
-  window['fa_'+gid]=()=>{{cells.forEach(c=>{{c.dataset.p=sp;setRateText(c);}});save();}};
-  window['fr_'+gid]=()=>{{cells.forEach(c=>{{if(+c.dataset.m===lm){{c.dataset.p=sp;setRateText(c);}}}});save();}};
-  window['fc_'+gid]=()=>{{cells.forEach(c=>{{if(+c.dataset.h===lh){{c.dataset.p=sp;setRateText(c);}}}});save();}};
-  window['ca_'+gid]=()=>{{cells.forEach(c=>{{c.dataset.p=0;setRateText(c);}});save();}};
+  function fill(test,p){{begin();cells.forEach(c=>{{if(test(c))setP(c,p);}});commit();save();}}
+  window['fa_'+gid]=()=>fill(()=>true,sp);
+  window['fr_'+gid]=()=>fill(c=>+c.dataset.m===lm,sp);
+  window['fc_'+gid]=()=>fill(c=>+c.dataset.h===lh,sp);
+  window['ca_'+gid]=()=>fill(()=>true,0);
   window['getSched_'+gid]=getSched;
 
   /* Copy-from support */
@@ -226,12 +274,12 @@ def create_grid_html(
       try{{
         const src=JSON.parse(localStorage.getItem('tou_sched_'+copyFromId)||'null');
         if(src&&src.s){{
+          begin();
           cells.forEach(c=>{{
             const m=+c.dataset.m,h=+c.dataset.h;
-            if(m<src.s.length&&h<src.s[m].length) c.dataset.p=src.s[m][h];
-            setRateText(c);
+            if(m<src.s.length&&h<src.s[m].length) setP(c,+src.s[m][h]);
           }});
-          save();
+          commit();save();
         }}
       }}catch(e){{}}
     }};
@@ -243,6 +291,24 @@ def create_grid_html(
     return html
 
 
+def _period_history(prefix: str) -> EditHistory:
+    """Per-editor undo/redo history, created on first use."""
+    key = f"{prefix}_history"
+    if key not in st.session_state:
+        st.session_state[key] = EditHistory()
+    return st.session_state[key]
+
+
+def _step_period_history(prefix: str, redo: bool) -> None:
+    """Button callback: undo / redo one step and refresh the editor widgets."""
+    history = _period_history(prefix)
+    moved = history.redo(st.session_state) if redo else history.undo(st.session_state)
+    if moved:
+        st.session_state[f"{prefix}_editor_rev"] = (
+            st.session_state.get(f"{prefix}_editor_rev", 0) + 1
+        )
+
+
 def render_rate_period_editor(
     periods_key: str,
     prefix: str,
@@ -250,83 +316,142 @@ def render_rate_period_editor(
     default_periods: List[Dict],
     min_periods: int = 1,
     max_periods: int = 12,
+    sell: bool = False,
 ):
-    """Render an editor for rate periods as a compact table. Modifies session state in place."""
+    """Render an editor for rate periods as a compact table. Modifies session state in place.
+
+    Every change is recorded as a delta in ``<prefix>_history`` so it can be
+    undone / redone from the buttons above the table.  ``sell`` adds a column
+    for the export credit rate (blank = no ``sell`` field).
+    """
     periods = st.session_state[periods_key]
+    history = _period_history(prefix)
+    step: List[Tuple] = []
 
-    # Include sched_version in widget keys so they reset after import
+    # Include sched_version in widget keys so they reset after import, and the
+    # editor revision so they pick up values restored by undo / redo
     ver = st.session_state.get("sched_version", 1)
-
-    num = st.number_input(
-        "Number of Rate Periods",
-        min_value=min_periods,
-        max_value=max_periods,
-        value=len(periods),
-        key=f"{prefix}_num_periods_v{ver}",
-        help="Number of TOU periods (e.g., Off-Peak, Mid-Peak, On-Peak)",
-    )
+    rev = st.session_state.get(f"{prefix}_editor_rev", 0)
+    wkey = f"v{ver}r{rev}"
+
+    n1, n2, n3 = st.columns([2.6, 1.1, 1.1])
+    with n1:
+        num = st.number_input(
+            "Number of Rate Periods",
+            min_value=min_periods,
+            max_value=max_periods,
+            value=len(periods),
+            key=f"{prefix}_num_periods_{wkey}",
+            help="Number of TOU periods (e.g., Off-Peak, Mid-Peak, On-Peak)",
+        )
+    with n2:
+        st.button(
+            "↶ Undo", key=f"{prefix}_undo", use_container_width=True,
+            disabled=not history.can_undo,
+            on_click=_step_period_history, args=(prefix, False),
+        )
+    with n3:
+        st.button(
+            "↷ Redo", key=f"{prefix}_redo", use_container_width=True,
+            disabled=not history.can_redo,
+            on_click=_step_period_history, args=(prefix, True),
+        )
 
     # Adjust list length
+    old_len = len(periods)
+    removed = periods[num:]
     while len(periods) < num:
         i = len(periods)
         periods.append({"label": f"Period {i}", "rate": 0.0, "adj": 0.0})
     while len(periods) > num:
         periods.pop()
+    if len(periods) != old_len:
+        step.append(resize_delta(
+            periods_key, old_len, len(periods), removed or periods[old_len:]
+        ))
 
     # Table header
     unit_short = rate_unit.lstrip("$/")
-    h1, h2, h3, h4, h5 = st.columns([0.4, 1.4, 1.2, 1.2, 1.0])
-    h1.markdown("**#**")
-    h2.markdown("**Label**")
-    h3.markdown(f"**Base Rate ({rate_unit})**")
-    h4.markdown(f"**Adjustment ({rate_unit})**")
-    h5.markdown(f"**Total ({rate_unit})**")
+    widths = [0.4, 1.4, 1.2, 1.2, 1.0] + ([1.0] if sell else [])
+    heads = st.columns(widths)
+    heads[0].markdown("**#**")
+    heads[1].markdown("**Label**")
+    heads[2].markdown(f"**Base Rate ({rate_unit})**")
+    heads[3].markdown(f"**Adjustment ({rate_unit})**")
+    heads[4].markdown(f"**Total ({rate_unit})**")
+    if sell:
+        heads[5].markdown(f"**Sell ({rate_unit})**")
+
+    def set_field(idx: int, field: str, value) -> None:
+        old = periods[idx].get(field)
+        if value != old:
+            step.append(("set", periods_key, idx, field, old, value))
+            periods[idx][field] = value
 
     # Table rows — one row per period, all visible at once
     for idx in range(len(periods)):
         p = periods[idx]
-        c0, c1, c2, c3, c4 = st.columns([0.4, 1.4, 1.2, 1.2, 1.0])
+        c0, c1, c2, c3, c4, *c5 = st.columns(widths)
         with c0:
             st.markdown(
                 f'<div style="padding:8px 0;font-weight:600;">{idx}</div>',
                 unsafe_allow_html=True,
             )
         with c1:
-            p["label"] = st.text_input(
+            set_field(idx, "label", st.text_input(
                 "Label", value=p["label"],
-                key=f"{prefix}_lbl_{idx}_v{ver}",
+                key=f"{prefix}_lbl_{idx}_{wkey}",
                 label_visibility="collapsed",
-            )
+            ))
         with c2:
             rate_str = st.text_input(
                 "Base Rate", value=f"{p['rate']:.4f}",
-                key=f"{prefix}_rate_{idx}_v{ver}",
+                key=f"{prefix}_rate_{idx}_{wkey}",
                 label_visibility="collapsed",
             )
-            try:
-                p["rate"] = max(0.0, float(rate_str))
-            except ValueError:
-                st.error("Invalid number")
+            # An untouched field shows the rate rounded to 4 places; don't
+            # write that rounding back into the period
+            if rate_str != f"{p['rate']:.4f}":
+                try:
+                    set_field(idx, "rate", max(0.0, float(rate_str)))
+                except ValueError:
+                    st.error("Invalid number")
         with c3:
             adj_str = st.text_input(
                 "Adjustment", value=f"{p['adj']:.4f}",
-                key=f"{prefix}_adj_{idx}_v{ver}",
+                key=f"{prefix}_adj_{idx}_{wkey}",
                 label_visibility="collapsed",
             )
-            try:
-                p["adj"] = float(adj_str)
-            except ValueError:
-                st.error("Invalid number")
+            if adj_str != f"{p['adj']:.4f}":
+                try:
+                    set_field(idx, "adj", float(adj_str))
+                except ValueError:
+                    st.error("Invalid number")
         with c4:
             total = p.get("rate", 0) + p.get("adj", 0)
             st.markdown(
                 f'<div style="padding:8px 0;font-weight:600;">${total:.4f}</div>',
                 unsafe_allow_html=True,
             )
+        if sell:
+            with c5[0]:
+                shown = "" if p.get("sell") is None else f"{p['sell']:.4f}"
+                sell_str = st.text_input(
+                    "Sell", value=shown,
+                    key=f"{prefix}_sell_{idx}_{wkey}",
+                    label_visibility="collapsed",
+                    help="Credit per exported unit; leave blank for none.",
+                )
+                if sell_str != shown:
+                    try:
+                        set_field(idx, "sell", float(sell_str) if sell_str.strip() else None)
+                    except ValueError:
+                        st.error("Invalid number")
 
     # Update colors
     assign_heatmap_colors(periods)
     st.session_state[periods_key] = periods
+    history.push(step)
 
     # Color legend
     cols = st.columns(min(len(periods), 6))
@@ -339,3 +464,127 @@ def render_rate_period_editor(
             f'<b>{p["label"]}</b><br>${total:.4f}/{unit_short}</div>',
             unsafe_allow_html=True,
         )
+
+
+def _number_or_none(value) -> Optional[float]:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if value != value else value  # NaN from a cleared cell
+
+
+def tier_table_editor(
+    period: Dict, key: str, quantity_unit: str, rate_unit: str
+) -> Optional[List[Dict]]:
+    """Editable block table for one period's tiers.
+
+    Returns the edited {rate, adj, max, sell} tiers, or None when nothing
+    changed; ``sell`` is kept from the block at the same position.  The key
+    carries the current tiers, so the table resets whenever they are changed
+    elsewhere (period editor, undo, import).
+    """
+    tiers = period_tiers(period)
+    cap = f"Up to ({quantity_unit})"
+    rows = [{cap: t.get("max"), f"Rate ({rate_unit})": t["rate"],
+             f"Adjustment ({rate_unit})": t["adj"]} for t in tiers]
+    digest = abs(hash(tuple((t.get("max"), t["rate"], t["adj"]) for t in tiers)))
+    edited = st.data_editor(
+        rows,
+        num_rows="dynamic",
+        use_container_width=True,
+        key=f"{key}_{digest}",
+        column_config={
+            cap: st.column_config.NumberColumn(
+                cap, help="Upper bound of the block; leave the last block empty (unbounded).",
+                min_value=0.0,
+            ),
+        },
+    )
+    new = []
+    for i, row in enumerate(edited):
+        values = list(row.values())
+        new.append({
+            "rate": max(0.0, _number_or_none(values[1]) or 0.0),
+            "adj": _number_or_none(values[2]) or 0.0,
+            "max": _number_or_none(values[0]),
+            "sell": tiers[i].get("sell") if i < len(tiers) else None,
+        })
+    tiers = [dict(t, sell=t.get("sell")) for t in tiers]
+    if not new or new == tiers:
+        return None
+    bounds = [t["max"] for t in new[:-1]]
+    if None in bounds or any(b >= a for b, a in zip(bounds, bounds[1:])):
+        st.warning("Every block but the last needs an upper bound, in increasing order.")
+    return new
+
+
+def apply_period_tiers(period: Dict, tiers: List[Dict]) -> List[Tuple[str, object, object]]:
+    """Write ``tiers`` into an editor period; returns (field, old, new) changes."""
+    first, rest = tiers[0], tiers[1:]
+    fields = {"rate": first["rate"], "adj": first["adj"], "max": first["max"],
+              "sell": first.get("sell"), "tiers": rest or None}
+    changes = []
+    for field, value in fields.items():
+        old = period.get(field)
+        if value != old:
+            changes.append((field, old, value))
+            if value is None:
+                period.pop(field, None)
+            else:
+                period[field] = value
+    return changes
+
+
+def render_period_tier_editors(
+    periods_key: str, prefix: str, quantity_unit: str, rate_unit: str
+) -> None:
+    """Block (tier) tables for every period, sharing the period editor's undo history.
+
+    The first block is the period's base rate / adjustment; each block's
+    "Up to" is its cumulative upper bound on the month's peak.
+    """
+    periods = st.session_state[periods_key]
+    ver = st.session_state.get("sched_version", 1)
+    rev = st.session_state.get(f"{prefix}_editor_rev", 0)
+    step: List[Tuple] = []
+    refresh = False
+    for idx, p in enumerate(periods):
+        n_tiers = len(period_tiers(p))
+        with st.expander(
+            f"Period {idx}: {p['label']} — {n_tiers} block{'s' if n_tiers != 1 else ''}",
+            expanded=n_tiers > 1,
+        ):
+            tiers = tier_table_editor(
+                p, f"{prefix}_tiers_{idx}_v{ver}r{rev}", quantity_unit, rate_unit
+            )
+            if tiers is None:
+                continue
+            for field, old, new in apply_period_tiers(p, tiers):
+                step.append(("set", periods_key, idx, field, old, new))
+                refresh = refresh or field in ("rate", "adj")
+    if step:
+        st.session_state[periods_key] = periods
+        _period_history(prefix).push(step)
+    if refresh:
+        # The rate table above already rendered the old base rates
+        st.session_state[f"{prefix}_editor_rev"] = rev + 1
+        st.rerun()
+
+
+def render_bill_preview_section() -> None:
+    """Bill preview heading plus the live preview when a sample profile is set.
+
+    The preview module pulls in the NumPy billing engine, so it is imported
+    only once a profile has been selected.
+    """
+    if st.session_state.preview_profile == PREVIEW_NONE:
+        st.markdown("### Bill Preview")
+        st.caption(
+            "Select a sample load profile in the sidebar to see a monthly bill "
+            "that updates as you edit rates and paint schedules."
+        )
+        return
+    from src.bill_preview import render_bill_preview
+
+    render_bill_preview()
@@ -11,6 +11,20 @@ VOLTAGE_CATEGORIES = ["", "Secondary", "Primary", "Transmission"]
 PHASE_OPTIONS = ["", "Single Phase", "3-Phase", "Single and 3-Phase"]
 DEMAND_UNIT_OPTIONS = ["kW", "hp", "kVA", "kW daily", "hp daily", "kVA daily"]
 
+# All-zero 12x24 schedule shared by every session (never mutated in place)
+ZERO_SCHEDULE = tuple(tuple([0] * 24) for _ in range(12))
+
+# Soft per-session memory budget (bytes); undo history is trimmed beyond it
+SESSION_MEMORY_BUDGET = 1_000_000
+
+# Tariffs listed per page when browsing a multi-tariff import file
+IMPORT_PAGE_SIZE = 25
+
+# Bill preview sample-profile choices (shapes live in src.billing.profiles.ARCHETYPES)
+PREVIEW_NONE = "None"
+PREVIEW_UPLOAD = "Uploaded CSV"
+ARCHETYPE_NAMES = ["Residential", "Small Commercial", "Large Commercial", "Industrial"]
+
 DEFAULT_ENERGY_PERIODS = [
     {"label": "Off-Peak", "rate": 0.08, "adj": 0.0},
     {"label": "Mid-Peak", "rate": 0.15, "adj": 0.0},
@@ -22,12 +36,19 @@ DEFAULT_DEMAND_PERIODS = [
     {"label": "On-Peak", "rate": 15.0, "adj": 0.0},
 ]
 
+DEFAULT_COINCIDENT_PERIODS = [
+    {"label": "Off-Peak", "rate": 0.0, "adj": 0.0},
+    {"label": "System Peak", "rate": 10.0, "adj": 0.0},
+]
+
 # Local DB -> API field mapping for import normalization
 FIELD_MAP = {
     "utilityName": "utility",
     "rateName": "name",
     "eiaId": "eiaid",
     "serviceType": "servicetype",
+    "effectiveDate": "startdate",
+    "endDate": "enddate",
     "voltageCategory": "voltagecategory",
     "phaseWiring": "phasewiring",
     "demandMin": "peakkwcapacitymin",
@@ -0,0 +1,109 @@
+"""
+Delta-based undo/redo history for rate period edits.
+
+Each step is a tuple of small deltas rather than a snapshot:
+
+* ``("set", periods_key, idx, field, old, new)`` — one period field changed.
+* ``("resize", periods_key, old_len, new_len, tail)`` — periods added or
+  removed; ``tail`` holds the periods beyond ``min(old_len, new_len)``.
+
+Undo and redo cost O(size of the step).  Painted-schedule history lives in the
+grid component itself (see ``create_grid_html``), stored as run-length encoded
+cell changes in the browser.
+"""
+
+from collections import deque
+from typing import Dict, List, MutableMapping, Sequence, Tuple
+
+PERIOD_FIELDS = ("label", "rate", "adj", "max", "sell", "tiers")
+
+
+def _strip(period: Dict) -> Dict:
+    """Keep only the editable fields (colors are recomputed on render)."""
+    return {f: period[f] for f in PERIOD_FIELDS if f in period}
+
+
+def resize_delta(
+    periods_key: str, old_len: int, new_len: int, tail: Sequence[Dict]
+) -> Tuple:
+    """Delta for a period list resized from ``old_len`` to ``new_len``.
+
+    ``tail`` is the periods that were added (growth) or removed (shrink).
+    """
+    return ("resize", periods_key, old_len, new_len, tuple(_strip(p) for p in tail))
+
+
+class EditHistory:
+    """Bounded undo/redo stacks of delta steps.
+
+    Args:
+        max_steps: Undo depth; the oldest step is dropped beyond this.
+    """
+
+    def __init__(self, max_steps: int = 100):
+        self._undo: deque = deque(maxlen=max_steps)
+        self._redo: List[Tuple] = []
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def __len__(self) -> int:
+        return len(self._undo)
+
+    def push(self, step: Sequence[Tuple]) -> None:
+        """Record one step (a rerun's worth of deltas); clears the redo stack."""
+        if step:
+            self._undo.append(tuple(step))
+            self._redo.clear()
+
+    def clear(self) -> None:
+        self._undo.clear()
+        self._redo.clear()
+
+    def trim(self, keep: int) -> None:
+        """Drop all but the newest ``keep`` undo steps and the redo stack."""
+        while len(self._undo) > keep:
+            self._undo.popleft()
+        self._redo.clear()
+
+    def undo(self, state: MutableMapping) -> bool:
+        """Revert the latest step in ``state``; returns False if there was none."""
+        if not self._undo:
+            return False
+        step = self._undo.pop()
+        for delta in reversed(step):
+            _apply(state, delta, forward=False)
+        self._redo.append(step)
+        return True
+
+    def redo(self, state: MutableMapping) -> bool:
+        """Re-apply the latest undone step in ``state``."""
+        if not self._redo:
+            return False
+        step = self._redo.pop()
+        for delta in step:
+            _apply(state, delta, forward=True)
+        self._undo.append(step)
+        return True
+
+
+def _apply(state: MutableMapping, delta: Tuple, forward: bool) -> None:
+    kind, periods_key = delta[0], delta[1]
+    periods = state[periods_key]
+    if kind == "set":
+        _, _, idx, field, old, new = delta
+        if idx < len(periods):
+            periods[idx][field] = new if forward else old
+    elif kind == "resize":
+        _, _, old_len, new_len, tail = delta
+        target = new_len if forward else old_len
+        base = min(old_len, new_len)
+        del periods[base:]
+        if target > base:
+            periods.extend(dict(p) for p in tail)
+    state[periods_key] = periods
@@ -0,0 +1,300 @@
+"""
+Columnar Parquet store of normalized tariffs for library-wide analytics.
+
+Each tariff is one row.  Scalar fields are typed columns, 12x24 schedules are
+fixed-size ``uint8`` lists of 288 cells (index = month * 24 + hour), and rate
+structures are nested ``list<list<struct>>`` columns.  Each row also carries
+``<kind>_period_rates`` (first-tier rate + adj per period), so "what does
+this tariff charge in July at 5pm" is a gather over flat arrays instead of a
+walk over JSON.  The dataset is hive-partitioned by sector, so sector
+filters skip whole directories.
+
+Requires the optional ``pyarrow`` package (``pip install pyarrow``).
+
+Usage:
+    python -m src.library.analytic_store ingest library.json --root tariff_store
+    python -m src.library.analytic_store query --root tariff_store \\
+        --sector Commercial --month 6 --hour 17 --min-rate 0.30
+"""
+
+import argparse
+import os
+import shutil
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from src.serialization import load_library, tariff_hash
+from src.utils import normalize_tariff
+
+PARTITION_FIELD = "sector"
+UNKNOWN_SECTOR = "Unknown"
+
+STRING_FIELDS = (
+    "label", "utility", "name", "servicetype", "description", "source",
+    "voltagecategory", "phasewiring", "demandrateunit", "demandunits",
+    "flatdemandunit", "fixedchargeunits", "country",
+)
+INT_FIELDS = ("eiaid",)
+FLOAT_FIELDS = (
+    "peakkwcapacitymin", "peakkwcapacitymax", "peakkwhusagemin", "peakkwhusagemax",
+    "fixedchargefirstmeter", "minmonthlycharge", "annualmincharge",
+    "demandwindow", "demandreactivepowercharge",
+)
+DATE_FIELDS = ("startdate", "enddate")
+SCHEDULE_FIELDS = (
+    "energyweekdayschedule", "energyweekendschedule",
+    "demandweekdayschedule", "demandweekendschedule",
+)
+STRUCTURE_FIELDS = {
+    "energy": "energyratestructure",
+    "demand": "demandratestructure",
+    "flat": "flatdemandstructure",
+}
+LABEL_FIELDS = ("energytoulabels", "demandtoulabels")
+TIER_FIELDS = ("rate", "adj", "max", "sell")
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute  # noqa: F401
+        import pyarrow.dataset  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise ImportError("The analytic store requires pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def store_schema():
+    """Arrow schema of the store (partition column excluded)."""
+    pa = _pyarrow()
+    tier = pa.struct(
+        [(f, pa.float64()) for f in TIER_FIELDS] + [("unit", pa.string())]
+    )
+    fields = [("content_hash", pa.string())]
+    fields += [(f, pa.string()) for f in STRING_FIELDS]
+    fields += [(f, pa.int64()) for f in INT_FIELDS]
+    fields += [(f, pa.float64()) for f in FLOAT_FIELDS]
+    fields += [(f, pa.timestamp("s", tz="UTC")) for f in DATE_FIELDS]
+    fields += [(f, pa.list_(pa.uint8(), 288)) for f in SCHEDULE_FIELDS]
+    fields += [(f, pa.list_(pa.string())) for f in LABEL_FIELDS]
+    fields += [(f, pa.list_(pa.list_(tier))) for f in STRUCTURE_FIELDS.values()]
+    fields += [(f"{kind}_period_rates", pa.list_(pa.float64())) for kind in STRUCTURE_FIELDS]
+    fields += [("flatdemandmonths", pa.list_(pa.uint8(), 12))]
+    return pa.schema(fields)
+
+
+# ── Row conversion ───────────────────────────────────────────────────────
+
+def _number(value) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _timestamp(value) -> Optional[datetime]:
+    value = _number(value)
+    if value is None:
+        return None
+    try:
+        return datetime.fromtimestamp(value, tz=timezone.utc)
+    except (OverflowError, OSError, ValueError):
+        return None
+
+
+def _flat_cells(schedule, size: int) -> Optional[List[int]]:
+    """Flatten a schedule to ``size`` uint8 cells, or None if absent / malformed."""
+    if not schedule:
+        return None
+    cells = np.asarray(schedule, dtype=np.int64).ravel()
+    if cells.size != size:
+        return None
+    if cells.min() < 0 or cells.max() > 255:
+        raise ValueError("Schedule period indices must fit in uint8 (0-255).")
+    return cells.tolist()
+
+
+def _structure(structure) -> Optional[List[List[Dict]]]:
+    if not isinstance(structure, list) or not structure:
+        return None
+    out = []
+    for tiers in structure:
+        row = []
+        for tier in tiers if isinstance(tiers, list) else []:
+            if isinstance(tier, dict):
+                entry = {f: _number(tier.get(f)) for f in TIER_FIELDS}
+                entry["unit"] = tier.get("unit")
+                row.append(entry)
+        out.append(row)
+    return out
+
+
+def _period_rates(structure: Optional[List[List[Dict]]]) -> Optional[List[float]]:
+    if structure is None:
+        return None
+    return [
+        ((tiers[0]["rate"] or 0.0) + (tiers[0]["adj"] or 0.0)) if tiers else 0.0
+        for tiers in structure
+    ]
+
+
+def tariff_row(tariff: Dict) -> Dict:
+    """One normalized tariff as a store row (plain Python values)."""
+    t = normalize_tariff(tariff)
+    row: Dict = {"content_hash": tariff_hash(t)}
+    row.update({f: (str(t[f]) if t.get(f) is not None else None) for f in STRING_FIELDS})
+    for f in INT_FIELDS:
+        value = _number(t.get(f))
+        row[f] = int(value) if value is not None else None
+    row.update({f: _number(t.get(f)) for f in FLOAT_FIELDS})
+    row.update({f: _timestamp(t.get(f)) for f in DATE_FIELDS})
+    row.update({f: _flat_cells(t.get(f), 288) for f in SCHEDULE_FIELDS})
+    row.update({f: [str(x) for x in t[f]] if t.get(f) else None for f in LABEL_FIELDS})
+    for kind, field in STRUCTURE_FIELDS.items():
+        row[field] = _structure(t.get(field))
+        row[f"{kind}_period_rates"] = _period_rates(row[field])
+    row["flatdemandmonths"] = _flat_cells(t.get("flatdemandmonths"), 12)
+    row[PARTITION_FIELD] = t.get("sector") or UNKNOWN_SECTOR
+    return row
+
+
+def tariff_table(tariffs: Iterable[Dict]):
+    """Arrow table of tariffs, including the partition column."""
+    pa = _pyarrow()
+    schema = store_schema().append(pa.field(PARTITION_FIELD, pa.string()))
+    return pa.Table.from_pylist([tariff_row(t) for t in tariffs], schema=schema)
+
+
+# ── Dataset I/O ──────────────────────────────────────────────────────────
+
+def write_store(tariffs: Iterable[Dict], root: str, overwrite: bool = False) -> int:
+    """Append tariffs to the store at ``root`` (or replace it); returns rows written."""
+    pa = _pyarrow()
+    if overwrite and os.path.isdir(root):
+        shutil.rmtree(root)
+    table = tariff_table(tariffs)
+    pa.dataset.write_dataset(
+        table,
+        root,
+        format="parquet",
+        partitioning=pa.dataset.partitioning(
+            pa.schema([(PARTITION_FIELD, pa.string())]), flavor="hive"
+        ),
+        # A unique name per batch so repeated ingests add files, never clobber
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        max_rows_per_group=64 * 1024,
+    )
+    return table.num_rows
+
+
+def open_store(root: str):
+    """The store at ``root`` as a ``pyarrow.dataset.Dataset``."""
+    pa = _pyarrow()
+    schema = store_schema().append(pa.field(PARTITION_FIELD, pa.string()))
+    return pa.dataset.dataset(root, format="parquet", schema=schema, partitioning="hive")
+
+
+def read_store(root: str, columns: Optional[List[str]] = None, sector: Optional[str] = None):
+    """Read (a projection of) the store, pruning partitions when ``sector`` is given."""
+    pa = _pyarrow()
+    dataset = open_store(root)
+    flt = pa.dataset.field(PARTITION_FIELD) == sector if sector else None
+    return dataset.to_table(columns=columns, filter=flt)
+
+
+# ── Vectorized queries ───────────────────────────────────────────────────
+
+def rate_at(table, month: int, hour: int, weekend: bool = False, kind: str = "energy") -> np.ndarray:
+    """Per-row first-tier rate + adj in effect at ``month`` (0-11), ``hour`` (0-23).
+
+    Rows without that schedule or structure (or whose schedule points past
+    the structure) get NaN.
+    """
+    pa = _pyarrow()
+    pc = pa.compute
+    daytype = "weekend" if weekend else "weekday"
+    sched = table.column(f"{kind}{daytype}schedule")
+    rates = table.column(f"{kind}_period_rates").combine_chunks()
+
+    period = pc.list_element(sched, month * 24 + hour).to_numpy(zero_copy_only=False)
+    period = np.nan_to_num(period.astype(float), nan=-1).astype(np.int64)
+    offsets = rates.offsets.to_numpy()
+    lengths = np.diff(offsets)
+    values = rates.values.to_numpy(zero_copy_only=False)
+
+    ok = (period >= 0) & (period < lengths) & rates.is_valid().to_numpy(zero_copy_only=False)
+    out = np.full(len(period), np.nan)
+    out[ok] = values[offsets[:-1][ok] + period[ok]]
+    return out
+
+
+def query_rate_above(
+    root: str,
+    threshold: float,
+    month: int,
+    hour: int,
+    weekend: bool = False,
+    kind: str = "energy",
+    sector: Optional[str] = None,
+    columns: Iterable[str] = ("label", "utility", "name"),
+):
+    """Tariffs whose ``kind`` rate at ``month``/``hour`` exceeds ``threshold``.
+
+    e.g. all commercial tariffs above $0.30/kWh in July at 5pm:
+    ``query_rate_above(root, 0.30, month=6, hour=17, sector="Commercial")``.
+    Returns an Arrow table of ``columns`` plus the sector and the ``rate``.
+    """
+    pa = _pyarrow()
+    daytype = "weekend" if weekend else "weekday"
+    needed = list(dict.fromkeys(
+        [*columns, PARTITION_FIELD, f"{kind}{daytype}schedule", f"{kind}_period_rates"]
+    ))
+    table = read_store(root, needed, sector)
+    rate = rate_at(table, month, hour, weekend, kind)
+    hit = np.nan_to_num(rate, nan=-np.inf) > threshold
+    out = table.select(list(dict.fromkeys([*columns, PARTITION_FIELD]))).filter(pa.array(hit))
+    return out.append_column("rate", pa.array(rate[hit]))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ingest = sub.add_parser("ingest", help="Add library JSON files to the store")
+    ingest.add_argument("paths", nargs="+", help="Library JSON files")
+    ingest.add_argument("--root", required=True)
+    ingest.add_argument("--overwrite", action="store_true", help="Replace the store")
+
+    query = sub.add_parser("query", help="Tariffs above a rate at a month and hour")
+    query.add_argument("--root", required=True)
+    query.add_argument("--month", type=int, required=True, help="0-11")
+    query.add_argument("--hour", type=int, required=True, help="0-23")
+    query.add_argument("--min-rate", type=float, required=True)
+    query.add_argument("--sector")
+    query.add_argument("--weekend", action="store_true")
+    query.add_argument("--kind", choices=("energy", "demand"), default="energy")
+    args = parser.parse_args(argv)
+
+    if args.command == "ingest":
+        total = 0
+        for i, path in enumerate(args.paths):
+            total += write_store(load_library(path), args.root, overwrite=args.overwrite and i == 0)
+        print(f"Wrote {total} tariffs to {args.root}")
+        return
+
+    result = query_rate_above(
+        args.root, args.min_rate, args.month, args.hour,
+        weekend=args.weekend, kind=args.kind, sector=args.sector,
+    )
+    for row in result.to_pylist():
+        print(f"{row['rate']:.5f}  {row['utility']} — {row['name']} ({row['label']})")
+    print(f"{result.num_rows} tariff(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Applicability index: which tariffs each customer is eligible for.
+
+Tariffs are partitioned by (utility, sector).  Within a partition the demand
+bounds (``peakkwcapacitymin``/``max``) and monthly usage bounds
+(``peakkwhusagemin``/``max``) are cut into elementary segments at every
+distinct endpoint; each segment stores a packed bitset of the tariffs whose
+closed interval covers it.  Voltage category and phase wiring are bitsets per
+category, where a tariff that leaves the field blank applies to any value.
+
+A customer's eligible set is then a ``searchsorted`` per axis plus an AND of
+a few packed rows, so a batch of millions of customers costs
+O(customers * (log tariffs + tariffs / 8)) instead of a pairwise comparison
+of every customer with every tariff.
+
+    index = ApplicabilityIndex(load_library("library.json"))
+    cust, tariff = index.eligible(utility, sector, peak_kw, monthly_kwh)
+    index.tariffs[tariff[cust == 0]]   # tariffs available to customer 0
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from src.utils import normalize_tariff
+
+# Phase wiring values that apply to every customer, besides a blank field
+ANY_PHASE = ("", "Single and 3-Phase")
+CHUNK = 65536
+
+
+def _bound(value, default: float) -> float:
+    try:
+        return float(value) if value not in (None, "") else default
+    except (TypeError, ValueError):
+        return default
+
+
+class _Axis(NamedTuple):
+    """Elementary segments of one numeric axis and their coverage bitsets."""
+
+    endpoints: np.ndarray  # sorted distinct finite bounds
+    bits: np.ndarray       # (2 * len(endpoints) + 2, n_bytes) packed coverage; last row = all
+
+    def lookup(self, x: np.ndarray) -> np.ndarray:
+        """Packed rows for values ``x``; NaN (unknown) matches every tariff."""
+        e = self.endpoints
+        k = np.searchsorted(e, x, side="left")
+        exact = np.zeros(len(x), dtype=bool)
+        if len(e):
+            exact = (k < len(e)) & (e[np.minimum(k, len(e) - 1)] == x)
+        slot = 2 * k + exact
+        slot = np.where(np.isnan(x), len(self.bits) - 1, slot)
+        return self.bits[slot]
+
+
+def _build_axis(lo: np.ndarray, hi: np.ndarray) -> _Axis:
+    """Slot 2k is the open gap below endpoint k, slot 2k+1 is endpoint k itself."""
+    e = np.unique(np.concatenate([lo[np.isfinite(lo)], hi[np.isfinite(hi)]]))
+    # One representative value per slot: gap midpoints and the endpoints
+    reps = np.zeros(2 * len(e) + 1)
+    if len(e):
+        reps[0::2] = np.concatenate([[e[0] - 1], (e[:-1] + e[1:]) / 2, [e[-1] + 1]])
+        reps[1::2] = e
+    cover = (lo[None, :] <= reps[:, None]) & (hi[None, :] >= reps[:, None])
+    cover = np.vstack([cover, np.ones((1, len(lo)), bool)])
+    return _Axis(e, np.packbits(cover, axis=1, bitorder="little"))
+
+
+class _Partition(NamedTuple):
+    tariff_ids: np.ndarray
+    demand: _Axis
+    usage: _Axis
+    voltage: Dict[str, np.ndarray]  # category -> packed row (blank-voltage tariffs included)
+    voltage_other: np.ndarray       # row for a voltage no tariff names
+    phase: Dict[str, np.ndarray]
+    phase_other: np.ndarray
+    all_bits: np.ndarray
+
+
+def _categorical(values: List[str], wildcard: Tuple[str, ...]):
+    """Packed rows per category; wildcard tariffs match every category."""
+    values = np.asarray(values, dtype=object)
+    wild = np.isin(values, wildcard)
+    rows = {
+        v: np.packbits((values == v) | wild, bitorder="little")
+        for v in set(values.tolist()) - set(wildcard)
+    }
+    return rows, np.packbits(wild, bitorder="little")
+
+
+class ApplicabilityIndex:
+    """Eligibility of customers for tariffs by utility, sector, bounds, voltage and phase."""
+
+    def __init__(self, tariffs: Iterable[Dict]):
+        normalized = [normalize_tariff(t) for t in tariffs]
+        self.tariffs = np.empty(len(normalized), dtype=object)
+        self.tariffs[:] = normalized
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        for i, t in enumerate(self.tariffs):
+            key = (str(t.get("utility") or ""), str(t.get("sector") or ""))
+            groups.setdefault(key, []).append(i)
+
+        self._partitions: Dict[Tuple[str, str], _Partition] = {}
+        for key, ids in groups.items():
+            ts = [self.tariffs[i] for i in ids]
+
+            def col(field: str, default: float) -> np.ndarray:
+                return np.array([_bound(t.get(field), default) for t in ts])
+
+            voltage, voltage_other = _categorical(
+                [str(t.get("voltagecategory") or "") for t in ts], ("",)
+            )
+            phase, phase_other = _categorical(
+                [str(t.get("phasewiring") or "") for t in ts], ANY_PHASE
+            )
+            self._partitions[key] = _Partition(
+                tariff_ids=np.asarray(ids, dtype=np.int64),
+                demand=_build_axis(
+                    col("peakkwcapacitymin", -np.inf), col("peakkwcapacitymax", np.inf)
+                ),
+                usage=_build_axis(
+                    col("peakkwhusagemin", -np.inf), col("peakkwhusagemax", np.inf)
+                ),
+                voltage=voltage,
+                voltage_other=voltage_other,
+                phase=phase,
+                phase_other=phase_other,
+                all_bits=np.packbits(np.ones(len(ids), bool), bitorder="little"),
+            )
+
+    def __len__(self) -> int:
+        return len(self.tariffs)
+
+    def partitions(self) -> List[Tuple[str, str]]:
+        return sorted(self._partitions)
+
+    @staticmethod
+    def _category_rows(part_rows, other, all_bits, values: Optional[np.ndarray], n: int):
+        if values is None:
+            return np.broadcast_to(all_bits, (n, len(all_bits)))
+        out = np.empty((n, len(all_bits)), dtype=np.uint8)
+        for v in np.unique(values):
+            sel = values == v
+            out[sel] = all_bits if v == "" else part_rows.get(v, other)
+        return out
+
+    def eligible(
+        self,
+        utility,
+        sector,
+        peak_kw,
+        monthly_kwh=None,
+        voltage=None,
+        phase=None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Eligible (customer, tariff) pairs for a batch of customers.
+
+        Args are scalars or equal-length arrays (scalars broadcast).  NaN
+        demand / usage and blank voltage / phase mean "unknown" and do not
+        restrict eligibility.  Returns ``(customer_idx, tariff_idx)`` sorted
+        by customer; ``tariff_idx`` indexes ``self.tariffs``.
+        """
+        peak_kw = np.atleast_1d(np.asarray(peak_kw, dtype=float))
+        n = len(peak_kw)
+        usage = np.full(n, np.nan)
+        if monthly_kwh is not None:
+            usage = np.broadcast_to(np.asarray(monthly_kwh, dtype=float), (n,))
+        utility = np.broadcast_to(np.asarray(utility, dtype=object), (n,))
+        sector = np.broadcast_to(np.asarray(sector, dtype=object), (n,))
+        if voltage is not None:
+            voltage = np.broadcast_to(np.asarray(voltage, dtype=object), (n,))
+        if phase is not None:
+            phase = np.broadcast_to(np.asarray(phase, dtype=object), (n,))
+
+        # Group customers by partition with one sort over combined keys
+        keys = np.char.add(np.char.add(utility.astype(str), "\x1f"), sector.astype(str))
+        uniq, inverse = np.unique(keys, return_inverse=True)
+        by_group = np.argsort(inverse, kind="stable")
+        bounds = np.r_[0, np.cumsum(np.bincount(inverse, minlength=len(uniq)))]
+
+        cust_out: List[np.ndarray] = []
+        tariff_out: List[np.ndarray] = []
+        for g, key in enumerate(uniq):
+            part = self._partitions.get(tuple(str(key).split("\x1f", 1)))
+            if part is None:
+                continue
+            members = by_group[bounds[g]:bounds[g + 1]]
+            for start in range(0, len(members), CHUNK):
+                cust = members[start:start + CHUNK]
+                bits = part.demand.lookup(peak_kw[cust]) & part.usage.lookup(usage[cust])
+                bits &= self._category_rows(
+                    part.voltage, part.voltage_other, part.all_bits,
+                    None if voltage is None else voltage[cust], len(cust))
+                bits &= self._category_rows(
+                    part.phase, part.phase_other, part.all_bits,
+                    None if phase is None else phase[cust], len(cust))
+                mask = np.unpackbits(bits, axis=1, count=len(part.tariff_ids), bitorder="little")
+                ci, ti = np.nonzero(mask)
+                cust_out.append(cust[ci])
+                tariff_out.append(part.tariff_ids[ti])
+
+        if not cust_out:
+            return np.empty(0, np.int64), np.empty(0, np.int64)
+        cust_idx = np.concatenate(cust_out)
+        tariff_idx = np.concatenate(tariff_out)
+        order = np.argsort(cust_idx, kind="stable")
+        return cust_idx[order], tariff_idx[order]
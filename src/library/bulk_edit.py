@@ -0,0 +1,308 @@
+"""
+Batch schedule and rate edits across a tariff library.
+
+``TariffBatch`` stacks a library's schedules into (tariffs, 12, 24) arrays
+and its rate structures into (tariffs, periods, tiers) arrays, so each edit
+is one NumPy operation over every selected tariff.  Edits are written back
+into each tariff's own normalized dict: only the edited schedules, flat
+months and tier values change, so tiers, ``label``, dates and every other
+field come through as they were, and tariffs outside the selection are
+returned untouched.
+
+Usage:
+    python -m src.library.bulk_edit library.json -o updated.json \\
+        --utility "Pacific Gas & Electric Co" --scale-adj 1.05
+    python -m src.library.bulk_edit library.json -o updated.json \\
+        --shift-period 2:+1 --season 4-9:6 --remap 3:2
+    python -m src.library.bulk_edit library.json -o updated.json \\
+        --target flat --scale-rate 1.03
+"""
+
+import argparse
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from src.billing.determinants import tier_field
+from src.serialization import dump_library, load_library
+from src.utils import normalize_tariff
+
+SCHEDULE_FIELDS = {
+    "energy": ("energyweekdayschedule", "energyweekendschedule"),
+    "demand": ("demandweekdayschedule", "demandweekendschedule"),
+}
+STRUCTURE_FIELDS = {
+    "energy": "energyratestructure",
+    "demand": "demandratestructure",
+    "flat": "flatdemandstructure",
+}
+EDITABLE_TIER_FIELDS = ("rate", "adj")
+
+
+def _stack_structures(tariffs: List[Dict], field: str, tier_key: str) -> np.ndarray:
+    """(tariffs, periods, tiers) array of one tier field, NaN past each tariff's shape."""
+    blocks = [tier_field(t.get(field) or [], tier_key) for t in tariffs]
+    n_p = max([b.shape[0] for b in blocks] or [0])
+    n_t = max([b.shape[1] for b in blocks] or [0])
+    out = np.full((len(tariffs), n_p, n_t), np.nan)
+    for i, b in enumerate(blocks):
+        out[i, : b.shape[0], : b.shape[1]] = b
+    return out
+
+
+class TariffBatch:
+    """Column-stacked view of a tariff library for vectorized edits."""
+
+    def __init__(self, tariffs: Iterable[Dict]):
+        self.tariffs = [normalize_tariff(t) for t in tariffs]
+        n = len(self.tariffs)
+        self.touched = np.zeros(n, dtype=bool)
+
+        self.schedules: Dict[str, np.ndarray] = {}
+        for fields in SCHEDULE_FIELDS.values():
+            for field in fields:
+                arr = np.zeros((n, 12, 24), dtype=np.int16)
+                for i, t in enumerate(self.tariffs):
+                    if t.get(field):
+                        arr[i] = np.asarray(t[field], dtype=np.int16).reshape(12, 24)
+                self.schedules[field] = arr
+
+        self.flat_months = np.zeros((n, 12), dtype=np.int16)
+        for i, t in enumerate(self.tariffs):
+            if len(t.get("flatdemandmonths") or []) == 12:
+                self.flat_months[i] = t["flatdemandmonths"]
+
+        self.tiers: Dict[str, Dict[str, np.ndarray]] = {
+            kind: {
+                key: _stack_structures(self.tariffs, field, key)
+                for key in EDITABLE_TIER_FIELDS
+            }
+            for kind, field in STRUCTURE_FIELDS.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.tariffs)
+
+    # ── Selection ──────────────────────────────────────────────────────
+
+    def select(self, **criteria) -> np.ndarray:
+        """Boolean mask of tariffs whose fields equal every given value.
+
+        e.g. ``select(utility="Pacific Gas & Electric Co", sector="Commercial")``.
+        With no criteria every tariff is selected.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for key, value in criteria.items():
+            if value is not None:
+                mask &= np.array([t.get(key) == value for t in self.tariffs], dtype=bool)
+        return mask
+
+    def _mask(self, where: Optional[np.ndarray]) -> np.ndarray:
+        """Selection mask for an edit; the selected tariffs are marked as touched."""
+        mask = np.ones(len(self), dtype=bool) if where is None else np.asarray(where, bool)
+        self.touched |= mask
+        return mask
+
+    # ── Schedule edits ─────────────────────────────────────────────────
+
+    def shift_period(
+        self, kind: str, period: int, hours: int, where: Optional[np.ndarray] = None
+    ) -> None:
+        """Move every ``period`` cell ``hours`` later in the day (earlier if negative).
+
+        Cells the period vacates take the period that preceded them in the
+        direction of the move (e.g. a 4–9pm peak shifted +1 becomes 5–10pm
+        and 4pm takes the 3pm period).  Shifts stay within each day.
+        """
+        mask = self._mask(where)[:, None, None]
+        for field in SCHEDULE_FIELDS[kind]:
+            sched = self.schedules[field]
+            is_p = sched == period
+            hour = np.arange(24)
+            src = hour - hours
+            valid = (src >= 0) & (src < 24)
+            moved = np.zeros_like(is_p)
+            moved[..., valid] = is_p[..., src[valid]]
+
+            # Fill vacated cells from the nearest non-period hour behind them
+            fill_from = np.where(is_p, -1 if hours > 0 else 24, hour)
+            if hours > 0:
+                nearest = np.maximum.accumulate(fill_from, axis=-1)
+                fallback = np.minimum.accumulate(
+                    np.where(is_p, 24, hour)[..., ::-1], axis=-1
+                )[..., ::-1]
+                nearest = np.where(nearest < 0, fallback, nearest)
+            else:
+                nearest = np.minimum.accumulate(fill_from[..., ::-1], axis=-1)[..., ::-1]
+                fallback = np.maximum.accumulate(np.where(is_p, -1, hour), axis=-1)
+                nearest = np.where(nearest > 23, fallback, nearest)
+            # Rows that are entirely this period have nothing to fill from
+            nearest = np.clip(nearest, 0, 23)
+            filler = np.take_along_axis(sched, nearest, axis=-1)
+
+            out = np.where(moved, period, np.where(is_p, filler, sched))
+            self.schedules[field] = np.where(mask, out, sched).astype(np.int16)
+
+    def set_season(
+        self, months: Sequence[int], like_month: int, where: Optional[np.ndarray] = None
+    ) -> None:
+        """Give ``months`` (0-11) the schedules and flat-demand season of ``like_month``."""
+        mask = self._mask(where)
+        months = np.asarray(months, dtype=np.int64)
+        rows = np.ix_(mask, months)
+        for sched in self.schedules.values():
+            sched[rows] = sched[mask, like_month][:, None, :]
+        self.flat_months[rows] = self.flat_months[mask, like_month][:, None]
+
+    def remap_periods(
+        self, kind: str, mapping: Dict[int, int], where: Optional[np.ndarray] = None
+    ) -> None:
+        """Replace schedule period indices via ``{old: new}``; others are unchanged."""
+        mask = self._mask(where)[:, None, None]
+        fields = SCHEDULE_FIELDS[kind]
+        size = max([*mapping, *(int(self.schedules[f].max(initial=0)) for f in fields)]) + 1
+        lut = np.arange(size, dtype=np.int16)
+        for old, new in mapping.items():
+            lut[old] = new
+        for field in fields:
+            sched = self.schedules[field]
+            self.schedules[field] = np.where(mask, lut[sched], sched)
+
+    # ── Rate edits ─────────────────────────────────────────────────────
+
+    def scale(
+        self,
+        kind: str,
+        field: str,
+        factor: float,
+        where: Optional[np.ndarray] = None,
+        periods: Optional[Sequence[int]] = None,
+    ) -> None:
+        """Multiply a tier field (``"rate"`` or ``"adj"``) by ``factor``."""
+        self._edit_tiers(kind, field, where, periods, lambda a: a * factor)
+
+    def shift(
+        self,
+        kind: str,
+        field: str,
+        delta: float,
+        where: Optional[np.ndarray] = None,
+        periods: Optional[Sequence[int]] = None,
+    ) -> None:
+        """Add ``delta`` to a tier field (``"rate"`` or ``"adj"``)."""
+        self._edit_tiers(kind, field, where, periods, lambda a: a + delta)
+
+    def _edit_tiers(self, kind, field, where, periods, op) -> None:
+        arr = self.tiers[kind][field]
+        sel = np.zeros(arr.shape, dtype=bool)
+        sel[self._mask(where)] = True
+        if periods is not None:
+            keep = np.zeros(arr.shape[1], dtype=bool)
+            keep[[p for p in periods if p < arr.shape[1]]] = True
+            sel &= keep[None, :, None]
+        self.tiers[kind][field] = np.where(sel, op(arr), arr)
+
+    # ── Write-back ─────────────────────────────────────────────────────
+
+    def edited_tariffs(self) -> List[Dict]:
+        """Normalized tariffs with the batch arrays written back.
+
+        Tariffs no edit selected are returned as they were loaded.
+        """
+        out = []
+        for i, src in enumerate(self.tariffs):
+            if not self.touched[i]:
+                out.append(src)
+                continue
+            t = dict(src)
+            for field, sched in self.schedules.items():
+                if src.get(field):
+                    t[field] = sched[i].tolist()
+            if len(src.get("flatdemandmonths") or []) == 12:
+                t["flatdemandmonths"] = self.flat_months[i].tolist()
+            for kind, field in STRUCTURE_FIELDS.items():
+                if src.get(field):
+                    t[field] = self._structure(i, kind, src[field])
+            out.append(t)
+        return out
+
+    def _structure(self, i: int, kind: str, structure: List) -> List:
+        """Copy of ``structure`` with edited tier fields from row ``i``."""
+        out = []
+        for pi, tiers in enumerate(structure):
+            if not isinstance(tiers, list):
+                out.append(tiers)
+                continue
+            new_tiers = []
+            for ti, tier in enumerate(tiers):
+                tier = dict(tier) if isinstance(tier, dict) else tier
+                if isinstance(tier, dict):
+                    for key in EDITABLE_TIER_FIELDS:
+                        value = float(self.tiers[kind][key][i, pi, ti])
+                        # Unedited values keep their imported form (int, string, absent)
+                        if value != float(tier.get(key, 0) or 0):
+                            tier[key] = round(value, 10)
+                new_tiers.append(tier)
+            out.append(new_tiers)
+        return out
+
+    def to_library(self) -> List[Dict]:
+        """Edited library, ready for ``dump_library``."""
+        return self.edited_tariffs()
+
+
+def _parse_months(text: str) -> List[int]:
+    """``"4-9"`` or ``"0,1,11"`` -> 0-based month indices."""
+    months: List[int] = []
+    for part in text.split(","):
+        lo, _, hi = part.partition("-")
+        months.extend(range(int(lo), int(hi or lo) + 1))
+    return months
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().splitlines()[0],
+        epilog="Edits run in this order: remap, season, shift, then rate edits.",
+    )
+    parser.add_argument("library", help="Input library JSON (list or {items: [...]})")
+    parser.add_argument("-o", "--output", required=True, help="Output library JSON")
+    parser.add_argument("--utility", help="Only edit tariffs from this utility")
+    parser.add_argument("--sector", help="Only edit tariffs in this sector")
+    parser.add_argument("--target", choices=sorted(STRUCTURE_FIELDS), default="energy",
+                        help="Schedules / rates the edits apply to (flat has rates only)")
+    parser.add_argument("--remap", action="append", default=[], metavar="OLD:NEW",
+                        help="Reassign schedule period OLD to NEW (repeatable)")
+    parser.add_argument("--season", action="append", default=[], metavar="MONTHS:LIKE",
+                        help="Give months (0-11, e.g. 4-9) the schedules of month LIKE")
+    parser.add_argument("--shift-period", action="append", default=[], metavar="P:HOURS",
+                        help="Move period P by HOURS (e.g. 2:+1)")
+    parser.add_argument("--scale-adj", type=float, help="Multiply adj by this factor")
+    parser.add_argument("--scale-rate", type=float, help="Multiply rate by this factor")
+    args = parser.parse_args(argv)
+    if args.target not in SCHEDULE_FIELDS and (args.remap or args.shift_period):
+        parser.error(f"--target {args.target} has no schedules to remap or shift")
+
+    batch = TariffBatch(load_library(args.library))
+    where = batch.select(utility=args.utility, sector=args.sector)
+
+    if args.remap:
+        mapping = dict(tuple(int(x) for x in m.split(":")) for m in args.remap)
+        batch.remap_periods(args.target, mapping, where)
+    for spec in args.season:
+        months, like = spec.split(":")
+        batch.set_season(_parse_months(months), int(like), where)
+    for spec in args.shift_period:
+        period, hours = spec.split(":")
+        batch.shift_period(args.target, int(period), int(hours), where)
+    if args.scale_adj is not None:
+        batch.scale(args.target, "adj", args.scale_adj, where)
+    if args.scale_rate is not None:
+        batch.scale(args.target, "rate", args.scale_rate, where)
+
+    dump_library(batch.to_library(), args.output)
+    print(f"Edited {int(where.sum())} of {len(batch)} tariffs -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Offset index over the items of an uploaded tariff file.
+
+A URDB export can hold thousands of tariffs in its ``items`` array.  The file
+is parsed once; each item is re-encoded as compact JSON into one shared
+buffer, with its byte offset and a small summary (utility, name, sector,
+start date) kept alongside.  Opening an item decodes only its own slice, so
+paging through a large file never holds every tariff as Python dicts.
+
+    index = ItemIndex(open("usurdb.json", "rb").read())
+    hits = index.search("pacific b-19")
+    import_tariff_data(index.item(hits[0]))
+"""
+
+from datetime import datetime, timezone
+from itertools import accumulate
+from typing import Dict, List, NamedTuple, Optional, Union
+
+from src.serialization import dumps, loads
+from src.utils import normalize_tariff
+
+
+class ItemSummary(NamedTuple):
+    utility: str
+    name: str
+    sector: str
+    startdate: Optional[int]  # epoch seconds
+    label: str
+
+
+def _summary(tariff: Dict) -> ItemSummary:
+    t = normalize_tariff(tariff)
+    start = t.get("startdate")
+    return ItemSummary(
+        utility=str(t.get("utility") or ""),
+        name=str(t.get("name") or ""),
+        sector=str(t.get("sector") or ""),
+        startdate=int(start) if isinstance(start, (int, float)) else None,
+        label=str(t.get("label") or ""),
+    )
+
+
+def _items(raw) -> List:
+    """The tariffs of a decoded file: an ``items`` array, a bare list or one tariff."""
+    if isinstance(raw, dict) and isinstance(raw.get("items"), list):
+        return raw["items"]
+    if isinstance(raw, list):
+        return raw
+    return [raw]
+
+
+class ItemIndex:
+    """Tariffs of one file as a compact JSON buffer indexed by item offset."""
+
+    def __init__(self, data: Union[str, bytes]):
+        items = [t for t in _items(loads(data)) if isinstance(t, dict)]
+        if not items:
+            raise ValueError("No tariffs found in file.")
+        chunks = [dumps(t).encode("utf-8") for t in items]
+        self._buffer = b"".join(chunks)
+        self._offsets = list(accumulate((len(c) for c in chunks), initial=0))
+        self.summaries = [_summary(t) for t in items]
+        self._search_text = [
+            f"{s.utility} {s.name} {s.sector} {s.label}".lower() for s in self.summaries
+        ]
+
+    def __len__(self) -> int:
+        return len(self.summaries)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._buffer)
+
+    def item(self, i: int) -> Dict:
+        """Decode item ``i`` from its slice of the buffer."""
+        return loads(self._buffer[self._offsets[i]:self._offsets[i + 1]])
+
+    def search(self, query: str = "") -> List[int]:
+        """Indices of items whose utility, name, sector or label contain every word of ``query``."""
+        words = query.lower().split()
+        if not words:
+            return list(range(len(self)))
+        return [
+            i for i, text in enumerate(self._search_text)
+            if all(w in text for w in words)
+        ]
+
+    def describe(self, i: int) -> str:
+        """One-line summary of item ``i`` for pickers."""
+        s = self.summaries[i]
+        parts = [s.sector]
+        if s.startdate is not None:
+            try:
+                parts.append(datetime.fromtimestamp(s.startdate, tz=timezone.utc).date().isoformat())
+            except (OverflowError, OSError, ValueError):
+                pass
+        detail = ", ".join(p for p in parts if p)
+        title = f"{s.utility} — {s.name}" if s.utility else s.name or f"Item {i}"
+        return f"{title} ({detail})" if detail else title
@@ -0,0 +1,147 @@
+"""
+Effective-date index over tariff versions.
+
+Versions are grouped into series by (utility, rate name).  Within a series
+each version is in effect from its ``startdate`` until the earliest of its
+``enddate``, the start of the version that ``supersedes`` it, and the start
+of the next version in the series — so the intervals are disjoint and
+sorted, and every lookup is a binary search.
+
+    index = TemporalIndex(load_library("library.json"))
+    index.in_effect("Pacific Gas & Electric Co", "B-19", date(2023, 7, 1))
+    index.overlapping("Pacific Gas & Electric Co", "B-19", date(2021, 1, 1), date(2024, 1, 1))
+    index.version_at(key, hourly_epoch_seconds)  # vectorized, one version per hour
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from src.utils import date_to_epoch, normalize_tariff
+
+# Open-ended versions run until this epoch second (year 9999)
+OPEN_END = 253402300799
+
+When = Union[int, float, date, datetime]
+SeriesKey = Tuple[str, str]
+
+
+class Version(NamedTuple):
+    start: int  # epoch seconds, inclusive
+    end: int    # epoch seconds, exclusive
+    tariff: Dict
+
+
+def epoch(when: When) -> int:
+    """Epoch seconds for a timestamp, datetime or date.
+
+    Dates are UTC midnight, the convention ``date_to_epoch`` uses on export.
+    """
+    if isinstance(when, datetime):
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return int(when.timestamp())
+    if isinstance(when, date):
+        return date_to_epoch(when)
+    return int(when)
+
+
+def series_key(tariff: Dict) -> SeriesKey:
+    """Versions of the same rate share utility and rate name."""
+    return (str(tariff.get("utility") or "").strip(), str(tariff.get("name") or "").strip())
+
+
+class TemporalIndex:
+    """Sorted, disjoint effective-date intervals per tariff series."""
+
+    def __init__(self, tariffs: Iterable[Dict]):
+        by_series: Dict[SeriesKey, List[Dict]] = defaultdict(list)
+        for raw in tariffs:
+            t = normalize_tariff(raw)
+            if isinstance(t.get("startdate"), (int, float)):
+                by_series[series_key(t)].append(t)
+
+        # A version ends no later than the start of the version superseding it
+        superseded_at: Dict[str, int] = {}
+        for versions in by_series.values():
+            for t in versions:
+                prev = t.get("supersedes") or t.get("supercedes")
+                if prev:
+                    start = int(t["startdate"])
+                    superseded_at[prev] = min(start, superseded_at.get(prev, OPEN_END))
+
+        self._starts: Dict[SeriesKey, List[int]] = {}
+        self._ends: Dict[SeriesKey, List[int]] = {}
+        self._versions: Dict[SeriesKey, List[Version]] = {}
+        for key, versions in by_series.items():
+            versions.sort(key=lambda t: int(t["startdate"]))
+            built: List[Version] = []
+            for i, t in enumerate(versions):
+                start = int(t["startdate"])
+                end = OPEN_END
+                if isinstance(t.get("enddate"), (int, float)):
+                    end = int(t["enddate"])
+                if t.get("label") in superseded_at:
+                    end = min(end, superseded_at[t["label"]])
+                if i + 1 < len(versions):
+                    end = min(end, int(versions[i + 1]["startdate"]))
+                if end > start:
+                    built.append(Version(start, end, t))
+            self._versions[key] = built
+            self._starts[key] = [v.start for v in built]
+            self._ends[key] = [v.end for v in built]
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._versions.values())
+
+    def series(self) -> List[SeriesKey]:
+        return sorted(self._versions)
+
+    def versions(self, utility: str, name: str) -> List[Version]:
+        """All versions of a series in start order."""
+        return list(self._versions.get((utility, name), []))
+
+    def in_effect(self, utility: str, name: str, when: When) -> Optional[Dict]:
+        """The version in effect at ``when``, or None (O(log n))."""
+        key = (utility, name)
+        starts = self._starts.get(key)
+        if not starts:
+            return None
+        t = epoch(when)
+        i = bisect_right(starts, t) - 1
+        if i >= 0 and t < self._ends[key][i]:
+            return self._versions[key][i].tariff
+        return None
+
+    def overlapping(self, utility: str, name: str, start: When, end: When) -> List[Dict]:
+        """Versions in effect at any time in ``[start, end)`` (O(log n + k))."""
+        key = (utility, name)
+        starts = self._starts.get(key)
+        if not starts:
+            return []
+        lo_t, hi_t = epoch(start), epoch(end)
+        lo = max(bisect_right(starts, lo_t) - 1, 0)
+        if self._ends[key][lo] <= lo_t:
+            lo += 1
+        hi = bisect_left(starts, hi_t)
+        return [v.tariff for v in self._versions[key][lo:hi]]
+
+    def version_at(self, utility: str, name: str, times: np.ndarray) -> np.ndarray:
+        """Index into ``versions()`` in effect at each epoch second; -1 where none.
+
+        One ``searchsorted`` over the whole array, so a multi-year hourly
+        profile resolves its tariff switches in a single call.
+        """
+        key = (utility, name)
+        times = np.asarray(times, dtype=np.int64)
+        starts = np.asarray(self._starts.get(key, []), dtype=np.int64)
+        if not len(starts):
+            return np.full(times.shape, -1, dtype=np.int64)
+        ends = np.asarray(self._ends[key], dtype=np.int64)
+        idx = np.searchsorted(starts, times, side="right") - 1
+        valid = idx >= 0
+        valid[valid] = times[valid] < ends[idx[valid]]
+        return np.where(valid, idx, -1)
@@ -0,0 +1,273 @@
+"""
+Async bulk fetcher for the OpenEI Utility Rate Database (URDB) API.
+
+Queries (by utility name, EIA ID and/or sector) are paged concurrently through
+a pooled ``httpx.AsyncClient`` with bounded concurrency and a token-bucket rate
+limit.  Every page is stored in a content-addressed disk cache, so an
+interrupted download resumes from the first page that was not yet fetched.
+
+Requires the optional ``httpx`` package (``pip install httpx``).
+
+Usage:
+    python -m src.library.urdb_api --eiaid 14328 --sector Commercial \\
+        --cache-dir .urdb_cache --out pge_commercial.json
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import time
+from typing import Dict, List, Optional, Sequence
+
+from src.serialization import content_hash, dump_library, loads
+from src.utils import normalize_tariff
+
+URDB_BASE_URL = "https://api.openei.org"
+URDB_PATH = "/utility_rates"
+PAGE_LIMIT = 500
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def build_query(
+    utility: Optional[str] = None,
+    eiaid: Optional[int] = None,
+    sector: Optional[str] = None,
+    **extra,
+) -> Dict:
+    """URDB query parameters (without paging or the API key)."""
+    params: Dict = {"version": "latest", "format": "json", "detail": "full"}
+    if utility:
+        params["ratesforutility"] = utility
+    if eiaid is not None:
+        params["eia"] = int(eiaid)
+    if sector:
+        params["sector"] = sector
+    params.update(extra)
+    return params
+
+
+class RateLimiter:
+    """Token bucket allowing ``rate`` requests per second (bursts up to ``burst``)."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class PageCache:
+    """Content-addressed store of API pages.
+
+    ``objects/<sha[:2]>/<sha>.json`` holds each distinct response body once;
+    ``index/<request hash>`` points a request (query + offset) at its body.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(root, "index"), exist_ok=True)
+
+    @staticmethod
+    def request_key(params: Dict) -> str:
+        return content_hash({k: v for k, v in params.items() if k != "api_key"})
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.json")
+
+    def get(self, params: Dict) -> Optional[bytes]:
+        try:
+            with open(os.path.join(self.root, "index", self.request_key(params))) as fh:
+                digest = fh.read().strip()
+            with open(self._object_path(digest), "rb") as fh:
+                return fh.read()
+        except OSError:
+            return None
+
+    def put(self, params: Dict, body: bytes) -> str:
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _atomic_write(path, body)
+        _atomic_write(
+            os.path.join(self.root, "index", self.request_key(params)),
+            digest.encode("ascii"),
+        )
+        return digest
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+
+
+class UrdbFetcher:
+    """Concurrent, rate-limited, cached URDB downloader.
+
+    Args:
+        api_key:         OpenEI API key (defaults to ``$OPENEI_API_KEY``).
+        cache_dir:       Directory for the page cache; None disables caching.
+        concurrency:     Maximum in-flight requests (also the connection pool size).
+        rate:            Requests per second across all queries.
+        base_url:        API root — point this at a local mock server in tests.
+        page_limit:      Items requested per page.
+        max_retries:     Retries for 429/5xx responses and transport errors.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+        concurrency: int = 4,
+        rate: float = 2.0,
+        base_url: str = URDB_BASE_URL,
+        page_limit: int = PAGE_LIMIT,
+        max_retries: int = 4,
+    ):
+        self.api_key = api_key or os.environ.get("OPENEI_API_KEY", "")
+        self.cache = PageCache(cache_dir) if cache_dir else None
+        self.concurrency = concurrency
+        self.base_url = base_url
+        self.page_limit = page_limit
+        self.max_retries = max_retries
+        self.rate = rate
+        self._limiter: Optional[RateLimiter] = None
+        self._sem: Optional[asyncio.Semaphore] = None
+        self.requests_made = 0
+
+    async def _get_page(self, client, params: Dict) -> List[Dict]:
+        if self.cache:
+            body = self.cache.get(params)
+            if body is not None:
+                return loads(body).get("items", [])
+
+        import httpx
+
+        for attempt in range(self.max_retries + 1):
+            await self._limiter.acquire()
+            async with self._sem:
+                try:
+                    resp = await client.get(URDB_PATH, params={**params, "api_key": self.api_key})
+                    self.requests_made += 1
+                except httpx.TransportError:
+                    if attempt == self.max_retries:
+                        raise
+                    await asyncio.sleep(2 ** attempt)
+                    continue
+            if resp.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                retry_after = resp.headers.get("Retry-After", "")
+                delay = float(retry_after) if retry_after.isdigit() else 2 ** attempt
+                await asyncio.sleep(delay)
+                continue
+            resp.raise_for_status()
+            body = resp.content
+            data = loads(body)
+            if "error" in data:
+                raise RuntimeError(f"URDB API error: {data['error']}")
+            if self.cache:
+                self.cache.put(params, body)
+            return data.get("items", [])
+        return []
+
+    async def _fetch_query(self, client, query: Dict) -> List[Dict]:
+        items: List[Dict] = []
+        offset = 0
+        while True:
+            page = await self._get_page(
+                client, {**query, "limit": self.page_limit, "offset": offset}
+            )
+            items.extend(page)
+            if len(page) < self.page_limit:
+                return items
+            offset += self.page_limit
+
+    async def fetch(self, queries: Sequence[Dict]) -> List[Dict]:
+        """Fetch every query and return normalized, de-duplicated tariffs.
+
+        Tariffs are de-duplicated by URDB ``label`` when present.
+        """
+        try:
+            import httpx
+        except ImportError as e:
+            raise ImportError("The URDB fetcher requires httpx: pip install httpx") from e
+
+        self._sem = asyncio.Semaphore(self.concurrency)
+        self._limiter = RateLimiter(self.rate, burst=self.concurrency)
+        limits = httpx.Limits(
+            max_connections=self.concurrency,
+            max_keepalive_connections=self.concurrency,
+        )
+        async with httpx.AsyncClient(
+            base_url=self.base_url, limits=limits, timeout=60.0
+        ) as client:
+            pages = await asyncio.gather(*(self._fetch_query(client, q) for q in queries))
+
+        seen = set()
+        tariffs: List[Dict] = []
+        for items in pages:
+            for item in items:
+                label = item.get("label")
+                if label is not None:
+                    if label in seen:
+                        continue
+                    seen.add(label)
+                tariffs.append(normalize_tariff(item))
+        return tariffs
+
+
+def fetch_tariffs(queries: Sequence[Dict], **kwargs) -> List[Dict]:
+    """Synchronous wrapper around ``UrdbFetcher.fetch``.
+
+    The returned tariffs can be passed straight to ``import_tariff_data``.
+    """
+    return asyncio.run(UrdbFetcher(**kwargs).fetch(queries))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Bulk-download tariffs from the URDB API.")
+    parser.add_argument("--utility", action="append", default=[], help="Utility name (repeatable)")
+    parser.add_argument("--eiaid", action="append", type=int, default=[], help="EIA ID (repeatable)")
+    parser.add_argument("--sector", help="Sector filter, e.g. Commercial")
+    parser.add_argument("--api-key", help="OpenEI API key (default: $OPENEI_API_KEY)")
+    parser.add_argument("--cache-dir", default=".urdb_cache")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=2.0, help="Requests per second")
+    parser.add_argument("--base-url", default=URDB_BASE_URL)
+    parser.add_argument("--out", required=True, help="Output JSON file ({\"items\": [...]})")
+    args = parser.parse_args(argv)
+
+    queries = [build_query(utility=u, sector=args.sector) for u in args.utility]
+    queries += [build_query(eiaid=e, sector=args.sector) for e in args.eiaid]
+    if not queries:
+        queries = [build_query(sector=args.sector)]
+
+    tariffs = fetch_tariffs(
+        queries,
+        api_key=args.api_key,
+        cache_dir=args.cache_dir,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        base_url=args.base_url,
+    )
+    dump_library(tariffs, args.out)
+    print(f"Wrote {len(tariffs)} tariffs to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
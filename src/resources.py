@@ -0,0 +1,140 @@
+"""
+Process-wide shared resources and per-session memory accounting.
+
+Reference data that is identical for every session — price-vector and
+determinant caches, sample-profile aggregates, calendar arrays, the item index
+of an uploaded tariff file — is created once per process through
+``st.cache_resource`` and shared by reference.
+Session state keeps only each user's edits; ``session_memory_report`` measures
+it and ``enforce_session_budget`` trims undo history when a session grows past
+``SESSION_MEMORY_BUDGET``.
+
+The billing engine (and NumPy) is imported on first use of a shared cache, so
+loading this module stays cheap at app start-up.
+"""
+
+import sys
+from collections import deque
+from typing import TYPE_CHECKING, Dict, Optional, Set
+
+import streamlit as st
+
+from src.constants import SESSION_MEMORY_BUDGET, ZERO_SCHEDULE
+from src.history import EditHistory
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from src.billing.determinants import DeterminantCache, ScheduleAggregates
+    from src.billing.price_vectors import PriceVectorCache
+    from src.library.item_index import ItemIndex
+
+
+@st.cache_resource
+def shared_price_vector_cache() -> "PriceVectorCache":
+    """One price-vector cache per process."""
+    from src.billing.price_vectors import PriceVectorCache
+
+    return PriceVectorCache(maxsize=1024)
+
+
+@st.cache_resource
+def shared_determinant_cache() -> "DeterminantCache":
+    """One determinant / aggregate cache per process."""
+    from src.billing.determinants import DeterminantCache
+
+    return DeterminantCache(maxsize=256)
+
+
+@st.cache_resource(max_entries=64)
+def shared_archetype_profile(name: str, year: int) -> "np.ndarray":
+    """Read-only archetype profile, generated once per (name, year)."""
+    from src.billing.profiles import archetype_profile
+
+    loads = archetype_profile(name, year)
+    loads.flags.writeable = False
+    return loads
+
+
+@st.cache_resource(max_entries=8)
+def shared_item_index(digest: str, _upload) -> "ItemIndex":
+    """Offset index of an uploaded tariff file, parsed once per content hash.
+
+    ``_upload`` (anything with ``getvalue()``) is read only on a cache miss.
+    """
+    from src.library.item_index import ItemIndex
+
+    return ItemIndex(_upload.getvalue())
+
+
+def profile_aggregates(
+    profile: str, year: int, upload: Optional["np.ndarray"] = None,
+    upload_key: Optional[str] = None, demand_window: Optional[float] = None,
+    daily: bool = False,
+) -> "ScheduleAggregates":
+    """Schedule-lattice aggregates for an archetype or uploaded profile (shared).
+
+    ``demand_window`` only matters for sub-hourly uploads; ``daily`` adds the
+    per-day peaks needed by daily demand units.
+    """
+    cache = shared_determinant_cache()
+    if upload is not None:
+        return cache.aggregates(
+            upload, year, load_key=upload_key, demand_window=demand_window, daily=daily
+        )
+    return cache.aggregates(
+        shared_archetype_profile(profile, year), year, load_key=f"archetype:{profile}",
+        daily=daily,
+    )
+
+
+def _shared_ids() -> Set[int]:
+    """Objects shared by every session; not charged to any one of them."""
+    ids = {id(ZERO_SCHEDULE)}
+    ids.update(id(row) for row in ZERO_SCHEDULE)
+    return ids
+
+
+def deep_sizeof(obj, seen: Optional[Set[int]] = None) -> int:
+    """Approximate bytes reachable from ``obj`` (shared objects excluded)."""
+    if seen is None:
+        seen = _shared_ids()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    nbytes = getattr(obj, "nbytes", None)
+    if isinstance(nbytes, int):  # NumPy arrays: count the buffer, not the elements
+        base = getattr(obj, "base", None)
+        shared_buffer = base is not None and id(base) in seen
+        return sys.getsizeof(obj) + (0 if shared_buffer else nbytes)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(deep_sizeof(v, seen) for v in obj)
+    elif isinstance(obj, EditHistory) or hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), seen)
+    return size
+
+
+def session_memory_report(state=None) -> Dict[str, int]:
+    """Bytes held by each session-state key, largest first."""
+    state = st.session_state if state is None else state
+    seen = _shared_ids()
+    report = {str(k): deep_sizeof(state[k], seen) for k in list(state.keys())}
+    return dict(sorted(report.items(), key=lambda kv: kv[1], reverse=True))
+
+
+def enforce_session_budget(budget: int = SESSION_MEMORY_BUDGET) -> int:
+    """Trim undo histories until the session fits ``budget``; returns bytes used."""
+    used = sum(session_memory_report().values())
+    if used <= budget:
+        return used
+    histories = [
+        v for k, v in st.session_state.items()
+        if isinstance(v, EditHistory)
+    ]
+    for hist in histories:
+        hist.trim(len(hist) // 4)
+    return sum(session_memory_report().values())
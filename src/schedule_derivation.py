@@ -0,0 +1,90 @@
+"""
+Derive energy TOU periods and schedules from uploaded hourly data.
+
+The clustering lives in ``src.billing.tou_design``; this module is the
+Energy Rates tab UI around it and writes the result into session state.
+"""
+
+import streamlit as st
+
+from src.utils import compact_schedule
+
+SERIES_PRICE = "Marginal price ($/kWh)"
+SERIES_LOAD = "Load (kW or kWh)"
+METHOD_LABELS = {"optimal": "Optimal 1-D partition", "kmeans": "k-means"}
+
+
+def apply_derived_schedule(derived, use_means_as_rates: bool) -> None:
+    """Replace energy periods and both energy grids with a derived schedule.
+
+    When the series was a price, each period's rate is its hour-weighted mean
+    price; otherwise existing rates are kept by index (new periods get 0).
+    """
+    from src.billing.tou_design import period_labels
+
+    ss = st.session_state
+    old = ss.energy_periods
+    labels = period_labels(len(derived.means))
+    ss.energy_periods = [
+        {
+            "label": label,
+            "rate": round(mean, 5) if use_means_as_rates
+            else (old[i]["rate"] if i < len(old) else 0.0),
+            "adj": 0.0 if use_means_as_rates
+            else (old[i]["adj"] if i < len(old) else 0.0),
+        }
+        for i, (label, mean) in enumerate(zip(labels, derived.means))
+    ]
+    ss.energy_weekday_sched = compact_schedule(derived.weekday)
+    ss.energy_weekend_sched = compact_schedule(derived.weekend)
+
+    # New version re-initializes the grids (and their paint history) and the
+    # period editor widgets; the period undo history no longer applies
+    ss.sched_version = ss.get("sched_version", 0) + 1
+    ss.pop("energy_history", None)
+
+
+def render_schedule_derivation() -> None:
+    """Expander that clusters an hourly CSV into K periods and fills the grids."""
+    with st.expander("Derive Schedule from Hourly Data"):
+        st.caption(
+            "Upload one year of hourly marginal prices or system load. Hours "
+            "are averaged by month, weekday/weekend and hour of day, and the "
+            "576 averages are grouped into periods. Current energy periods "
+            "and both energy schedules are replaced."
+        )
+        data = st.file_uploader(
+            "Hourly CSV",
+            type=["csv"],
+            key="derive_upload",
+            help="One row per hour of the effective-date year; the last column is read.",
+        )
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            series_type = st.radio("Series", [SERIES_PRICE, SERIES_LOAD], key="derive_series")
+        with c2:
+            k = st.number_input(
+                "Number of Periods", min_value=1, max_value=12, value=3, key="derive_k",
+            )
+        with c3:
+            method = st.selectbox(
+                "Method",
+                options=list(METHOD_LABELS),
+                format_func=METHOD_LABELS.get,
+                key="derive_method",
+                help="The optimal partition is exact; k-means can merge periods "
+                     "and return fewer than requested.",
+            )
+
+        if st.button("Derive Schedule", disabled=data is None, type="primary"):
+            from src.billing.profiles import parse_load_csv
+            from src.billing.tou_design import derive_tou
+
+            year = st.session_state.basic_startdate.year
+            try:
+                derived = derive_tou(parse_load_csv(data.getvalue()), year, int(k), method)
+            except ValueError as e:
+                st.error(str(e))
+                return
+            apply_derived_schedule(derived, use_means_as_rates=series_type == SERIES_PRICE)
+            st.rerun()
@@ -0,0 +1,140 @@
+"""
+Canonical tariff serialization, content hashing, and the JSON codec.
+
+``canonicalize`` gives every tariff a single byte representation: sorted keys,
+floats rounded to 12 significant digits (integral values written as ints, -0
+folded to 0) and compact separators.  ``content_hash`` is the SHA-256 of those
+bytes and is the key used for caching, de-duplication and change detection.
+
+``dumps``/``loads`` use ``orjson`` when it is installed and fall back to the
+stdlib ``json`` module.  Hashing always goes through the stdlib encoder so a
+hash never depends on which backend happens to be installed.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List, Union
+
+from src.utils import normalize_tariff
+
+try:
+    import orjson
+except ImportError:  # optional fast path
+    orjson = None
+
+FLOAT_DIGITS = 12
+
+
+def _canonical_float(x: float) -> Union[int, float]:
+    if x != x or x in (float("inf"), float("-inf")):
+        return x
+    x = float(f"{x:.{FLOAT_DIGITS}g}")
+    if x.is_integer() and abs(x) < 2 ** 53:
+        return int(x)
+    return x
+
+
+def canonicalize(obj: Any) -> Any:
+    """Recursively sort dict keys and normalize floats."""
+    if isinstance(obj, dict):
+        return {str(k): canonicalize(obj[k]) for k in sorted(obj, key=str)}
+    if isinstance(obj, (list, tuple)):
+        if all(type(v) is int for v in obj):  # schedule rows: nothing to normalize
+            return list(obj)
+        return [canonicalize(v) for v in obj]
+    if isinstance(obj, float):
+        return _canonical_float(obj)
+    return obj
+
+
+def canonical_tariff(tariff: Dict) -> Dict:
+    """Normalize field names (``normalize_tariff``) and canonicalize a tariff."""
+    return canonicalize(normalize_tariff(tariff))
+
+
+def canonical_bytes(obj: Any) -> bytes:
+    """Stable compact encoding of an already-canonical object."""
+    return json.dumps(
+        obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    ).encode("utf-8")
+
+
+def content_hash(obj: Any) -> str:
+    """SHA-256 hex digest of ``obj``'s canonical encoding."""
+    return hashlib.sha256(canonical_bytes(canonicalize(obj))).hexdigest()
+
+
+def tariff_hash(tariff: Dict) -> str:
+    """Content hash of a tariff, independent of source format and key order."""
+    return content_hash(normalize_tariff(tariff))
+
+
+def _is_int_array(obj: Any) -> bool:
+    return isinstance(obj, (list, tuple)) and all(
+        isinstance(v, int) and not isinstance(v, bool) for v in obj
+    )
+
+
+def _pretty(obj: Any, indent: int = 0) -> str:
+    """Two-space indented JSON with integer arrays (schedule rows) on one line."""
+    if hasattr(obj, "tolist"):  # NumPy arrays and scalars
+        obj = obj.tolist()
+    if _is_int_array(obj):
+        return json.dumps(list(obj), separators=(",", ":"))
+    pad, inner = " " * indent, " " * (indent + 2)
+    if isinstance(obj, dict) and obj:
+        fields = (
+            f"{inner}{json.dumps(str(k), ensure_ascii=False)}: {_pretty(v, indent + 2)}"
+            for k, v in obj.items()
+        )
+        return "{\n" + ",\n".join(fields) + f"\n{pad}}}"
+    if isinstance(obj, (list, tuple)) and obj:
+        values = (f"{inner}{_pretty(v, indent + 2)}" for v in obj)
+        return "[\n" + ",\n".join(values) + f"\n{pad}]"
+    return json.dumps(obj, ensure_ascii=False, default=str)
+
+
+def dumps(obj: Any, pretty: bool = False) -> str:
+    """Encode to JSON text.
+
+    ``pretty`` indents by two spaces but keeps integer arrays (schedule rows)
+    on one line, which is a fraction of the size of ``json.dumps(indent=2)``.
+    Arrays are compacted while encoding, so string values are never touched.
+    """
+    if pretty:
+        return _pretty(obj)
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            ).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(obj, separators=(",", ":"), default=str)
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Decode JSON text or bytes (a UTF-8 byte-order mark is ignored)."""
+    if isinstance(data, bytes) and data.startswith(b"\xef\xbb\xbf"):
+        data = data[3:]
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dump_library(tariffs: List[Dict], path: str) -> None:
+    """Write tariffs as a canonical ``{"items": [...]}`` file."""
+    items = [canonical_tariff(t) for t in tariffs]
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(dumps({"items": items}))
+
+
+def load_library(path: str) -> List[Dict]:
+    """Read a tariff JSON file (single tariff, list or ``items`` array) as normalized dicts."""
+    with open(path, "rb") as fh:
+        raw = loads(fh.read())
+    if isinstance(raw, dict) and isinstance(raw.get("items"), list):
+        items = raw["items"]
+    else:
+        items = raw if isinstance(raw, list) else [raw]
+    return [normalize_tariff(t) for t in items]
@@ -2,14 +2,58 @@
 Sidebar rendering: import, reset, and status display.
 """
 
-import json
+import hashlib
+import math
+from typing import Optional
 
 import streamlit as st
 
+from src.constants import ARCHETYPE_NAMES, IMPORT_PAGE_SIZE, PREVIEW_NONE, PREVIEW_UPLOAD
+from src.resources import session_memory_report, shared_item_index
 from src.tariff_io import import_tariff_data
 from src.validation import validate_tariff
 
 
+def _uploaded_index(uploaded):
+    """Shared item index for an uploaded file; the content is hashed once per upload."""
+    ss = st.session_state
+    if ss.get("import_file_id") != uploaded.file_id:
+        ss.import_digest = hashlib.sha256(uploaded.getvalue()).hexdigest()
+        ss.import_file_id = uploaded.file_id
+    return shared_item_index(ss.import_digest, uploaded)
+
+
+def _select_item(index) -> Optional[int]:
+    """Search and page through a multi-tariff file; returns the chosen item."""
+    if len(index) == 1:
+        return 0
+    tag = st.session_state.import_digest[:12]
+    st.caption(f"{len(index):,} tariffs in file")
+    query = st.text_input(
+        "Search tariffs",
+        key=f"import_query_{tag}",
+        placeholder="Utility, rate name or sector",
+    )
+    matches = index.search(query)
+    if not matches:
+        st.caption("No tariffs match the search.")
+        return None
+    pages = math.ceil(len(matches) / IMPORT_PAGE_SIZE)
+    page = 1
+    if pages > 1:
+        page = st.number_input(
+            f"Page (of {pages:,})", min_value=1, max_value=pages, value=1, step=1,
+            key=f"import_page_{tag}_{query}",
+        )
+    start = (int(page) - 1) * IMPORT_PAGE_SIZE
+    return st.selectbox(
+        "Tariff",
+        options=matches[start:start + IMPORT_PAGE_SIZE],
+        format_func=index.describe,
+        key=f"import_item_{tag}_{query}_{page}",
+    )
+
+
 def render_sidebar():
     """Render the sidebar with import, reset, and status sections."""
     with st.sidebar:
@@ -25,9 +69,12 @@ def render_sidebar():
 
         if uploaded is not None:
             try:
-                raw = json.loads(uploaded.read().decode("utf-8"))
-                if st.button("Load Tariff", type="primary", use_container_width=True):
-                    import_tariff_data(raw)
+                index = _uploaded_index(uploaded)
+                selected = _select_item(index)
+                if selected is not None and st.button(
+                    "Load Tariff", type="primary", use_container_width=True
+                ):
+                    import_tariff_data(index.item(selected))
                     st.success(
                         f"Loaded: **{st.session_state.basic_name}** "
                         f"({st.session_state.basic_utility})"
@@ -38,6 +85,46 @@ def render_sidebar():
 
         st.markdown("---")
 
+        # Sample load profile for the bill preview
+        st.subheader("Sample Load Profile")
+        options = [PREVIEW_NONE] + ARCHETYPE_NAMES + [PREVIEW_UPLOAD]
+        current = st.session_state.preview_profile
+        st.session_state.preview_profile = st.selectbox(
+            "Profile for bill preview",
+            options=options,
+            index=options.index(current) if current in options else 0,
+            help="Used by the bill preview in the Energy Rates and TOU Demand tabs.",
+        )
+        if st.session_state.preview_profile == PREVIEW_UPLOAD:
+            profile_file = st.file_uploader(
+                "Interval kWh CSV",
+                type=["csv"],
+                help=(
+                    "One row per hour, 30 or 15 minutes of the effective-date year; "
+                    "the last column is read as kWh."
+                ),
+            )
+            ss = st.session_state
+            if profile_file is not None and ss.preview_upload_file_id != profile_file.file_id:
+                # Parse and hash once per upload, not on every rerun
+                import numpy as np
+
+                from src.billing.determinants import profile_key
+                from src.billing.profiles import parse_load_csv
+
+                try:
+                    loads = parse_load_csv(profile_file.getvalue())
+                    # float32 halves the per-session cost of an uploaded profile
+                    ss.preview_upload = loads.astype(np.float32)
+                    ss.preview_upload_key = profile_key(loads)
+                    ss.preview_upload_file_id = profile_file.file_id
+                except ValueError as e:
+                    st.error(f"Error parsing CSV: {e}")
+            if profile_file is not None and ss.preview_upload_file_id == profile_file.file_id:
+                st.caption(f"{len(ss.preview_upload):,} interval values loaded.")
+
+        st.markdown("---")
+
         # Reset
         if st.button("Reset to Defaults", use_container_width=True):
             for key in list(st.session_state.keys()):
@@ -60,6 +147,7 @@ def render_sidebar():
             f"- Energy Periods: {len(ss.energy_periods)}\n"
             f"- TOU Demand: {'Enabled (' + str(len(ss.demand_periods)) + ' periods)' if ss.demand_enabled else 'Disabled'}\n"
             f"- Flat Demand: {'Enabled (' + str(len(ss.flat_periods)) + ' periods)' if ss.flat_enabled else 'Disabled'}\n"
+            f"- Coincident Demand: {'Enabled (' + str(len(ss.coincident_periods)) + ' periods)' if ss.coincident_enabled else 'Disabled'}\n"
             f"- Fixed Charge: {'$' + f'{ss.fixed_charge:.2f}' if ss.fixed_charge else 'Not set'}"
         )
 
@@ -68,3 +156,6 @@ def render_sidebar():
             st.caption(f":red[{len(errors)} validation error(s)]")
         else:
             st.caption(":green[Ready to export]")
+
+        session_kb = sum(session_memory_report().values()) / 1024
+        st.caption(f"Session memory: {session_kb:,.0f} KB")
@@ -2,11 +2,11 @@
 Session state initialization for the Streamlit app.
 """
 
-import copy
 from datetime import date
 
 import streamlit as st
 
+from src.constants import PREVIEW_NONE, ZERO_SCHEDULE
 
 
 def _default(key, value):
@@ -21,6 +21,9 @@ def init_session_state():
     # Schedule version — increment on import / reset to invalidate localStorage
     _default("sched_version", 1)
 
+    # Imported tariff as a compressed blob; unmodeled fields pass through on export
+    _default("passthrough", None)
+
     # Basic info
     _default("basic_utility", "")
     _default("basic_name", "")
@@ -30,6 +33,8 @@ def init_session_state():
     _default("basic_source", "")
     _default("basic_sourceparent", "")
     _default("basic_startdate", date.today())
+    _default("basic_enddate", None)
+    _default("basic_supersedes", "")
     _default("basic_eiaid", None)
     _default("basic_voltagecategory", "")
     _default("basic_phasewiring", "")
@@ -38,19 +43,22 @@ def init_session_state():
 
     # Energy rates
     _default("energy_periods", [{"label": "Period 0", "rate": 0.0, "adj": 0.0}])
-    _default("energy_weekday_sched", [[0] * 24 for _ in range(12)])
-    _default("energy_weekend_sched", [[0] * 24 for _ in range(12)])
+    _default("energy_weekday_sched", ZERO_SCHEDULE)
+    _default("energy_weekend_sched", ZERO_SCHEDULE)
     _default("energy_comments", "")
+    _default("energy_netmetering", None)  # usenetmetering; None = field absent
 
     # TOU Demand (optional)
     _default("demand_enabled", False)
     _default("demand_periods", [{"label": "Period 0", "rate": 0.0, "adj": 0.0}])
-    _default("demand_weekday_sched", [[0] * 24 for _ in range(12)])
-    _default("demand_weekend_sched", [[0] * 24 for _ in range(12)])
+    _default("demand_weekday_sched", ZERO_SCHEDULE)
+    _default("demand_weekend_sched", ZERO_SCHEDULE)
     _default("demand_rateunit", "kW")
     _default("demand_window", None)
     _default("demand_reactive", None)
     _default("demand_comments", "")
+    _default("demand_ratchet", None)          # 12 monthly fractions, or None
+    _default("demand_ratchet_history", None)  # peakkwcapacityhistory (months)
 
     # Flat demand (optional)
     _default("flat_enabled", False)
@@ -58,8 +66,20 @@ def init_session_state():
     _default("flat_months", [0] * 12)
     _default("flat_unit", "kW")
 
+    # Coincident demand (optional)
+    _default("coincident_enabled", False)
+    _default("coincident_periods", [{"label": "Period 0", "rate": 0.0, "adj": 0.0}])
+    _default("coincident_sched", ZERO_SCHEDULE)
+    _default("coincident_rateunit", "kW")
+
     # Fixed charges
     _default("fixed_charge", None)
     _default("fixed_charge_units", "$/month")
     _default("min_monthly_charge", None)
     _default("annual_min_charge", None)
+
+    # Bill preview sample profile
+    _default("preview_profile", PREVIEW_NONE)
+    _default("preview_upload", None)
+    _default("preview_upload_key", None)
+    _default("preview_upload_file_id", None)  # upload the cached profile came from
@@ -46,6 +46,19 @@ def render_basic_info_tab():
             "Effective Date",
             value=st.session_state.basic_startdate,
         )
+        has_end = st.checkbox(
+            "Has End Date",
+            value=st.session_state.basic_enddate is not None,
+            help="Set when this version has been superseded or expires.",
+        )
+        if has_end:
+            st.session_state.basic_enddate = st.date_input(
+                "End Date",
+                value=st.session_state.basic_enddate or st.session_state.basic_startdate,
+                min_value=st.session_state.basic_startdate,
+            )
+        else:
+            st.session_state.basic_enddate = None
         eiaid_val = st.session_state.basic_eiaid
         eiaid_str = str(eiaid_val) if eiaid_val else ""
         eiaid_input = st.text_input(
@@ -76,6 +89,11 @@ def render_basic_info_tab():
             value=st.session_state.basic_sourceparent,
             help="Link to the parent tariff page",
         )
+    st.session_state.basic_supersedes = st.text_input(
+        "Supersedes",
+        value=st.session_state.basic_supersedes,
+        help="URDB label of the tariff version this one replaces (optional)",
+    )
 
     st.markdown("---")
     st.markdown("### Applicability Criteria")
@@ -0,0 +1,93 @@
+"""
+Tab: Coincident Demand — optional charges on demand at the system peak.
+"""
+
+import copy
+
+import streamlit as st
+
+from src.constants import DEFAULT_COINCIDENT_PERIODS, DEMAND_UNIT_OPTIONS
+from src.utils import assign_heatmap_colors
+from src.components import (
+    create_grid_html,
+    render_period_tier_editors,
+    render_rate_period_editor,
+)
+
+
+def render_coincident_demand_tab():
+    """Render the Coincident Demand configuration tab."""
+    st.session_state.coincident_enabled = st.toggle(
+        "Enable Coincident Demand Charges",
+        value=st.session_state.coincident_enabled,
+        help="Toggle on to charge customer demand ($/kW) at the times of the system peak.",
+    )
+
+    if not st.session_state.coincident_enabled:
+        st.info(
+            "Coincident demand charges are **disabled**. Toggle on above to configure "
+            "coincident rate periods and paint the coincident schedule."
+        )
+        return
+
+    st.markdown("### Coincident Demand Settings")
+    cu = st.session_state.coincident_rateunit
+    st.session_state.coincident_rateunit = st.selectbox(
+        "Coincident Rate Unit",
+        options=DEMAND_UNIT_OPTIONS,
+        index=DEMAND_UNIT_OPTIONS.index(cu) if cu in DEMAND_UNIT_OPTIONS else 0,
+        key="coincident_rateunit_sel",
+    )
+    st.caption(
+        "Bills the customer's demand during the system-peak intervals. The system "
+        "peak is not part of the tariff, so the bill preview does not include "
+        "these charges."
+    )
+
+    st.markdown("---")
+    st.markdown("### Coincident Rate Periods")
+
+    render_rate_period_editor(
+        periods_key="coincident_periods",
+        prefix="coincident",
+        rate_unit="$/kW",
+        default_periods=DEFAULT_COINCIDENT_PERIODS,
+    )
+
+    st.markdown("#### Coincident Demand Blocks")
+    st.caption(
+        "Optional tiers per period. Each block's *Up to* is a cumulative bound on "
+        "the customer's demand at the system peak; the last block is unbounded."
+    )
+    render_period_tier_editors(
+        periods_key="coincident_periods",
+        prefix="coincident",
+        quantity_unit=st.session_state.coincident_rateunit,
+        rate_unit="$/kW",
+    )
+
+    st.markdown("---")
+    st.markdown("### Coincident Schedule")
+    st.caption(
+        "Paint the period that applies when the system peak falls in each month "
+        "and hour. URDB has a single coincident schedule for all days."
+    )
+
+    show_rates = st.toggle(
+        "Show rates on grid cells",
+        value=True,
+        key="coincident_show_rates",
+        help="Display the total rate (base + adjustment) on each cell of the coincident schedule.",
+    )
+
+    cperiods = assign_heatmap_colors(copy.deepcopy(st.session_state.coincident_periods))
+    html = create_grid_html(
+        grid_id="coincident",
+        schedule=st.session_state.coincident_sched,
+        rate_periods=cperiods,
+        title="Coincident Schedule",
+        rate_unit="$/kW",
+        sched_version=st.session_state.sched_version,
+        show_rates=show_rates,
+    )
+    st.components.v1.html(html, height=720 if show_rates else 640, scrolling=False)
@@ -8,7 +8,12 @@ import streamlit as st
 
 from src.constants import DEFAULT_ENERGY_PERIODS
 from src.utils import assign_heatmap_colors
-from src.components import create_grid_html, render_rate_period_editor
+from src.components import (
+    create_grid_html,
+    render_bill_preview_section,
+    render_rate_period_editor,
+)
+from src.schedule_derivation import render_schedule_derivation
 
 
 def render_energy_rates_tab():
@@ -16,16 +21,31 @@ def render_energy_rates_tab():
     st.markdown("### Energy Rate Periods")
     st.caption(
         "Define TOU energy periods with labels and $/kWh rates. "
-        "Colors are auto-assigned: green = lowest rate, red = highest."
+        "Colors are auto-assigned: green = lowest rate, red = highest. "
+        "*Sell* is the credit for exported kWh (e.g. rooftop solar)."
     )
+    render_schedule_derivation()
 
     render_rate_period_editor(
         periods_key="energy_periods",
         prefix="energy",
         rate_unit="$/kWh",
         default_periods=DEFAULT_ENERGY_PERIODS,
+        sell=True,
     )
 
+    nm = st.session_state.energy_netmetering
+    on = st.toggle(
+        "Net metering",
+        value=bool(nm),
+        key=f"energy_netmetering_v{st.session_state.sched_version}",
+        help="Net imports against exports within each month and period; only a "
+        "net surplus is credited at the sell rate. Off: every imported kWh is "
+        "billed and every exported kWh is credited.",
+    )
+    if on != bool(nm):
+        st.session_state.energy_netmetering = on
+
     st.markdown("---")
     st.markdown("### Energy Weekday Schedule (Mon–Fri)")
     st.caption("Paint the 12×24 grid: select a period, then click-drag on cells.")
@@ -63,6 +83,9 @@ def render_energy_rates_tab():
     )
     st.components.v1.html(html_we, height=grid_height, scrolling=False)
 
+    st.markdown("---")
+    render_bill_preview_section()
+
     st.markdown("---")
     st.session_state.energy_comments = st.text_area(
         "Energy Comments",
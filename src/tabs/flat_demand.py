@@ -4,7 +4,9 @@ Tab: Flat Demand — optional seasonal/monthly flat demand charges.
 
 import streamlit as st
 
+from src.components import apply_period_tiers, tier_table_editor
 from src.constants import MONTH_NAMES, DEMAND_UNIT_OPTIONS
+from src.utils import period_tiers
 
 
 def render_flat_demand_tab():
@@ -20,6 +22,8 @@ def render_flat_demand_tab():
             "Flat demand charges are **disabled**. Toggle on above to configure "
             "seasonal demand periods and assign months."
         )
+        st.markdown("---")
+        _render_demand_ratchet()
         return
 
     st.markdown("### Flat Demand Unit")
@@ -52,11 +56,14 @@ def render_flat_demand_tab():
             min(m, len(fp) - 1) for m in st.session_state.flat_months
         ]
 
+    refresh = False
     for idx in range(len(fp)):
         p = fp[idx]
         total = p["rate"] + p["adj"]
+        n_tiers = len(period_tiers(p))
+        blocks = f"  ({n_tiers} blocks)" if n_tiers > 1 else ""
         with st.expander(
-            f"Period {idx}: {p['label']}  —  ${total:.2f}/{st.session_state.flat_unit}",
+            f"Period {idx}: {p['label']}  —  ${total:.2f}/{st.session_state.flat_unit}{blocks}",
             expanded=True,
         ):
             c1, c2, c3 = st.columns(3)
@@ -85,7 +92,25 @@ def render_flat_demand_tab():
                 except ValueError:
                     st.error("Invalid number")
 
+            st.caption(
+                "Demand blocks: *Up to* is a cumulative bound on the monthly peak; "
+                "the first block is the rate above."
+            )
+            tiers = tier_table_editor(
+                p, f"flat_tiers_{idx}", st.session_state.flat_unit,
+                f"$/{st.session_state.flat_unit}",
+            )
+            if tiers is not None:
+                changed = {field for field, _, _ in apply_period_tiers(p, tiers)}
+                if changed & {"rate", "adj"}:
+                    # Let the rate inputs above pick up the new first block
+                    st.session_state.pop(f"flat_rate_{idx}", None)
+                    st.session_state.pop(f"flat_adj_{idx}", None)
+                    refresh = True
+
     st.session_state.flat_periods = fp
+    if refresh:
+        st.rerun()
 
     st.markdown("---")
     st.markdown("### Month-to-Period Assignment")
@@ -138,3 +163,51 @@ def render_flat_demand_tab():
             )
 
     st.session_state.flat_months = months_map
+
+    st.markdown("---")
+    _render_demand_ratchet()
+
+
+def _render_demand_ratchet():
+    """Monthly ratchet percentages and the months of peak history they look back over."""
+    st.markdown("### Demand Ratchet")
+    st.caption(
+        "Billing demand is floored at the month's percentage of the highest peak "
+        "in the preceding look-back months. The floor applies to flat demand, or "
+        "to each TOU demand period when the tariff has no flat demand. "
+        "Leave every month at 0 for no ratchet."
+    )
+    ratchet = st.session_state.demand_ratchet
+    current = [float(v) for v in ratchet] if ratchet is not None else [0.0] * 12
+    version = st.session_state.get("sched_version", 0)
+    max_pct = max(150.0, max(current) * 100)
+
+    values = []
+    for row in range(2):
+        cols = st.columns(6)
+        for col, mi in zip(cols, range(row * 6, row * 6 + 6)):
+            with col:
+                values.append(
+                    st.number_input(
+                        f"{MONTH_NAMES[mi]} (%)",
+                        min_value=0.0,
+                        max_value=max_pct,
+                        value=round(current[mi] * 100, 4),
+                        step=5.0,
+                        key=f"ratchet_pct_{mi}_v{version}",
+                    ) / 100
+                )
+    if any(abs(v - c) > 1e-9 for v, c in zip(values, current)):
+        st.session_state.demand_ratchet = values
+
+    history = st.session_state.demand_ratchet_history
+    h_str = st.text_input(
+        "Look-back (months)",
+        value=str(int(history)) if history else "",
+        key=f"ratchet_history_v{version}",
+        help="Months of peak history the ratchet considers (default 11).",
+    )
+    try:
+        st.session_state.demand_ratchet_history = int(h_str) if h_str.strip() else None
+    except ValueError:
+        st.error("Invalid number")
@@ -2,11 +2,11 @@
 Tab: Review & Export — validation, JSON preview, and download.
 """
 
-import json
 from datetime import datetime
 
 import streamlit as st
 
+from src.serialization import dumps
 from src.tariff_io import build_tariff_json
 from src.validation import validate_tariff
 
@@ -34,7 +34,7 @@ def render_export_tab():
     st.markdown("---")
     st.markdown("### Configuration Summary")
 
-    c1, c2, c3 = st.columns(3)
+    c1, c2, c3, c4 = st.columns(4)
     with c1:
         st.metric("Energy Periods", len(st.session_state.energy_periods))
     with c2:
@@ -51,21 +51,29 @@ def render_export_tab():
             else 0
         )
         st.metric("Flat Demand Periods", fp)
+    with c4:
+        cp = (
+            len(st.session_state.coincident_periods)
+            if st.session_state.coincident_enabled
+            else 0
+        )
+        st.metric("Coincident Demand Periods", cp)
 
     st.markdown("---")
     st.markdown("### JSON Preview & Download")
     st.caption(
         "The export reads painted schedules directly from the grids. "
-        "Make sure you've painted your schedules in the Energy Rates "
-        "and TOU Demand tabs before exporting."
+        "Make sure you've painted your schedules in the Energy Rates, "
+        "TOU Demand and Coincident Demand tabs before exporting."
     )
 
     # Build the non-schedule portion as a JSON string to pass into JS
     tariff_json_obj = build_tariff_json()
-    tariff_json_str = json.dumps(tariff_json_obj, indent=2)
+    tariff_json_str = dumps(tariff_json_obj)
 
     # Also pass schedule keys that JS should read from localStorage
     demand_enabled = st.session_state.demand_enabled
+    coincident_enabled = st.session_state.coincident_enabled
 
     # Create JS export component — filename: utility - tariff - date
     utility_name = st.session_state.basic_utility or "utility"
@@ -106,6 +114,7 @@ def render_export_tab():
 (function(){{
   const base={tariff_json_str};
   const demandOn={'true' if demand_enabled else 'false'};
+  const coincidentOn={'true' if coincident_enabled else 'false'};
   const ver='{st.session_state.sched_version}';
 
   function readLS(key){{
@@ -129,6 +138,10 @@ def render_export_tab():
       if(dwd)item.demandweekdayschedule=dwd;
       if(dwe)item.demandweekendschedule=dwe;
     }}
+    if(coincidentOn){{
+      const cs=readLS('tou_sched_coincident');
+      if(cs)item.coincidentrateschedule=cs;
+    }}
     return t;
   }}
 
@@ -6,9 +6,14 @@ import copy
 
 import streamlit as st
 
-from src.constants import DEMAND_UNIT_OPTIONS, DEFAULT_DEMAND_PERIODS
+from src.constants import DEMAND_UNIT_OPTIONS, DEFAULT_DEMAND_PERIODS, ZERO_SCHEDULE
 from src.utils import assign_heatmap_colors
-from src.components import create_grid_html, render_rate_period_editor
+from src.components import (
+    create_grid_html,
+    render_bill_preview_section,
+    render_period_tier_editors,
+    render_rate_period_editor,
+)
 
 
 def render_tou_demand_tab():
@@ -22,8 +27,8 @@ def render_tou_demand_tab():
 
     # When first enabled, reset schedules and bump version to clear stale localStorage
     if st.session_state.demand_enabled and not was_enabled:
-        st.session_state.demand_weekday_sched = [[0] * 24 for _ in range(12)]
-        st.session_state.demand_weekend_sched = [[0] * 24 for _ in range(12)]
+        st.session_state.demand_weekday_sched = ZERO_SCHEDULE
+        st.session_state.demand_weekend_sched = ZERO_SCHEDULE
         st.session_state.sched_version = st.session_state.get("sched_version", 0) + 1
 
     if not st.session_state.demand_enabled:
@@ -80,6 +85,18 @@ def render_tou_demand_tab():
         default_periods=DEFAULT_DEMAND_PERIODS,
     )
 
+    st.markdown("#### Demand Blocks")
+    st.caption(
+        "Optional tiers per period. Each block's *Up to* is a cumulative bound on "
+        "the month's peak demand in that period; the last block is unbounded."
+    )
+    render_period_tier_editors(
+        periods_key="demand_periods",
+        prefix="demand",
+        quantity_unit=st.session_state.demand_rateunit,
+        rate_unit="$/kW",
+    )
+
     st.markdown("---")
     st.markdown("### Demand Weekday Schedule (Mon–Fri)")
     st.caption(
@@ -119,6 +136,9 @@ def render_tou_demand_tab():
     )
     st.components.v1.html(html_we, height=demand_grid_height, scrolling=False)
 
+    st.markdown("---")
+    render_bill_preview_section()
+
     st.markdown("---")
     st.session_state.demand_comments = st.text_area(
         "Demand Comments",
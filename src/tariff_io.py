@@ -3,20 +3,144 @@ Tariff import and export functionality.
 
 Handles loading URDB JSON into session state and building export JSON
 from session state.
+
+Import also keeps the whole normalized tariff as a compressed, immutable
+blob (``passthrough``).  Export overlays the fields built from session state
+on it, so attribute arrays, ``label``, ``uri``, tier keys such as ``unit`` and
+any other field the editor does not model survive a round trip unchanged and
+in their original order.
 """
 
 import copy
-from datetime import datetime, date
-from typing import Dict, List, Optional
+import zlib
+from datetime import date
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
 
 import streamlit as st
 
-from src.constants import DEFAULT_ENERGY_PERIODS
-from src.utils import normalize_tariff, extract_periods_from_structure
+from src.constants import DEFAULT_ENERGY_PERIODS, ZERO_SCHEDULE
+from src.serialization import dumps, loads
+from src.utils import (
+    compact_schedule,
+    date_to_epoch,
+    epoch_to_date,
+    extract_periods_from_structure,
+    normalize_tariff,
+    ratchet_fractions,
+    structure_from_periods,
+)
+
+
+# Fields ``build_tariff_json`` writes from session state.  On export these
+# come only from the editor (a field it leaves out is dropped); every other
+# field of the imported tariff passes through.
+MODELED_FIELDS = frozenset({
+    "utility", "name", "sector", "servicetype", "description", "source",
+    "sourceparent", "startdate", "enddate", "supersedes", "supercedes", "eiaid",
+    "voltagecategory", "phasewiring", "peakkwcapacitymin", "peakkwcapacitymax",
+    "energyratestructure", "energytoulabels", "energyweekdayschedule",
+    "energyweekendschedule", "energycomments", "usenetmetering",
+    "demandrateunit", "demandunits", "demandratestructure", "demandtoulabels",
+    "demandweekdayschedule", "demandweekendschedule", "demandwindow",
+    "demandreactivepowercharge", "demandcomments",
+    "demandratchetpercentage", "peakkwcapacityhistory",
+    "flatdemandunit", "flatdemandstructure", "flatdemandmonths",
+    "coincidentrateunit", "coincidentratestructure", "coincidentrateschedule",
+    "fixedchargefirstmeter", "fixedchargeunits", "minmonthlycharge", "annualmincharge",
+})
+
+# Rate structures the editor rebuilds from its periods, and the tier keys it
+# edits.  Other tier keys (``unit``, ``note`` ...) keep their imported value.
+STRUCTURE_FIELDS = (
+    "energyratestructure", "demandratestructure", "flatdemandstructure",
+    "coincidentratestructure",
+)
+TIER_FIELDS = frozenset({"rate", "adj", "max", "sell"})
+
+# Epoch fields the editor holds as dates; an unedited date keeps its imported time
+EPOCH_FIELDS = ("startdate", "enddate")
+
+
+def pack_passthrough(tariff: Dict) -> bytes:
+    """Compact immutable blob of an imported (normalized) tariff."""
+    return zlib.compress(dumps(tariff).encode("utf-8"))
+
+
+@lru_cache(maxsize=32)
+def _unpack_passthrough(blob: bytes) -> Dict:
+    return loads(zlib.decompress(blob))
+
+
+def _overlay_tier(base: Dict, built: Dict) -> Dict:
+    """Edited tier keys from ``built``; every other key keeps its imported value."""
+    if not isinstance(base, dict):
+        return built
+    out = {
+        k: (built[k] if k in TIER_FIELDS else copy.deepcopy(v))
+        for k, v in base.items()
+        if k not in TIER_FIELDS or k in built
+    }
+    for k, v in built.items():
+        if k in TIER_FIELDS:
+            out.setdefault(k, v)
+    return out
+
+
+def _overlay_structure(base, built: List[List[Dict]]) -> List[List[Dict]]:
+    """Built structure with imported tiers merged under it, matched by position."""
+    if not isinstance(base, list):
+        return built
+    out = []
+    for p, row in enumerate(built):
+        base_row = base[p] if p < len(base) and isinstance(base[p], list) else []
+        out.append([
+            _overlay_tier(base_row[t], tier) if t < len(base_row) else tier
+            for t, tier in enumerate(row)
+        ])
+    return out
+
+
+def _overlay_value(key: str, base_value: Any, built_value: Any) -> Any:
+    if key in STRUCTURE_FIELDS:
+        return _overlay_structure(base_value, built_value)
+    if key in EPOCH_FIELDS:
+        day = epoch_to_date(base_value)
+        if day is not None and date_to_epoch(day) == built_value:
+            return base_value
+    return built_value
+
+
+def overlay_passthrough(blob: Optional[bytes], built: Dict) -> Dict:
+    """``built`` merged over the imported tariff in ``blob``.
+
+    Modeled fields take the built value (or are dropped when not built);
+    other fields keep their imported value.  Within rate structures only the
+    edited tier keys (``TIER_FIELDS``) are replaced, and a start or end date
+    that was not edited keeps its imported time of day.  Imported key order
+    is kept and new fields follow it.
+    """
+    if not blob:
+        return built
+    base = _unpack_passthrough(blob)
+    built = dict(built)
+    # Keep the live API's "supercedes" spelling if that is what was imported
+    if "supercedes" in base and "supersedes" not in base and "supersedes" in built:
+        built["supercedes"] = built.pop("supersedes")
+    out: Dict = {}
+    for key, value in base.items():
+        if key not in MODELED_FIELDS:
+            out[key] = copy.deepcopy(value)
+        elif key in built:
+            out[key] = _overlay_value(key, value, built[key])
+    for key, value in built.items():
+        out.setdefault(key, value)
+    return out
 
 
 def import_tariff_data(raw: Dict) -> None:
     """Populate session state from an imported tariff dict."""
+    ss = st.session_state
     # Unwrap items array
     if "items" in raw and isinstance(raw["items"], list) and raw["items"]:
         tariff = raw["items"][0]
@@ -24,112 +148,120 @@ def import_tariff_data(raw: Dict) -> None:
         tariff = raw
 
     t = normalize_tariff(tariff)
+    ss.passthrough = pack_passthrough(t)
 
     # Increment version so grids re-initialize from session state
-    st.session_state.sched_version = st.session_state.get("sched_version", 0) + 1
+    ss.sched_version = ss.get("sched_version", 0) + 1
 
     # Clear stale widget keys so text inputs pick up fresh imported values
     # (Streamlit caches widget values by key; without clearing, period 0's
     # inputs would still show values from the previous session.)
-    for prefix in ("energy", "demand", "flat"):
+    for prefix in ("energy", "demand", "flat", "coincident"):
         for idx in range(12):
             for suffix in (f"_lbl_{idx}", f"_rate_{idx}", f"_adj_{idx}"):
                 key = prefix + suffix
-                if key in st.session_state:
-                    del st.session_state[key]
+                if key in ss:
+                    del ss[key]
         num_key = f"{prefix}_num_periods"
-        if num_key in st.session_state:
-            del st.session_state[num_key]
+        if num_key in ss:
+            del ss[num_key]
+        # Undo history refers to the previous tariff's periods
+        ss.pop(f"{prefix}_history", None)
 
     # Basic info
-    st.session_state.basic_utility = t.get("utility", "")
-    st.session_state.basic_name = t.get("name", "")
-    st.session_state.basic_sector = t.get("sector", "Commercial")
-    st.session_state.basic_servicetype = t.get("servicetype", "Bundled")
-    st.session_state.basic_description = t.get("description", "")
-    st.session_state.basic_source = t.get("source", "")
-    st.session_state.basic_sourceparent = t.get("sourceparent", "")
-    st.session_state.basic_eiaid = t.get("eiaid", None)
-    st.session_state.basic_voltagecategory = t.get("voltagecategory", "")
-    st.session_state.basic_phasewiring = t.get("phasewiring", "")
-    st.session_state.basic_peakkwcapacitymin = t.get("peakkwcapacitymin", None)
-    st.session_state.basic_peakkwcapacitymax = t.get("peakkwcapacitymax", None)
-
-    sd = t.get("startdate")
-    if sd and isinstance(sd, (int, float)):
-        try:
-            st.session_state.basic_startdate = datetime.fromtimestamp(sd).date()
-        except (ValueError, OSError):
-            st.session_state.basic_startdate = date.today()
-    else:
-        st.session_state.basic_startdate = date.today()
+    ss.basic_utility = t.get("utility", "")
+    ss.basic_name = t.get("name", "")
+    ss.basic_sector = t.get("sector", "Commercial")
+    ss.basic_servicetype = t.get("servicetype", "Bundled")
+    ss.basic_description = t.get("description", "")
+    ss.basic_source = t.get("source", "")
+    ss.basic_sourceparent = t.get("sourceparent", "")
+    ss.basic_eiaid = t.get("eiaid", None)
+    ss.basic_voltagecategory = t.get("voltagecategory", "")
+    ss.basic_phasewiring = t.get("phasewiring", "")
+    ss.basic_peakkwcapacitymin = t.get("peakkwcapacitymin", None)
+    ss.basic_peakkwcapacitymax = t.get("peakkwcapacitymax", None)
+
+    ss.basic_startdate = epoch_to_date(t.get("startdate")) or date.today()
+    ss.basic_enddate = epoch_to_date(t.get("enddate"))
+    # The live URDB API spells this field "supercedes"
+    ss.basic_supersedes = t.get("supersedes") or t.get("supercedes") or ""
 
     # Energy rates
     e_struct = t.get("energyratestructure", [])
     e_labels = t.get("energytoulabels", [])
     if e_struct:
-        st.session_state.energy_periods = extract_periods_from_structure(
+        ss.energy_periods = extract_periods_from_structure(
             e_struct, e_labels, "Period"
         )
     else:
-        st.session_state.energy_periods = copy.deepcopy(DEFAULT_ENERGY_PERIODS)
-    st.session_state.energy_weekday_sched = t.get(
-        "energyweekdayschedule", [[0] * 24 for _ in range(12)]
+        ss.energy_periods = copy.deepcopy(DEFAULT_ENERGY_PERIODS)
+    ss.energy_weekday_sched = compact_schedule(
+        t.get("energyweekdayschedule") or ZERO_SCHEDULE
     )
-    st.session_state.energy_weekend_sched = t.get(
-        "energyweekendschedule", [[0] * 24 for _ in range(12)]
+    ss.energy_weekend_sched = compact_schedule(
+        t.get("energyweekendschedule") or ZERO_SCHEDULE
     )
-    st.session_state.energy_comments = t.get("energycomments", "")
+    ss.energy_comments = t.get("energycomments", "")
+    netmetering = t.get("usenetmetering", None)
+    if isinstance(netmetering, str):
+        netmetering = netmetering.strip().lower() in ("true", "1", "yes")
+    ss.energy_netmetering = netmetering
 
     # TOU Demand
     d_struct = t.get("demandratestructure", [])
     d_labels = t.get("demandtoulabels", [])
     if d_struct:
-        st.session_state.demand_enabled = True
-        st.session_state.demand_periods = extract_periods_from_structure(
+        ss.demand_enabled = True
+        ss.demand_periods = extract_periods_from_structure(
             d_struct, d_labels, "Period"
         )
-        st.session_state.demand_weekday_sched = t.get(
-            "demandweekdayschedule", [[0] * 24 for _ in range(12)]
+        ss.demand_weekday_sched = compact_schedule(
+            t.get("demandweekdayschedule") or ZERO_SCHEDULE
         )
-        st.session_state.demand_weekend_sched = t.get(
-            "demandweekendschedule", [[0] * 24 for _ in range(12)]
+        ss.demand_weekend_sched = compact_schedule(
+            t.get("demandweekendschedule") or ZERO_SCHEDULE
         )
     else:
-        st.session_state.demand_enabled = False
-    st.session_state.demand_rateunit = t.get("demandrateunit", "kW")
-    st.session_state.demand_window = t.get("demandwindow", None)
-    st.session_state.demand_reactive = t.get("demandreactivepowercharge", None)
-    st.session_state.demand_comments = t.get("demandcomments", "")
+        ss.demand_enabled = False
+    ss.demand_rateunit = t.get("demandrateunit", "kW")
+    ss.demand_window = t.get("demandwindow", None)
+    ss.demand_reactive = t.get("demandreactivepowercharge", None)
+    ss.demand_comments = t.get("demandcomments", "")
+    # Stored as fractions; percent-form imports (80 = 80%) are scaled down
+    ss.demand_ratchet = ratchet_fractions(t.get("demandratchetpercentage"))
+    ss.demand_ratchet_history = t.get("peakkwcapacityhistory", None)
 
     # Flat demand
     f_struct = t.get("flatdemandstructure", [])
     f_months = t.get("flatdemandmonths", [])
     if f_struct:
-        st.session_state.flat_enabled = True
-        st.session_state.flat_periods = []
-        for idx, tiers in enumerate(f_struct):
-            rate, adj = 0.0, 0.0
-            if isinstance(tiers, list) and tiers:
-                tier = tiers[0]
-                if isinstance(tier, dict):
-                    rate = float(tier.get("rate", 0) or 0)
-                    adj = float(tier.get("adj", 0) or 0)
-            st.session_state.flat_periods.append(
-                {"label": f"Season {idx}", "rate": rate, "adj": adj}
-            )
-        st.session_state.flat_months = (
+        ss.flat_enabled = True
+        ss.flat_periods = extract_periods_from_structure(f_struct, [], "Season")
+        ss.flat_months = (
             f_months if len(f_months) == 12 else [0] * 12
         )
     else:
-        st.session_state.flat_enabled = False
-    st.session_state.flat_unit = t.get("flatdemandunit", "kW")
+        ss.flat_enabled = False
+    ss.flat_unit = t.get("flatdemandunit", "kW")
+
+    # Coincident demand
+    c_struct = t.get("coincidentratestructure", [])
+    if c_struct:
+        ss.coincident_enabled = True
+        ss.coincident_periods = extract_periods_from_structure(c_struct, [], "Period")
+        ss.coincident_sched = compact_schedule(
+            t.get("coincidentrateschedule") or ZERO_SCHEDULE
+        )
+    else:
+        ss.coincident_enabled = False
+    ss.coincident_rateunit = t.get("coincidentrateunit", "kW")
 
     # Fixed charges
-    st.session_state.fixed_charge = t.get("fixedchargefirstmeter", None)
-    st.session_state.fixed_charge_units = t.get("fixedchargeunits", "$/month")
-    st.session_state.min_monthly_charge = t.get("minmonthlycharge", None)
-    st.session_state.annual_min_charge = t.get("annualmincharge", None)
+    ss.fixed_charge = t.get("fixedchargefirstmeter", None)
+    ss.fixed_charge_units = t.get("fixedchargeunits", "$/month")
+    ss.min_monthly_charge = t.get("minmonthlycharge", None)
+    ss.annual_min_charge = t.get("annualmincharge", None)
 
 
 def build_tariff_json(
@@ -137,11 +269,14 @@ def build_tariff_json(
     energy_we: Optional[List] = None,
     demand_wd: Optional[List] = None,
     demand_we: Optional[List] = None,
+    coincident: Optional[List] = None,
 ) -> Dict:
     """Assemble the complete tariff JSON from session state.
 
     Schedule parameters override session state when provided (used by the
-    JS export component reading from localStorage).
+    JS export component reading from localStorage).  Fields of an imported
+    tariff that the editor does not model are carried over from its
+    passthrough blob.
     """
     ss = st.session_state
     tariff: Dict = {}
@@ -161,9 +296,11 @@ def build_tariff_json(
     if ss.basic_sourceparent:
         tariff["sourceparent"] = ss.basic_sourceparent
     if ss.basic_startdate:
-        tariff["startdate"] = int(
-            datetime.combine(ss.basic_startdate, datetime.min.time()).timestamp()
-        )
+        tariff["startdate"] = date_to_epoch(ss.basic_startdate)
+    if ss.basic_enddate:
+        tariff["enddate"] = date_to_epoch(ss.basic_enddate)
+    if ss.basic_supersedes:
+        tariff["supersedes"] = ss.basic_supersedes
     if ss.basic_eiaid:
         tariff["eiaid"] = int(ss.basic_eiaid)
     if ss.basic_voltagecategory:
@@ -177,23 +314,21 @@ def build_tariff_json(
 
     # Energy rates
     ep = ss.energy_periods
-    tariff["energyratestructure"] = [
-        [{"unit": "kWh", "rate": p["rate"], "adj": p["adj"]}] for p in ep
-    ]
+    tariff["energyratestructure"] = structure_from_periods(ep, unit="kWh")
     tariff["energytoulabels"] = [p["label"] for p in ep]
     tariff["energyweekdayschedule"] = energy_wd or ss.energy_weekday_sched
     tariff["energyweekendschedule"] = energy_we or ss.energy_weekend_sched
     if ss.energy_comments:
         tariff["energycomments"] = ss.energy_comments
+    if ss.energy_netmetering is not None:
+        tariff["usenetmetering"] = bool(ss.energy_netmetering)
 
     # TOU Demand
     if ss.demand_enabled and ss.demand_periods:
         dp = ss.demand_periods
         tariff["demandrateunit"] = ss.demand_rateunit
         tariff["demandunits"] = ss.demand_rateunit
-        tariff["demandratestructure"] = [
-            [{"rate": p["rate"], "adj": p["adj"]}] for p in dp
-        ]
+        tariff["demandratestructure"] = structure_from_periods(dp)
         tariff["demandtoulabels"] = [p["label"] for p in dp]
         tariff["demandweekdayschedule"] = demand_wd or ss.demand_weekday_sched
         tariff["demandweekendschedule"] = demand_we or ss.demand_weekend_sched
@@ -204,15 +339,25 @@ def build_tariff_json(
         if ss.demand_comments:
             tariff["demandcomments"] = ss.demand_comments
 
+    # Demand ratchet (applies to flat demand, or TOU demand without it)
+    if ss.demand_ratchet is not None:
+        tariff["demandratchetpercentage"] = list(ss.demand_ratchet)
+    if ss.demand_ratchet_history is not None:
+        tariff["peakkwcapacityhistory"] = ss.demand_ratchet_history
+
     # Flat demand
     if ss.flat_enabled and ss.flat_periods:
         fp = ss.flat_periods
         tariff["flatdemandunit"] = ss.flat_unit
-        tariff["flatdemandstructure"] = [
-            [{"rate": p["rate"], "adj": p["adj"]}] for p in fp
-        ]
+        tariff["flatdemandstructure"] = structure_from_periods(fp)
         tariff["flatdemandmonths"] = ss.flat_months
 
+    # Coincident demand
+    if ss.coincident_enabled and ss.coincident_periods:
+        tariff["coincidentrateunit"] = ss.coincident_rateunit
+        tariff["coincidentratestructure"] = structure_from_periods(ss.coincident_periods)
+        tariff["coincidentrateschedule"] = coincident or ss.coincident_sched
+
     # Fixed charges
     if ss.fixed_charge is not None:
         tariff["fixedchargefirstmeter"] = ss.fixed_charge
@@ -223,4 +368,4 @@ def build_tariff_json(
         tariff["annualmincharge"] = ss.annual_min_charge
 
     tariff["country"] = "USA"
-    return {"items": [tariff]}
+    return {"items": [overlay_passthrough(ss.get("passthrough"), tariff)]}
@@ -2,9 +2,10 @@
 Utility functions for color mapping, tariff normalization, and period extraction.
 """
 
-from typing import Dict, List
+from datetime import date, datetime, time, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
 
-from src.constants import FIELD_MAP
+from src.constants import FIELD_MAP, ZERO_SCHEDULE
 
 
 def get_heatmap_color(value: float) -> str:
@@ -88,18 +89,114 @@ def normalize_tariff(tariff: Dict) -> Dict:
     return out
 
 
+def _tier_number(tier: Dict, field: str) -> Optional[float]:
+    value = tier.get(field)
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
 def extract_periods_from_structure(
     structure: List, labels: List, default_label: str = "Period"
 ) -> List[Dict]:
-    """Extract period configs from a URDB rate structure + label array."""
+    """Extract period configs from a URDB rate structure + label array.
+
+    The first tier fills the period's ``rate`` / ``adj`` (and ``max`` /
+    ``sell`` if the tier has them); any further tiers are kept under
+    ``tiers`` so blocks round-trip through ``structure_from_periods``.
+    """
     periods = []
     for idx, period_tiers in enumerate(structure):
-        rate, adj = 0.0, 0.0
-        if isinstance(period_tiers, list) and period_tiers:
-            tier = period_tiers[0]
-            if isinstance(tier, dict):
-                rate = float(tier.get("rate", 0) or 0)
-                adj = float(tier.get("adj", 0) or 0)
+        tiers = [
+            {
+                "rate": float(t.get("rate", 0) or 0),
+                "adj": float(t.get("adj", 0) or 0),
+                "max": _tier_number(t, "max"),
+                "sell": _tier_number(t, "sell"),
+            }
+            for t in (period_tiers if isinstance(period_tiers, list) else [])
+            if isinstance(t, dict)
+        ] or [{"rate": 0.0, "adj": 0.0, "max": None, "sell": None}]
         label = labels[idx] if idx < len(labels) else f"{default_label} {idx}"
-        periods.append({"label": label, "rate": rate, "adj": adj})
+        period = {"label": label, "rate": tiers[0]["rate"], "adj": tiers[0]["adj"]}
+        for field in ("max", "sell"):
+            if tiers[0][field] is not None:
+                period[field] = tiers[0][field]
+        if len(tiers) > 1:
+            period["tiers"] = tiers[1:]
+        periods.append(period)
     return assign_heatmap_colors(periods) if periods else []
+
+
+def period_tiers(period: Dict) -> List[Dict]:
+    """All tiers of an editor period as {rate, adj, max, sell} dicts, first tier first."""
+    first = {
+        "rate": period.get("rate", 0.0),
+        "adj": period.get("adj", 0.0),
+        "max": period.get("max"),
+        "sell": period.get("sell"),
+    }
+    return [first] + [dict(t) for t in period.get("tiers") or ()]
+
+
+def structure_from_periods(periods: List[Dict], unit: Optional[str] = None) -> List[List[Dict]]:
+    """URDB rate structure for editor periods; tiers keep their ``max`` and ``sell``."""
+    structure = []
+    for p in periods:
+        row = []
+        for t in period_tiers(p):
+            tier = {"unit": unit} if unit else {}
+            tier["rate"] = t["rate"]
+            tier["adj"] = t["adj"]
+            if t.get("max") is not None:
+                tier["max"] = t["max"]
+            if t.get("sell") is not None:
+                tier["sell"] = t["sell"]
+            row.append(tier)
+        structure.append(row)
+    return structure
+
+
+def epoch_to_date(value) -> Optional[date]:
+    """URDB epoch-seconds timestamp as a UTC date, or None if missing / invalid."""
+    if not value or not isinstance(value, (int, float)):
+        return None
+    try:
+        return datetime.fromtimestamp(value, tz=timezone.utc).date()
+    except (ValueError, OSError, OverflowError):
+        return None
+
+
+def date_to_epoch(value: date) -> int:
+    """Epoch seconds of UTC midnight on ``value``, as URDB dates are stored."""
+    return int(datetime.combine(value, time.min, tzinfo=timezone.utc).timestamp())
+
+
+def ratchet_fractions(percentages: Sequence) -> Optional[List[float]]:
+    """12 ``demandratchetpercentage`` values as fractions (0.8 = 80%).
+
+    A list with any value above 1.5 is taken to be in percent and scaled
+    down.  Returns None unless there are 12 numeric values.
+    """
+    if not isinstance(percentages, (list, tuple)) or len(percentages) != 12:
+        return None
+    try:
+        values = [float(p or 0) for p in percentages]
+    except (TypeError, ValueError):
+        return None
+    if max(values) > 1.5:
+        values = [v / 100.0 for v in values]
+    return values
+
+
+def compact_schedule(schedule: Sequence[Sequence[int]]) -> Tuple[Tuple[int, ...], ...]:
+    """Immutable 12x24 schedule with identical month rows stored once.
+
+    All-zero schedules return the shared ``ZERO_SCHEDULE``.  Seasonal
+    schedules typically repeat the same row for many months, so interning
+    rows keeps per-session state small.
+    """
+    rows: Dict[Tuple[int, ...], Tuple[int, ...]] = {}
+    out = tuple(rows.setdefault(r, r) for r in (tuple(int(v) for v in row) for row in schedule))
+    return ZERO_SCHEDULE if out == ZERO_SCHEDULE else out
@@ -22,6 +22,8 @@ def validate_tariff() -> List[Dict]:
         issues.append({"level": "error", "msg": "TOU Demand is enabled but has no periods defined."})
     if ss.flat_enabled and not ss.flat_periods:
         issues.append({"level": "error", "msg": "Flat Demand is enabled but has no periods defined."})
+    if ss.coincident_enabled and not ss.coincident_periods:
+        issues.append({"level": "error", "msg": "Coincident Demand is enabled but has no periods defined."})
 
     # Warnings
     if not ss.basic_description: